@@ -0,0 +1,59 @@
+"""add route geometry
+
+Revision ID: 2b7f4c1d9e3a
+Revises: 1e9aeac89c4a
+Create Date: 2023-10-14 10:12:31.482716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from geoalchemy2 import Geometry
+
+
+# revision identifiers, used by Alembic.
+revision = '2b7f4c1d9e3a'
+down_revision = '1e9aeac89c4a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # routes is created from the model in faf5ceba2843,
+    # so fresh databases already have the column
+    inspector = sa.inspect(op.get_bind())
+    columns = [c["name"] for c in inspector.get_columns("routes")]
+
+    if "route_geom" not in columns:
+        op.add_column(
+            "routes",
+            sa.Column(
+                "route_geom",
+                Geometry(geometry_type='LINESTRING', srid=4326,
+                         spatial_index=False),
+                nullable=True
+            )
+        )
+
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_routes_route_geom "
+        "ON routes USING GIST (route_geom);"
+    )
+
+    # Backfill from the parallel coordinate arrays
+    op.execute("""
+        UPDATE routes SET route_geom = (
+            SELECT ST_SetSRID(
+                ST_MakeLine(ST_MakePoint(p.lon, p.lat) ORDER BY p.ord), 4326)
+            FROM unnest(route_longitudes, route_latitudes)
+                WITH ORDINALITY AS p(lon, lat, ord)
+        )
+        WHERE route_geom IS NULL
+        AND cardinality(route_longitudes) >= 2;
+    """)
+    pass
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_routes_route_geom;")
+    op.drop_column("routes", "route_geom")
+    pass
@@ -0,0 +1,37 @@
+"""create route instruction translation table
+
+Revision ID: 5c9a1e7b3f20
+Revises: 8d3e5a6f2c41
+Create Date: 2023-10-16 11:05:47.218390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c9a1e7b3f20'
+down_revision = '8d3e5a6f2c41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "route_instruction_translations",
+        sa.Column(
+            "route_id",
+            sa.Integer,
+            sa.ForeignKey("routes.route_id", ondelete="CASCADE"),
+            primary_key=True,
+            nullable=False
+        ),
+        sa.Column("language", sa.String, primary_key=True, nullable=False),
+        sa.Column("instructions", sa.ARRAY(sa.String), nullable=False)
+    )
+    pass
+
+
+def downgrade() -> None:
+    op.drop_table("route_instruction_translations")
+    pass
@@ -0,0 +1,35 @@
+"""create translation table
+
+Revision ID: 8d3e5a6f2c41
+Revises: 2b7f4c1d9e3a
+Create Date: 2023-10-15 16:40:12.903154
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3e5a6f2c41'
+down_revision = '2b7f4c1d9e3a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "translations",
+        sa.Column("text_hash", sa.String, primary_key=True, nullable=False),
+        sa.Column("target_language", sa.String,
+                  primary_key=True, nullable=False),
+        sa.Column("source_text", sa.String, nullable=False),
+        sa.Column("translated_text", sa.String, nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True),
+                  server_default=sa.text("now()"), nullable=False)
+    )
+    pass
+
+
+def downgrade() -> None:
+    op.drop_table("translations")
+    pass
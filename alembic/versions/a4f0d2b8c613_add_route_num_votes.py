@@ -0,0 +1,46 @@
+"""add route num_votes
+
+Revision ID: a4f0d2b8c613
+Revises: 5c9a1e7b3f20
+Create Date: 2023-10-17 14:22:05.631884
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4f0d2b8c613'
+down_revision = '5c9a1e7b3f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # routes is created from the model in faf5ceba2843,
+    # so fresh databases already have the column
+    inspector = sa.inspect(op.get_bind())
+    columns = [c["name"] for c in inspector.get_columns("routes")]
+
+    if "num_votes" not in columns:
+        op.add_column(
+            "routes",
+            sa.Column("num_votes", sa.Integer, nullable=False,
+                      server_default=sa.text("0"))
+        )
+
+    op.execute("""
+        UPDATE routes SET num_votes = counts.num_votes
+        FROM (
+            SELECT route_id, count(*) AS num_votes
+            FROM user_route_votes
+            GROUP BY route_id
+        ) AS counts
+        WHERE routes.route_id = counts.route_id;
+    """)
+    pass
+
+
+def downgrade() -> None:
+    op.drop_column("routes", "num_votes")
+    pass
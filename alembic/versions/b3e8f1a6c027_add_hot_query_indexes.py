@@ -0,0 +1,42 @@
+"""add hot query indexes
+
+Revision ID: b3e8f1a6c027
+Revises: e7b1c9d4a2f5
+Create Date: 2023-10-19 09:12:44.381526
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8f1a6c027'
+down_revision = 'e7b1c9d4a2f5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # prompt_routes is created from the model in 1e9aeac89c4a,
+    # so fresh databases already have its index
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_user_route_votes_route_id
+        ON user_route_votes (route_id);
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_prompt_routes_route_id
+        ON prompt_routes (route_id);
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_user_challenges_user_id_created_at
+        ON user_challenges (user_id, created_at);
+    """)
+    pass
+
+
+def downgrade() -> None:
+    op.execute(
+        "DROP INDEX IF EXISTS ix_user_challenges_user_id_created_at;")
+    op.execute("DROP INDEX IF EXISTS ix_prompt_routes_route_id;")
+    op.execute("DROP INDEX IF EXISTS ix_user_route_votes_route_id;")
+    pass
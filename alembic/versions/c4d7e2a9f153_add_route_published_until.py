@@ -0,0 +1,53 @@
+"""add route published until
+
+Revision ID: c4d7e2a9f153
+Revises: b3e8f1a6c027
+Create Date: 2023-10-21 11:06:18.927341
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d7e2a9f153'
+down_revision = 'b3e8f1a6c027'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # routes is created from the model in faf5ceba2843,
+    # so fresh databases already have the column and its indexes.
+    # Published routes are backfilled from the feed by the cleanup task.
+    inspector = sa.inspect(op.get_bind())
+    columns = [c["name"] for c in inspector.get_columns("routes")]
+
+    if "published_until" not in columns:
+        op.add_column(
+            "routes",
+            sa.Column(
+                "published_until",
+                sa.TIMESTAMP(timezone=True),
+                nullable=True
+            )
+        )
+
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_routes_published_route_geom
+        ON routes USING GIST (route_geom)
+        WHERE published_until IS NOT NULL;
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_routes_published_until
+        ON routes (published_until)
+        WHERE published_until IS NOT NULL;
+    """)
+    pass
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_routes_published_until;")
+    op.execute("DROP INDEX IF EXISTS ix_routes_published_route_geom;")
+    op.drop_column("routes", "published_until")
+    pass
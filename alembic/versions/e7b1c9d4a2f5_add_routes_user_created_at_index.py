@@ -0,0 +1,32 @@
+"""add routes user created_at index
+
+Revision ID: e7b1c9d4a2f5
+Revises: a4f0d2b8c613
+Create Date: 2023-10-18 10:41:27.209315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b1c9d4a2f5'
+down_revision = 'a4f0d2b8c613'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # routes is created from the model in faf5ceba2843,
+    # so fresh databases already have the index
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_routes_created_by_user_id_created_at
+        ON routes (created_by_user_id, created_at DESC, route_id DESC);
+    """)
+    pass
+
+
+def downgrade() -> None:
+    op.execute(
+        "DROP INDEX IF EXISTS ix_routes_created_by_user_id_created_at;")
+    pass
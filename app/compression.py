@@ -0,0 +1,179 @@
+import struct
+import zlib
+from typing import Optional
+from fastapi import Request, Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+# Responses are gzip compressed when the client accepts it and the body is
+# larger than GZIP_MINIMUM_SIZE, either by CompressionMiddleware or, for
+# route lists, by splicing the deflate chunks of the cached routes, see
+# SplicedJSON. Each chunk is compressed independently and ends on a byte
+# boundary (Z_SYNC_FLUSH), so the chunks of any routes can be concatenated
+# into one gzip member.
+
+GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+# Empty final deflate block, closing the spliced chunks
+DEFLATE_END = b"\x03\x00"
+_GZIP_TRAILER = struct.Struct("<II")
+
+COMPRESSIBLE_MEDIA_TYPES = ("application/json", "text/")
+
+
+def deflate_chunk(
+        data: bytes,
+        level: int = settings.GZIP_COMPRESSION_LEVEL) -> bytes:
+    """
+    Raw deflate blocks of data, not final, which can be spliced with others.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def accepts_gzip(headers: Headers) -> bool:
+    return any(
+        encoding.split(";")[0].strip() == "gzip"
+        and encoding.replace(" ", "").split(";")[-1] != "q=0"
+        for encoding in headers.get("accept-encoding", "").split(",")
+    )
+
+
+class SplicedJSON:
+    """
+    JSON body assembled from cached route payloads and the JSON around them,
+    which can be gzip compressed without compressing the routes again.
+
+    The deflate chunks of the routes are looked up with the chunk_of
+    callable, see route_cache.route_gzip_chunk.
+    """
+
+    def __init__(self):
+        # (data, route_id), the route id of the parts which are cached routes
+        self.parts: list[tuple[bytes, Optional[int]]] = []
+        self.size = 0
+
+    def add(self, data: bytes, route_id: Optional[int] = None):
+        self.parts.append((data, route_id))
+        self.size += len(data)
+
+    def render(self) -> bytes:
+        return b"".join(data for data, _ in self.parts)
+
+    def gzip(self, chunk_of) -> bytes:
+        chunks = [GZIP_HEADER]
+        crc = 0
+        glue = []
+
+        for data, route_id in self.parts:
+            crc = zlib.crc32(data, crc)
+            if route_id is None:
+                glue.append(data)
+                continue
+            # The JSON between two routes is compressed as one chunk
+            if glue:
+                chunks.append(deflate_chunk(b"".join(glue)))
+                glue = []
+            chunks.append(chunk_of(route_id, data))
+
+        if glue:
+            chunks.append(deflate_chunk(b"".join(glue)))
+
+        chunks.append(DEFLATE_END)
+        chunks.append(_GZIP_TRAILER.pack(crc, self.size & 0xffffffff))
+        return b"".join(chunks)
+
+
+def spliced_response(
+        request: Request,
+        body: SplicedJSON,
+        chunk_of,
+        headers: Optional[dict] = None) -> Response:
+    """
+    JSON response of body, gzip compressed when accepted by the client
+    and larger than GZIP_MINIMUM_SIZE.
+    """
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+
+    if (body.size >= settings.GZIP_MINIMUM_SIZE
+            and accepts_gzip(request.headers)):
+        headers["Content-Encoding"] = "gzip"
+        content = body.gzip(chunk_of)
+    else:
+        content = body.render()
+
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers=headers
+    )
+
+
+class CompressionMiddleware:
+    """
+    Gzip compress responses larger than minimum_size,
+    when the client accepts it.
+
+    Unlike starlette's GZipMiddleware, responses which are already encoded,
+    e.g. by spliced_response, are left as is, and so are streamed responses,
+    such as the server-sent logs, which are never buffered.
+    """
+
+    def __init__(
+            self,
+            app: ASGIApp,
+            minimum_size: int = 1000,
+            compresslevel: int = 6):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (scope["type"] != "http"
+                or not accepts_gzip(Headers(scope=scope))):
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if ("content-encoding" in headers
+                        or not headers.get("content-type", "").startswith(
+                            COMPRESSIBLE_MEDIA_TYPES)):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            body = message.get("body", b"")
+            if (message.get("more_body", False)
+                    or len(body) < self.minimum_size):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressor = zlib.compressobj(
+                self.compresslevel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            content = compressor.compress(body) + compressor.flush()
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["Content-Encoding"] = "gzip"
+            headers["Content-Length"] = str(len(content))
+            headers.add_vary_header("Accept-Encoding")
+
+            await send(start_message)
+            await send({"type": "http.response.body", "body": content})
+
+        await self.app(scope, receive, send_compressed)
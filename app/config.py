@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
 
@@ -8,6 +9,16 @@ class Settings(BaseSettings):
     DATABASE_PORT: str
     DATABASE_PASSWORD: str
     DATABASE_USERNAME: str
+    # Read-only replica for feed and listing reads, same credentials
+    DATABASE_REPLICA_HOSTNAME: Optional[str] = None
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: int = 30
+    DATABASE_POOL_RECYCLE: int = 1800
+    # Statement timeouts in milliseconds
+    DATABASE_STATEMENT_TIMEOUT: int = 5000
+    DATABASE_SEARCH_STATEMENT_TIMEOUT: int = 10000
+    DATABASE_READ_STATEMENT_TIMEOUT: int = 3000
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
@@ -20,6 +31,19 @@ class Settings(BaseSettings):
     REDIS_PORT: str
     REDIS_PASSWORD: str
     USER_CACHE_EXPIRY: int
+    REDIS_MAX_CONNECTIONS: int = 20
+    REDIS_POOL_TIMEOUT: int = 5
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    TRANSLATION_CACHE_EXPIRY: int = 60 * 60 * 24 * 30
+    FEED_CLEANUP_INTERVAL: int = 60
+    VOTE_RECONCILE_INTERVAL: int = 3600
+    VOTE_RECONCILE_BATCH_SIZE: int = 1000
+    # Milliseconds, per batch of routes
+    VOTE_RECONCILE_STATEMENT_TIMEOUT: int = 30000
+    ROUTE_L1_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    ROUTE_L1_CACHE_TTL: int = 300
+    GZIP_MINIMUM_SIZE: int = 1000
+    GZIP_COMPRESSION_LEVEL: int = 5
 
     model_config: ConfigDict = {
         "env_file": ".env",
@@ -1,19 +1,193 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from time import perf_counter
+from fastapi import Depends
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from pgvector.asyncpg import register_vector
+from pgvector.sqlalchemy import Vector
 from .config import settings
 
-SQLALCHEMY_DATABASE_URL = f"postgresql://{settings.DATABASE_USERNAME}:{settings.DATABASE_PASSWORD}@{settings.DATABASE_HOSTNAME}:{settings.DATABASE_PORT}/{settings.DATABASE_NAME}"
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+def database_url(hostname: str, driver: str = "postgresql") -> str:
+    return f"{driver}://{settings.DATABASE_USERNAME}:{settings.DATABASE_PASSWORD}@{hostname}:{settings.DATABASE_PORT}/{settings.DATABASE_NAME}"
+
+
+SQLALCHEMY_DATABASE_URL = database_url(settings.DATABASE_HOSTNAME)
+SQLALCHEMY_ASYNC_DATABASE_URL = database_url(
+    settings.DATABASE_HOSTNAME, "postgresql+asyncpg")
+
+
+class InstrumentedPoolMixin:
+    """
+    Connection pool keeping track of its utilisation,
+    and of the time spent waiting for a connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.peak_checked_out = 0
+        self.acquired = 0
+        self.wait_time = 0.0
+
+    def _do_get(self):
+        start = perf_counter()
+        connection = super()._do_get()
+        self.wait_time += perf_counter() - start
+        self.acquired += 1
+        self.peak_checked_out = max(
+            self.peak_checked_out, self.checkedout())
+        return connection
+
+    def stats(self) -> dict:
+        return {
+            "pool_size": self.size(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "peak_checked_out": self.peak_checked_out,
+            "acquired": self.acquired,
+            "avg_wait_ms": (
+                1000 * self.wait_time / self.acquired if self.acquired else 0
+            )
+        }
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+POOL_OPTIONS = {
+    "pool_size": settings.DATABASE_POOL_SIZE,
+    "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+    "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+    "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+    "pool_pre_ping": True,
+}
+
+# Used by scripts and the routers not yet moved to the async engine,
+# without a statement timeout as scripts insert data in bulk.
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    **POOL_OPTIONS
+)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+class BinaryVector(Vector):
+    """
+    Vector bound as is, in the binary format of the codec registered on the
+    connections of the async engines, rather than formatted as text.
+    """
+    cache_ok = True
+
+    def bind_processor(self, dialect):
+        return None
+
+
+def create_request_engine(url: str):
+    """
+    Async engine of the routers, every statement is cancelled after
+    DATABASE_STATEMENT_TIMEOUT milliseconds unless the session sets
+    another timeout, see async_db_dependency.
+
+    Vectors are sent and received in binary, so bind them with
+    BinaryVector.
+    """
+    request_engine = create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncQueuePool,
+        connect_args={"server_settings": {
+            "statement_timeout": str(settings.DATABASE_STATEMENT_TIMEOUT)
+        }},
+        **POOL_OPTIONS
+    )
+
+    @event.listens_for(request_engine.sync_engine, "connect")
+    def register_vector_codec(dbapi_connection, connection_record):
+        dbapi_connection.run_async(register_vector)
+
+    return request_engine
+
+
+# Used by the routers serving the hot paths, so queries do not block the
+# event loop. Objects stay loaded after commit, as lazy loads are not
+# possible with asyncio.
+async_engine = create_request_engine(SQLALCHEMY_ASYNC_DATABASE_URL)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False)
+
+# Feed and listing reads go to the read-only replica when there is one,
+# see get_async_read_db.
+read_engine = None
+if settings.DATABASE_REPLICA_HOSTNAME:
+    read_engine = create_request_engine(database_url(
+        settings.DATABASE_REPLICA_HOSTNAME, "postgresql+asyncpg"))
+    AsyncReadSessionLocal = async_sessionmaker(
+        read_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
+@event.listens_for(Session, "after_begin")
+def set_statement_timeout(session, transaction, connection):
+    """
+    Apply the statement timeout of the session to each of its transactions.
+    """
+    statement_timeout = session.info.get("statement_timeout")
+    if statement_timeout is not None:
+        connection.exec_driver_sql(
+            f"SET LOCAL statement_timeout = {int(statement_timeout)}")
+
+
 def get_db():
     try:
         db = SessionLocal()
         yield db
     finally:
         db.close()
+
+
+def async_db_dependency(session_factory, statement_timeout=None):
+    """
+    Dependency yielding a session of session_factory,
+    whose statements time out after statement_timeout milliseconds.
+    """
+    async def get_session():
+        async with session_factory() as db:
+            if statement_timeout is not None:
+                db.info["statement_timeout"] = statement_timeout
+            yield db
+
+    return get_session
+
+
+get_async_db = async_db_dependency(AsyncSessionLocal)
+# Vector searches may take longer than other statements, up to a bound
+get_async_search_db = async_db_dependency(
+    AsyncSessionLocal, settings.DATABASE_SEARCH_STATEMENT_TIMEOUT)
+
+if read_engine is not None:
+    get_async_read_db = async_db_dependency(
+        AsyncReadSessionLocal, settings.DATABASE_READ_STATEMENT_TIMEOUT)
+else:
+    async def get_async_read_db(db=Depends(get_async_db)):
+        """Without a replica, reads share the session of the request."""
+        yield db
+
+
+def database_stats() -> dict:
+    stats = {
+        "primary": async_engine.pool.stats(),
+        "sync": engine.pool.stats(),
+    }
+    if read_engine is not None:
+        stats["replica"] = read_engine.pool.stats()
+
+    return stats
@@ -0,0 +1,78 @@
+from math import floor, log10
+from time import mktime
+
+# Published routes are kept in one sorted set per feed ordering,
+# all holding the same members:
+# - routes_feed: number of votes, ties broken by publish time
+# - routes_feed_created_at: publish time
+# - routes_feed_hot: number of votes decayed by the age of the route
+ROUTES_FEED = 'routes_feed'
+ROUTES_FEED_CREATED_AT = 'routes_feed_created_at'
+ROUTES_FEED_HOT = 'routes_feed_hot'
+# Expiry time of each published route
+ROUTES_FEED_EXPIRY = 'routes_feed_expiry'
+
+FEED_ORDERINGS = {
+    'num_votes': ROUTES_FEED,
+    'created_at': ROUTES_FEED_CREATED_AT,
+    'hot': ROUTES_FEED_HOT,
+}
+
+# Assume the epoch time is January 1, 2022
+FEED_EPOCH = mktime((2022, 1, 1, 0, 0, 0, 0, 0, 0))
+FEED_MAX_TIME = mktime((2030, 1, 1, 0, 0, 0, 0, 0, 0))
+
+# Seconds of age a route must make up with ten times the votes
+HOT_DECAY = 45000
+
+
+def normalize_timestamp(timestamp: float) -> float:
+    return (timestamp - FEED_EPOCH) / (FEED_MAX_TIME - FEED_EPOCH)
+
+
+def denormalize_timestamp(normalized_timestamp: float) -> float:
+    return FEED_EPOCH + normalized_timestamp * (FEED_MAX_TIME - FEED_EPOCH)
+
+
+def feed_score(num_votes: int, published_at: float) -> float:
+    """
+    Score of a route in routes_feed. The normalized publish time is below 1,
+    so the integer part is the number of votes.
+    """
+    return num_votes + normalize_timestamp(published_at)
+
+
+def hot_score(num_votes: int, published_at: float) -> float:
+    """
+    Score of a route in routes_feed_hot, the order of magnitude of its votes
+    plus its publish time in units of HOT_DECAY.
+    A route needs ten times the votes of one published HOT_DECAY seconds
+    later to rank above it. Must match UPDATE_ROUTE_VOTES_SCRIPT.
+    """
+    return log10(max(num_votes, 1)) + (published_at - FEED_EPOCH) / HOT_DECAY
+
+
+def split_feed_score(score: float) -> tuple[int, float]:
+    """Number of votes and publish time of a routes_feed score."""
+    num_votes = floor(score)
+    return num_votes, denormalize_timestamp(score - num_votes)
+
+
+# Applies a vote change to a published route and recomputes its hot score
+# from the new number of votes, routes not in routes_feed are left out.
+# KEYS: routes_feed, routes_feed_created_at, routes_feed_hot
+# ARGV: route_id, change, FEED_EPOCH, HOT_DECAY
+UPDATE_ROUTE_VOTES_SCRIPT = """
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    return 0
+end
+local score = tonumber(redis.call('ZINCRBY', KEYS[1], ARGV[2], ARGV[1]))
+local published_at = redis.call('ZSCORE', KEYS[2], ARGV[1])
+if published_at then
+    local num_votes = math.max(math.floor(score), 1)
+    local hot = math.log10(num_votes) +
+        (tonumber(published_at) - tonumber(ARGV[3])) / tonumber(ARGV[4])
+    redis.call('ZADD', KEYS[3], hot, ARGV[1])
+end
+return 1
+"""
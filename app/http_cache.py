@@ -0,0 +1,78 @@
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response
+
+# Cache-Control of each class of endpoint.
+# Routes carry their vote count, clients revalidate them on every use.
+ROUTE_CACHE_CONTROL = "public, no-cache"
+# Route geometry never changes once created
+ROUTE_GEOMETRY_CACHE_CONTROL = "public, max-age=86400"
+# Catalogs only change on deployment
+CATALOG_CACHE_CONTROL = "public, max-age=3600"
+STATIC_CACHE_CONTROL = "public, max-age=86400"
+
+
+def content_etag(content: bytes) -> str:
+    return f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Whether the If-None-Match header of the request matches the ETag,
+    with the weak comparison used for GET requests.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    etag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified_since(request: Request, last_modified: float) -> bool:
+    """
+    Whether the resource is unchanged since the If-Modified-Since header of
+    the request. Only used when the request has no If-None-Match header.
+    """
+    if "if-none-match" in request.headers:
+        return False
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+    # HTTP dates have a resolution of one second
+    return int(last_modified) <= since
+
+
+def cache_headers(
+        etag: str,
+        cache_control: str,
+        last_modified: Optional[float] = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+
+    return headers
+
+
+def not_modified(
+        etag: str,
+        cache_control: str,
+        last_modified: Optional[float] = None) -> Response:
+    return Response(
+        status_code=304,
+        headers=cache_headers(etag, cache_control, last_modified)
+    )
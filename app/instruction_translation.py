@@ -0,0 +1,256 @@
+import re
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import translation
+
+# Local translation of Mapbox maneuver instructions.
+# Instructions are matched against the templates below, the template part
+# is translated from the phrase tables and street names are kept as is.
+# Only instructions that match no template are sent to Google Translate.
+
+SUPPORTED_LANGUAGES = ["zh-CN", "hi-IN"]
+
+DIRECTIONS = {
+    "north": {"zh-CN": "北", "hi-IN": "उत्तर"},
+    "northeast": {"zh-CN": "东北", "hi-IN": "उत्तर-पूर्व"},
+    "east": {"zh-CN": "东", "hi-IN": "पूर्व"},
+    "southeast": {"zh-CN": "东南", "hi-IN": "दक्षिण-पूर्व"},
+    "south": {"zh-CN": "南", "hi-IN": "दक्षिण"},
+    "southwest": {"zh-CN": "西南", "hi-IN": "दक्षिण-पश्चिम"},
+    "west": {"zh-CN": "西", "hi-IN": "पश्चिम"},
+    "northwest": {"zh-CN": "西北", "hi-IN": "उत्तर-पश्चिम"},
+}
+
+TURNS = {
+    "left": {"zh-CN": "左转", "hi-IN": "बाएं मुड़ें"},
+    "right": {"zh-CN": "右转", "hi-IN": "दाएं मुड़ें"},
+    "slight left": {"zh-CN": "稍向左转", "hi-IN": "थोड़ा बाएं मुड़ें"},
+    "slight right": {"zh-CN": "稍向右转", "hi-IN": "थोड़ा दाएं मुड़ें"},
+    "sharp left": {"zh-CN": "向左急转", "hi-IN": "तेज़ी से बाएं मुड़ें"},
+    "sharp right": {"zh-CN": "向右急转", "hi-IN": "तेज़ी से दाएं मुड़ें"},
+}
+
+SIDES = {
+    "left": {"zh-CN": "左侧", "hi-IN": "बाईं ओर"},
+    "right": {"zh-CN": "右侧", "hi-IN": "दाईं ओर"},
+}
+
+SLOT_TABLES = {
+    "direction": DIRECTIONS,
+    "turn": TURNS,
+    "side": SIDES,
+}
+
+SENTENCE_END = {"zh-CN": "。", "hi-IN": "।"}
+
+# Ordinals of the roundabout exits, numeric past the table
+HINDI_ORDINALS = {
+    1: "पहला", 2: "दूसरा", 3: "तीसरा", 4: "चौथा", 5: "पांचवां",
+    6: "छठा", 7: "सातवां", 8: "आठवां", 9: "नौवां", 10: "दसवां",
+}
+
+_TURN = "(?P<turn>slight left|slight right|sharp left|sharp right|left|right)"
+_SIDE = "(?P<side>left|right)"
+# A single street name: compound maneuvers such as
+# "Walk east on Flinders Lane, then turn left" match no template
+# and go to Google Translate whole
+_WAY = r"(?P<way>(?:(?!\s[Tt]hen\b|\.\s)[^,;:!?])+)"
+_NTH = r"(?:(?P<n>\d+)(?:st|nd|rd|th) )?"
+_ROUNDABOUT = "(?:roundabout|traffic circle|rotary)"
+
+# Ordered from most to least specific, the first match wins
+INSTRUCTION_TEMPLATES = [
+    (
+        rf"(?:Head|Drive|Walk|Cycle) (?P<direction>\w+) on {_WAY}",
+        {"zh-CN": "沿{way}向{direction}前进",
+         "hi-IN": "{way} पर {direction} की ओर चलें"}
+    ),
+    (
+        r"(?:Head|Drive|Walk|Cycle) (?P<direction>\w+)",
+        {"zh-CN": "向{direction}前进",
+         "hi-IN": "{direction} की ओर चलें"}
+    ),
+    (
+        rf"(?:Turn|Make a|Bear) {_TURN} to stay on {_WAY}",
+        {"zh-CN": "{turn}，继续沿{way}前进",
+         "hi-IN": "{way} पर बने रहने के लिए {turn}"}
+    ),
+    (
+        rf"(?:Turn|Make a|Bear) {_TURN} onto {_WAY}",
+        {"zh-CN": "{turn}进入{way}",
+         "hi-IN": "{way} पर {turn}"}
+    ),
+    (
+        rf"(?:Turn|Make a|Bear) {_TURN}",
+        {"zh-CN": "{turn}",
+         "hi-IN": "{turn}"}
+    ),
+    (
+        rf"(?:Continue|Go) straight (?:onto|on|to stay on) {_WAY}",
+        {"zh-CN": "直行，继续沿{way}前进",
+         "hi-IN": "{way} पर सीधे चलते रहें"}
+    ),
+    (
+        rf"Continue (?:onto|on) {_WAY}",
+        {"zh-CN": "继续沿{way}前进",
+         "hi-IN": "{way} पर चलते रहें"}
+    ),
+    (
+        r"(?:Continue|Go) straight|Continue",
+        {"zh-CN": "继续直行",
+         "hi-IN": "सीधे चलते रहें"}
+    ),
+    (
+        rf"Keep {_SIDE} at the fork onto {_WAY}",
+        {"zh-CN": "在岔路口靠{side}进入{way}",
+         "hi-IN": "कांटे पर {side} रहकर {way} पर जाएं"}
+    ),
+    (
+        rf"Keep {_SIDE} at the fork",
+        {"zh-CN": "在岔路口靠{side}",
+         "hi-IN": "कांटे पर {side} रहें"}
+    ),
+    (
+        rf"Keep {_SIDE} onto {_WAY}",
+        {"zh-CN": "靠{side}进入{way}",
+         "hi-IN": "{side} रहकर {way} पर जाएं"}
+    ),
+    (
+        rf"Keep {_SIDE} to stay on {_WAY}",
+        {"zh-CN": "保持{side}，沿{way}继续",
+         "hi-IN": "{way} पर बने रहने के लिए {side} रहें"}
+    ),
+    (
+        rf"Keep {_SIDE}",
+        {"zh-CN": "靠{side}",
+         "hi-IN": "{side} रहें"}
+    ),
+    (
+        rf"Make a U-turn onto {_WAY}",
+        {"zh-CN": "掉头进入{way}",
+         "hi-IN": "{way} पर यू-टर्न लें"}
+    ),
+    (
+        r"Make a U-turn",
+        {"zh-CN": "掉头",
+         "hi-IN": "यू-टर्न लें"}
+    ),
+    (
+        rf"Enter the {_ROUNDABOUT} and take the (?P<n>\d+)(?:st|nd|rd|th) "
+        rf"exit onto {_WAY}",
+        {"zh-CN": "进入环岛并从第{n}个出口驶出，进入{way}",
+         "hi-IN": "गोलचक्कर में प्रवेश करें और {n} निकास लेकर {way} पर जाएं"}
+    ),
+    (
+        rf"Enter the {_ROUNDABOUT} and take the (?P<n>\d+)(?:st|nd|rd|th) "
+        r"exit",
+        {"zh-CN": "进入环岛并从第{n}个出口驶出",
+         "hi-IN": "गोलचक्कर में प्रवेश करें और {n} निकास लें"}
+    ),
+    (
+        rf"Exit the {_ROUNDABOUT} onto {_WAY}",
+        {"zh-CN": "驶出环岛进入{way}",
+         "hi-IN": "गोलचक्कर से निकलकर {way} पर जाएं"}
+    ),
+    (
+        rf"You have arrived at your {_NTH}destination, on the {_SIDE}",
+        {"zh-CN": "您已到达目的地，目的地在{side}",
+         "hi-IN": "आप अपने गंतव्य पर पहुँच गए हैं, {side}"}
+    ),
+    (
+        rf"You have arrived at your {_NTH}destination",
+        {"zh-CN": "您已到达目的地",
+         "hi-IN": "आप अपने गंतव्य पर पहुँच गए हैं"}
+    ),
+    (
+        rf"Your {_NTH}destination is on the {_SIDE}",
+        {"zh-CN": "目的地在您的{side}",
+         "hi-IN": "आपका गंतव्य {side} है"}
+    ),
+    (
+        rf"You have arrived at {_WAY}",
+        {"zh-CN": "您已到达{way}",
+         "hi-IN": "आप {way} पर पहुँच गए हैं"}
+    ),
+]
+
+COMPILED_TEMPLATES = [
+    (re.compile(f"^(?:{pattern})$"), templates)
+    for pattern, templates in INSTRUCTION_TEMPLATES
+]
+
+
+def translate_instruction(instruction: str, language: str) -> Optional[str]:
+    """
+    Translate a Mapbox maneuver instruction from the phrase tables.
+
+    Returns None when the instruction matches no known template.
+    """
+    text = instruction.strip()
+    sentence_end = ""
+    if text.endswith("."):
+        text = text[:-1]
+        sentence_end = SENTENCE_END[language]
+
+    for pattern, templates in COMPILED_TEMPLATES:
+        match = pattern.match(text)
+        if match is None:
+            continue
+
+        slots = {}
+        for name, value in match.groupdict().items():
+            if value is None:
+                continue
+            if name in SLOT_TABLES:
+                phrase = SLOT_TABLES[name].get(value.lower())
+                if phrase is None:
+                    return None
+                slots[name] = phrase[language]
+            elif name == "n" and language == "hi-IN":
+                slots[name] = HINDI_ORDINALS.get(int(value), f"{value}वां")
+            else:
+                slots[name] = value
+
+        return templates[language].format(**slots) + sentence_end
+
+    return None
+
+
+async def translate_instructions(
+        instructions: list[str],
+        language: str,
+        db: AsyncSession) -> list[str]:
+    """
+    Translate route instructions, locally where a template matches and
+    through the cached Google Translate layer otherwise.
+
+    Args:
+    - instructions (list[str]): The Mapbox maneuver instructions.
+    - language (str): One of SUPPORTED_LANGUAGES.
+    - db (AsyncSession): The database session, new translations are
+      added to it for the caller to commit.
+
+    Returns:
+    - list[str]: The translated instructions, in the same order.
+    """
+    translated = [
+        translate_instruction(instruction, language)
+        for instruction in instructions
+    ]
+
+    unmatched = [
+        instruction for instruction, result in zip(instructions, translated)
+        if result is None
+    ]
+    if not unmatched:
+        return translated
+
+    remote = iter(
+        await translation.translate_texts(unmatched, language, db)
+    )
+
+    return [
+        result if result is not None else next(remote)
+        for result in translated
+    ]
@@ -0,0 +1,91 @@
+from typing import Callable, Iterable, NamedTuple, Tuple
+import aioredis
+
+from .feed import FEED_ORDERINGS, ROUTES_FEED_EXPIRY
+from .instruction_translation import SUPPORTED_LANGUAGES
+from .route_cache import route_details_key, publish_route_invalidation
+
+# Each cached entity declares the Redis keys derived from its id, the
+# sorted sets its id is a member of, its version keys and whether workers
+# keep it in their L1. Writes emit (entity, id) events, see invalidate.
+# Version keys are incremented on each invalidation, so a loader can tell
+# whether the entity changed while it was reading the database.
+
+VERSION_EXPIRY = 86400  # 1 day in seconds
+
+
+def route_instructions_key(route_id: int) -> str:
+    return f"route_instructions:{route_id}"
+
+
+def route_instructions_translated_key(route_id: int, language: str) -> str:
+    return f"route_instructions_translated:{route_id}:{language}"
+
+
+def user_votes_key(user_id: int) -> str:
+    return f"user_votes:{user_id}"
+
+
+def user_votes_version_key(user_id: int) -> str:
+    return f"user_votes_version:{user_id}"
+
+
+class CachedEntity(NamedTuple):
+    keys: Callable[[int], list[str]]
+    sorted_sets: Tuple[str, ...] = ()
+    version_keys: Callable[[int], list[str]] = lambda entity_id: []
+    in_l1: bool = False
+
+
+CACHED_ENTITIES = {
+    "route": CachedEntity(
+        keys=lambda route_id: [
+            route_details_key(route_id),
+            route_instructions_key(route_id),
+            *[
+                route_instructions_translated_key(route_id, language)
+                for language in SUPPORTED_LANGUAGES
+            ]
+        ],
+        sorted_sets=(*FEED_ORDERINGS.values(), ROUTES_FEED_EXPIRY),
+        in_l1=True
+    ),
+    "user_votes": CachedEntity(
+        keys=lambda user_id: [user_votes_key(user_id)],
+        version_keys=lambda user_id: [user_votes_version_key(user_id)]
+    ),
+}
+
+
+async def invalidate(
+        events: Iterable[Tuple[str, int]],
+        r: aioredis.Redis):
+    """
+    Drop everything cached for the given (entity, id) events,
+    with one pipeline.
+
+    Args:
+    - events (Iterable[Tuple[str, int]]): The entity, one of
+      CACHED_ENTITIES, and the id of each changed or deleted object.
+    - r (aioredis.Redis): The Redis instance for feeds.
+    """
+    events = list(dict.fromkeys(events))
+    if not events:
+        return
+
+    keys, l1_ids = [], []
+    async with r.pipeline(transaction=False) as pipe:
+        for entity_name, entity_id in events:
+            entity = CACHED_ENTITIES[entity_name]
+            keys.extend(entity.keys(entity_id))
+            for sorted_set in entity.sorted_sets:
+                pipe.zrem(sorted_set, entity_id)
+            for version_key in entity.version_keys(entity_id):
+                pipe.incr(version_key)
+                pipe.expire(version_key, VERSION_EXPIRY)
+            if entity.in_l1:
+                l1_ids.append(entity_id)
+
+        pipe.delete(*keys)
+        await publish_route_invalidation(l1_ids, pipe)
+        await pipe.execute()
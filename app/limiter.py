@@ -1,6 +1,21 @@
+import redis
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from .redis import redis_url_limiter
+from .config import settings
 
 
-limiter = Limiter(key_func=get_remote_address, storage_uri=redis_url_limiter)
+# Like the pools of the RedisRegistry, wait for a free connection
+# instead of failing once max_connections are in use
+limiter_connection_pool = redis.BlockingConnectionPool.from_url(
+    redis_url_limiter,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    timeout=settings.REDIS_POOL_TIMEOUT,
+    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL
+)
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=redis_url_limiter,
+    storage_options={"connection_pool": limiter_connection_pool}
+)
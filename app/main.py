@@ -4,6 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
 import aioredis
+import asyncio
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 from .routers import (
@@ -50,6 +51,14 @@ from .loggings import (
     get_redis_logs_db
 )
 from .common import get_current_username_doc
+from .config import settings
+from .compression import CompressionMiddleware
+from .responses import FastJSONResponse
+from .database import database_stats
+from .redis import redis_registry
+from .route_cache import listen_route_invalidations, route_cache_stats
+from .routers.route import cleanup_expired_routes_periodically
+from .routers.vote import reconcile_vote_counts_periodically
 from .huggingface_models import embedding_model, get_similar_image
 
 
@@ -118,6 +127,7 @@ app = FastAPI(
     docs_url=None,
     redoc_url=None,
     openapi_url=None,
+    default_response_class=FastJSONResponse,
 )
 
 
@@ -127,10 +137,16 @@ app.add_middleware(
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"]
 )
 app.state.limiter = limiter
 app.add_middleware(SlowAPIMiddleware)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.GZIP_MINIMUM_SIZE,
+    compresslevel=settings.GZIP_COMPRESSION_LEVEL
+)
 
 app.include_router(auth.router)
 app.include_router(user.router)
@@ -178,9 +194,25 @@ async def startup_event():
 
     images = get_similar_image(text="Melbourne", location_type='landmark')
 
+    redis_registry.init()
+    app.state.feed_cleanup_task = asyncio.create_task(
+        cleanup_expired_routes_periodically())
+    app.state.vote_reconcile_task = asyncio.create_task(
+        reconcile_vote_counts_periodically())
+    app.state.route_invalidation_task = asyncio.create_task(
+        listen_route_invalidations())
     pass
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Shutdown event"""
+    app.state.feed_cleanup_task.cancel()
+    app.state.vote_reconcile_task.cancel()
+    app.state.route_invalidation_task.cancel()
+    await redis_registry.close()
+
+
 @app.get("/", include_in_schema=False)
 async def get_swagger_documentation(
     username: str = Depends(get_current_username_doc)
@@ -212,3 +244,21 @@ async def logs_stream(
         r: aioredis.Redis = Depends(get_redis_logs_db),
         username: str = Depends(get_current_username_doc)):
     return await logs_stream_(r)
+
+
+@app.get("/redis/stats/", include_in_schema=False)
+async def redis_stats(username: str = Depends(get_current_username_doc)):
+    return {
+        "health": await redis_registry.health_check(),
+        "pools": redis_registry.stats()
+    }
+
+
+@app.get("/cache/stats/", include_in_schema=False)
+async def cache_stats(username: str = Depends(get_current_username_doc)):
+    return {"routes": route_cache_stats()}
+
+
+@app.get("/db/stats/", include_in_schema=False)
+async def db_stats(username: str = Depends(get_current_username_doc)):
+    return {"pools": database_stats()}
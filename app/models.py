@@ -9,7 +9,8 @@ from sqlalchemy import (
     text,
     ForeignKey,
     Boolean,
-    ARRAY
+    ARRAY,
+    Index
 )
 from sqlalchemy.orm import mapped_column, relationship
 from pgvector.sqlalchemy import Vector
@@ -68,6 +69,11 @@ class Route(Base):
     route_longitudes = Column(ARRAY(Float), nullable=False)
     instructions = Column(ARRAY(String), nullable=False)
     duration = Column(Integer, nullable=False)
+    route_geom = Column(
+        Geometry(geometry_type='LINESTRING', srid=4326), nullable=True)
+    num_votes = Column(Integer, nullable=False, server_default=text("0"))
+    # End of the publication in the feed, cleared once it has passed
+    published_until = Column(TIMESTAMP(timezone=True), nullable=True)
     created_at = Column(TIMESTAMP(timezone=True),
                         server_default=text("now()"), nullable=False)
     image = relationship("Route_Image", back_populates="route", uselist=False)
@@ -78,6 +84,29 @@ class Route(Base):
     )
 
 
+# Keyset pagination of a user's routes, newest first
+Index(
+    "ix_routes_created_by_user_id_created_at",
+    Route.created_by_user_id,
+    Route.created_at.desc(),
+    Route.route_id.desc()
+)
+
+# Nearby published routes, and the routes whose publication has passed.
+# Only published routes are indexed.
+Index(
+    "ix_routes_published_route_geom",
+    Route.route_geom,
+    postgresql_using="gist",
+    postgresql_where=Route.published_until.isnot(None)
+)
+Index(
+    "ix_routes_published_until",
+    Route.published_until,
+    postgresql_where=Route.published_until.isnot(None)
+)
+
+
 class User_Route_Vote(Base):
     __tablename__ = "user_route_votes"
 
@@ -88,7 +117,8 @@ class User_Route_Vote(Base):
     route_id = Column(Integer,
                       ForeignKey("routes.route_id", ondelete="CASCADE"),
                       nullable=False,
-                      primary_key=True)
+                      primary_key=True,
+                      index=True)
     created_at = Column(TIMESTAMP(timezone=True),
                         server_default=text("now()"), nullable=False)
 
@@ -108,7 +138,8 @@ class Prompt_Route(Base):
     route_id = Column(
         Integer,
         ForeignKey("routes.route_id", ondelete="CASCADE"),
-        nullable=False)
+        nullable=False,
+        index=True)
 
 
 class Landmark(Base):
@@ -231,6 +262,14 @@ class User_Challenge(Base):
     score_added = Column(Boolean, nullable=False, default=False)
 
 
+# Challenge history of a user over a range of days
+Index(
+    "ix_user_challenges_user_id_created_at",
+    User_Challenge.user_id,
+    User_Challenge.created_at
+)
+
+
 class Route_Image(Base):
     __tablename__ = "route_images"
     route_id = Column(Integer,
@@ -240,3 +279,25 @@ class Route_Image(Base):
     route_image_name = Column(String, nullable=False)
 
     route = relationship("Route", back_populates="image")
+
+
+class Translation(Base):
+    __tablename__ = "translations"
+
+    text_hash = Column(String, primary_key=True, nullable=False)
+    target_language = Column(String, primary_key=True, nullable=False)
+    source_text = Column(String, nullable=False)
+    translated_text = Column(String, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True),
+                        server_default=text("now()"), nullable=False)
+
+
+class Route_Instruction_Translation(Base):
+    __tablename__ = "route_instruction_translations"
+
+    route_id = Column(Integer,
+                      ForeignKey("routes.route_id", ondelete="CASCADE"),
+                      primary_key=True,
+                      nullable=False)
+    language = Column(String, primary_key=True, nullable=False)
+    instructions = Column(ARRAY(String), nullable=False)
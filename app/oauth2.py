@@ -2,12 +2,13 @@ from fastapi import Depends, Request
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import json
 
 from .config import settings
 from .schemas import TokenData, User
-from .database import get_db
+from .database import get_async_db
 from . import models
 import aioredis
 from .redis import get_redis_refresh_token_db
@@ -44,7 +45,7 @@ oauth2_scheme = CustomOAuth2PasswordBearer(tokenUrl="login/form/")
 
 async def get_user(
     username: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     r: aioredis.Redis = Depends(get_redis_refresh_token_db)
 ):
     username = username.lower()
@@ -57,8 +58,8 @@ async def get_user(
         user = User(**user)
 
     else:
-        user = db.query(models.User).filter(
-            models.User.username == username).first()
+        user = await db.scalar(
+            select(models.User).where(models.User.username == username))
 
         if not user:
             raise UserNotFoundException()
@@ -120,7 +121,7 @@ async def verify_access_token(token: str):
 async def get_current_user(
         request: Request,
         token: str = Depends(oauth2_scheme),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_refresh_token_db)):
 
     token_data = await verify_access_token(token)
@@ -132,7 +133,7 @@ async def get_current_user(
 async def get_current_user_optional(
         request: Request,
         token: str = Depends(oauth2_scheme),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_refresh_token_db)):
 
     try:
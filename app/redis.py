@@ -1,115 +1,202 @@
 import aioredis
 import asyncio
+from time import perf_counter
+from uuid import uuid4
 from functools import wraps
 from contextlib import asynccontextmanager
 from .config import settings
 
+REDIS_REFRESH_TOKEN_DB = 0
+REDIS_ROOM_DB = 1
+REDIS_FEED_DB = 2
+REDIS_IMAGES_DB = 3
+REDIS_TRANSLATION_DB = 4
+REDIS_LOGS_DB = 14
+REDIS_LIMITER_DB = 15
+
+
+def redis_url(db: int) -> str:
+    return f"redis://:{settings.REDIS_PASSWORD}@{settings.REDIS_HOSTNAME}:{settings.REDIS_PORT}/{db}"
+
+
+class InstrumentedConnectionPool(aioredis.BlockingConnectionPool):
+    """
+    Bounded connection pool keeping track of its utilisation.
+    Waits for a free connection instead of opening more than
+    max_connections.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.acquired = 0
+        self.wait_time = 0.0
+
+    async def get_connection(self, command_name, *keys, **options):
+        start = perf_counter()
+        connection = await super().get_connection(
+            command_name, *keys, **options)
+        self.wait_time += perf_counter() - start
+        self.acquired += 1
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        return connection
+
+    async def release(self, connection):
+        await super().release(connection)
+        self.in_use -= 1
+
+    def stats(self) -> dict:
+        return {
+            "max_connections": self.max_connections,
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+            "acquired": self.acquired,
+            "avg_wait_ms": (
+                1000 * self.wait_time / self.acquired if self.acquired else 0
+            )
+        }
+
+
+class RedisRegistry:
+    """
+    Process-wide Redis clients, one connection pool per logical database.
+    Pools are created on app startup, or on first use outside the app.
+    Clients returning bytes, for binary values, have pools of their own.
+    """
+
+    def __init__(self, dbs: list[int]):
+        self.dbs = dbs
+        self.clients: dict[tuple[int, bool], aioredis.Redis] = {}
+
+    def client(self, db: int, decode_responses: bool = True) -> aioredis.Redis:
+        key = (db, decode_responses)
+        if key not in self.clients:
+            pool = InstrumentedConnectionPool.from_url(
+                redis_url(db),
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                timeout=settings.REDIS_POOL_TIMEOUT,
+                health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+                encoding='utf-8',
+                decode_responses=decode_responses
+            )
+            self.clients[key] = aioredis.Redis(connection_pool=pool)
+        return self.clients[key]
+
+    def init(self):
+        for db in self.dbs:
+            self.client(db)
+
+    async def close(self):
+        for client in self.clients.values():
+            await client.connection_pool.disconnect()
+        self.clients = {}
+
+    async def health_check(self) -> dict:
+        health = {}
+        for db in self.dbs:
+            try:
+                health[db] = await self.client(db).ping()
+            except Exception:
+                health[db] = False
+        return health
+
+    def stats(self) -> dict:
+        return {
+            db if decode_responses else f"{db}:bytes":
+                client.connection_pool.stats()
+            for (db, decode_responses), client in self.clients.items()
+        }
+
+
+# The limiter keeps its own bounded pool, see limiter.py
+redis_registry = RedisRegistry([
+    REDIS_REFRESH_TOKEN_DB,
+    REDIS_ROOM_DB,
+    REDIS_FEED_DB,
+    REDIS_IMAGES_DB,
+    REDIS_TRANSLATION_DB,
+    REDIS_LOGS_DB
+])
+
 
 async def get_redis_refresh_token_db():
-    redis_url = f"redis://:{settings.REDIS_PASSWORD}@{settings.REDIS_HOSTNAME}:{settings.REDIS_PORT}/0"
-    redis = aioredis.from_url(
-        redis_url, encoding='utf-8', decode_responses=True)
-    conn = redis.client()
-    try:
-        yield conn
-    finally:
-        await conn.close()
+    yield redis_registry.client(REDIS_REFRESH_TOKEN_DB)
 
 
 @asynccontextmanager
 async def redis_refresh_token_db_context():
-    redis_url = f"redis://:{settings.REDIS_PASSWORD}@{settings.REDIS_HOSTNAME}:{settings.REDIS_PORT}/0"
-    redis = aioredis.from_url(
-        redis_url, encoding='utf-8', decode_responses=True)
-    conn = redis.client()
-    try:
-        yield conn
-    finally:
-        await conn.close()
+    yield redis_registry.client(REDIS_REFRESH_TOKEN_DB)
 
 
 async def get_redis_room_db():
-    redis_url = f"redis://:{settings.REDIS_PASSWORD}@{settings.REDIS_HOSTNAME}:{settings.REDIS_PORT}/1"
-    redis = aioredis.from_url(
-        redis_url, encoding='utf-8', decode_responses=True)
-    conn = redis.client()
-    try:
-        yield conn
-    finally:
-        await conn.close()
+    yield redis_registry.client(REDIS_ROOM_DB)
 
 
 @asynccontextmanager
 async def redis_room_db_context():
-    redis_url = f"redis://:{settings.REDIS_PASSWORD}@{settings.REDIS_HOSTNAME}:{settings.REDIS_PORT}/1"
-    redis = aioredis.from_url(
-        redis_url, encoding='utf-8', decode_responses=True)
-    conn = redis.client()
-    try:
-        yield conn
-    finally:
-        await conn.close()
+    yield redis_registry.client(REDIS_ROOM_DB)
 
 
 async def get_redis_feed_db():
-    redis_url = f"redis://:{settings.REDIS_PASSWORD}@{settings.REDIS_HOSTNAME}:{settings.REDIS_PORT}/2"
-    redis = aioredis.from_url(
-        redis_url, encoding='utf-8', decode_responses=True)
-    conn = redis.client()
-    try:
-        yield conn
-    finally:
-        await conn.close()
+    yield redis_registry.client(REDIS_FEED_DB)
 
 
 async def get_redis_images_db():
-    redis_url = f"redis://:{settings.REDIS_PASSWORD}@{settings.REDIS_HOSTNAME}:{settings.REDIS_PORT}/3"
-    redis = aioredis.from_url(
-        redis_url, encoding='utf-8', decode_responses=True)
-    conn = redis.client()
-    try:
-        yield conn
-    finally:
-        await conn.close()
+    yield redis_registry.client(REDIS_IMAGES_DB)
 
 
 @asynccontextmanager
 async def get_redis_feed_db_context():
-    redis_url = f"redis://:{settings.REDIS_PASSWORD}@{settings.REDIS_HOSTNAME}:{settings.REDIS_PORT}/2"
-    redis = aioredis.from_url(
-        redis_url, encoding='utf-8', decode_responses=True)
-    conn = redis.client()
+    yield redis_registry.client(REDIS_FEED_DB)
+
+
+def redis_feed_db_bytes() -> aioredis.Redis:
+    """Feed database client returning bytes, for the route cache."""
+    return redis_registry.client(REDIS_FEED_DB, decode_responses=False)
+
 
-    try:
-        yield conn
-    finally:
-        await conn.close()
+def redis_translation_db() -> aioredis.Redis:
+    """
+    Translation cache client, in a database of its own so that feed
+    flushes and scans never touch it.
+    """
+    return redis_registry.client(REDIS_TRANSLATION_DB)
 
 
 async def get_redis_logs_db():
-    redis_url = f"redis://:{settings.REDIS_PASSWORD}@{settings.REDIS_HOSTNAME}:{settings.REDIS_PORT}/14"
-    redis = aioredis.from_url(
-        redis_url, encoding='utf-8', decode_responses=True)
-    conn = redis.client()
-    try:
-        yield conn
-    finally:
-        await conn.close()
+    yield redis_registry.client(REDIS_LOGS_DB)
 
 
 @asynccontextmanager
 async def redis_logs_db_context():
-    redis_url = f"redis://:{settings.REDIS_PASSWORD}@{settings.REDIS_HOSTNAME}:{settings.REDIS_PORT}/14"
-    redis = aioredis.from_url(
-        redis_url, encoding='utf-8', decode_responses=True)
-    conn = redis.client()
-    try:
-        yield conn
-    finally:
-        await conn.close()
+    yield redis_registry.client(REDIS_LOGS_DB)
+
+
+redis_url_limiter = redis_url(REDIS_LIMITER_DB)
+
+# Identifies the leases held by this worker, see acquire_lease
+WORKER_ID = uuid4().hex
+
+# Takes the lease, or extends it when the worker holds it already
+ACQUIRE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+end
+return redis.call('SET', KEYS[1], ARGV[1], 'NX', 'EX', ARGV[2])
+"""
 
 
-redis_url_limiter = f"redis://:{settings.REDIS_PASSWORD}@{settings.REDIS_HOSTNAME}:{settings.REDIS_PORT}/15"
+async def acquire_lease(r: aioredis.Redis, name: str, seconds: int) -> bool:
+    """
+    Take or extend the lease name for seconds, unless another worker
+    holds it. Periodic tasks only run in the worker holding their lease,
+    another worker takes over when it lapses.
+    """
+    acquired = await r.eval(
+        ACQUIRE_LEASE_SCRIPT, 1, f"lease:{name}", WORKER_ID, seconds)
+    return acquired is not None
 
 
 def async_retry(attempts=3, delay=2):
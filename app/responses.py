@@ -0,0 +1,19 @@
+from typing import Any
+import orjson
+from fastapi.responses import ORJSONResponse
+
+# orjson serialises datetimes, numpy arrays and floats natively, instead of
+# FastAPI's JSONResponse going through json.dumps.
+FAST_JSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    Default response class of the app, see main.py.
+    UTC datetimes end with Z, as in the cached routes.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=FAST_JSON_OPTIONS)
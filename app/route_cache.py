@@ -0,0 +1,277 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from time import monotonic
+from typing import Iterable, Optional
+import aioredis
+import orjson
+
+from .config import settings
+from .redis import get_redis_feed_db_context, redis_feed_db_bytes
+from .route_codec import encode_route, route_payload
+from .compression import deflate_chunk
+
+logger = logging.getLogger(__name__)
+
+# Routes are cached in two tiers:
+# - L1: route JSON in the memory of each worker, see LocalRouteCache,
+#   with its gzip deflate chunk once a compressed response included it
+# - Redis: route_details_{route_id}, shared by all workers, see route_codec
+# Workers publish the ids of changed routes on ROUTE_INVALIDATION_CHANNEL,
+# every worker then drops them from its L1.
+
+ROUTE_INVALIDATION_CHANNEL = "route_invalidation"
+ROUTE_DETAILS_EXPIRY = 3600  # 1 hour in seconds
+
+
+def route_details_key(route_id: int) -> str:
+    return f"route_details_{route_id}"
+
+
+class TierStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hits: int, misses: int):
+        self.hits += hits
+        self.misses += misses
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0
+        }
+
+
+class LocalRouteCache:
+    """
+    In-process LRU cache of route JSON, bounded by its total size in bytes.
+    Entries also expire after ttl seconds, so a missed invalidation
+    is not served for long.
+
+    Each entry is [expires_at, payload, deflate chunk or None].
+    """
+
+    def __init__(self, max_bytes: int, ttl: int):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries: OrderedDict[int, list] = OrderedDict()
+        self.size = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.tier_stats = TierStats()
+
+    def get_many(self, route_ids: Iterable[int]) -> dict[int, bytes]:
+        now = monotonic()
+        found = {}
+        for route_id in route_ids:
+            entry = self.entries.get(route_id)
+            if entry is None:
+                continue
+            expires_at, payload, _ = entry
+            if expires_at < now:
+                self.pop(route_id)
+                continue
+            self.entries.move_to_end(route_id)
+            found[route_id] = payload
+
+        return found
+
+    def set(self, route_id: int, payload: bytes):
+        if len(payload) > self.max_bytes:
+            return
+
+        self.pop(route_id)
+        self.entries[route_id] = [monotonic() + self.ttl, payload, None]
+        self.size += len(payload)
+        self.evict()
+
+    def get_chunk(self, route_id: int, payload: bytes) -> Optional[bytes]:
+        """The deflate chunk of a cached route, if still cached as payload."""
+        entry = self.entries.get(route_id)
+        if entry is None or entry[1] != payload:
+            return None
+        return entry[2]
+
+    def set_chunk(self, route_id: int, payload: bytes, chunk: bytes):
+        entry = self.entries.get(route_id)
+        if entry is None or entry[1] != payload or entry[2] is not None:
+            return
+        entry[2] = chunk
+        self.size += len(chunk)
+        self.evict()
+
+    def evict(self):
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= self.entry_size(evicted)
+            self.evictions += 1
+
+    @staticmethod
+    def entry_size(entry: list) -> int:
+        _, payload, chunk = entry
+        return len(payload) + (len(chunk) if chunk is not None else 0)
+
+    def pop(self, route_id: int) -> bool:
+        entry = self.entries.pop(route_id, None)
+        if entry is None:
+            return False
+        self.size -= self.entry_size(entry)
+        return True
+
+    def invalidate(self, route_ids: Iterable[int]):
+        for route_id in route_ids:
+            if self.pop(route_id):
+                self.invalidations += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def stats(self) -> dict:
+        return {
+            **self.tier_stats.stats(),
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+route_l1_cache = LocalRouteCache(
+    settings.ROUTE_L1_CACHE_MAX_BYTES, settings.ROUTE_L1_CACHE_TTL)
+route_redis_stats = TierStats()
+route_db_stats = TierStats()
+
+
+def route_cache_stats() -> dict:
+    return {
+        "l1": route_l1_cache.stats(),
+        "redis": route_redis_stats.stats(),
+        "db": route_db_stats.stats()
+    }
+
+
+async def publish_route_invalidation(
+        route_ids: Iterable[int],
+        r: aioredis.Redis):
+    """
+    Drop routes from the L1 of this worker and notify the other workers.
+    r may be a pipeline, see invalidation.py.
+    """
+    route_ids = [int(route_id) for route_id in route_ids]
+    if not route_ids:
+        return
+
+    route_l1_cache.invalidate(route_ids)
+    await r.publish(
+        ROUTE_INVALIDATION_CHANNEL,
+        ",".join(str(route_id) for route_id in route_ids)
+    )
+
+
+async def listen_route_invalidations():
+    """
+    Background task applying the invalidations published by all workers.
+    """
+    async with get_redis_feed_db_context() as r:
+        while True:
+            pubsub = r.pubsub()
+            try:
+                await pubsub.subscribe(ROUTE_INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    route_l1_cache.invalidate(
+                        int(route_id)
+                        for route_id in message["data"].split(",")
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Error listening for route invalidations")
+            finally:
+                await pubsub.close()
+
+            # Invalidations may have been missed while disconnected
+            route_l1_cache.clear()
+            await asyncio.sleep(1)
+
+
+def route_gzip_chunk(route_id: int, payload: bytes) -> bytes:
+    """
+    Deflate chunk of a route JSON, compressed once per L1 entry,
+    see compression.SplicedJSON.
+    """
+    chunk = route_l1_cache.get_chunk(route_id, payload)
+    if chunk is None:
+        chunk = deflate_chunk(payload)
+        route_l1_cache.set_chunk(route_id, payload, chunk)
+
+    return chunk
+
+
+async def get_cached_route_payloads(route_ids: list[int]) -> dict[int, bytes]:
+    """
+    Look up the JSON of routes in the L1, then in Redis.
+    Redis hits are added to the L1.
+
+    Returns a dictionary of the routes found.
+    """
+    payloads = route_l1_cache.get_many(route_ids)
+    route_l1_cache.tier_stats.record(
+        len(payloads), len(route_ids) - len(payloads))
+
+    missing_ids = [
+        route_id for route_id in route_ids if route_id not in payloads]
+    if not missing_ids:
+        return payloads
+
+    cached_routes = await redis_feed_db_bytes().mget(
+        [route_details_key(route_id) for route_id in missing_ids])
+
+    from_redis = {}
+    for route_id, route_data in zip(missing_ids, cached_routes):
+        if not route_data:
+            continue
+        payload = route_payload(route_data)
+        if payload is not None:
+            from_redis[route_id] = payload
+    route_redis_stats.record(
+        len(from_redis), len(missing_ids) - len(from_redis))
+
+    for route_id, payload in from_redis.items():
+        route_l1_cache.set(route_id, payload)
+    payloads.update(from_redis)
+
+    return payloads
+
+
+async def cache_routes(routes: dict[int, dict]):
+    """
+    Cache routes loaded from the database in both tiers,
+    as dumped from schemas.RouteOutV3.
+    """
+    if not routes:
+        return
+
+    payloads = {
+        route_id: orjson.dumps(route, option=orjson.OPT_UTC_Z)
+        for route_id, route in routes.items()
+    }
+
+    async with redis_feed_db_bytes().pipeline(transaction=False) as pipe:
+        for route_id, payload in payloads.items():
+            pipe.set(
+                route_details_key(route_id),
+                encode_route(payload),
+                ex=ROUTE_DETAILS_EXPIRY
+            )
+        await pipe.execute()
+
+    for route_id, payload in payloads.items():
+        route_l1_cache.set(route_id, payload)
@@ -0,0 +1,47 @@
+import struct
+import zlib
+from typing import Optional
+
+# Routes are cached in Redis as
+#   magic | version | zlib(route JSON)
+# The route JSON is the payload served to clients, so a cache hit is a
+# single decompression. Entries cached as plain JSON before the codec are
+# still read, entries of other versions are treated as misses.
+
+ROUTE_CODEC_MAGIC = b"RC"
+# Version 1, coordinates stored as float64 columns, is no longer read:
+# the JSON had to be rebuilt on every hit
+ROUTE_CODEC_VERSION = 2
+ROUTE_CODEC_COMPRESSION_LEVEL = 6
+
+_HEADER = struct.Struct("<2sB")
+
+
+def encode_route(payload: bytes) -> bytes:
+    """
+    Encode the JSON of a route, as served to clients, for the cache.
+    """
+    return (
+        _HEADER.pack(ROUTE_CODEC_MAGIC, ROUTE_CODEC_VERSION) +
+        zlib.compress(payload, ROUTE_CODEC_COMPRESSION_LEVEL)
+    )
+
+
+def is_encoded(data: bytes) -> bool:
+    return data.startswith(ROUTE_CODEC_MAGIC)
+
+
+def route_payload(data: bytes) -> Optional[bytes]:
+    """
+    JSON of a cached route, plain JSON entries are passed through as is.
+
+    Returns None for routes encoded with an unknown version.
+    """
+    if not is_encoded(data):
+        return data
+
+    _, version = _HEADER.unpack_from(data)
+    if version != ROUTE_CODEC_VERSION:
+        return None
+
+    return zlib.decompress(data[_HEADER.size:])
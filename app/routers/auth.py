@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import json
 import aioredis
 import asyncio
 
 from ..common import templates
-from ..database import get_db
+from ..database import get_async_db
 from ..redis import get_redis_refresh_token_db
 from ..limiter import limiter
 
@@ -27,7 +28,7 @@ router = APIRouter(
 async def login(
         request: Request,
         user_credentials: schemas.LoginRequest,
-        db: Session = Depends(get_db)):
+        db: AsyncSession = Depends(get_async_db)):
     """
     Authenticate a user and return an access token.
 
@@ -43,16 +44,17 @@ async def login(
     """
 
     # user_credentials contains username and password
-    user_query = db.query(models.User).filter(
-        models.User.username == user_credentials.username)
-    if user_query.first() is None:
+    user = await db.scalar(
+        select(models.User)
+        .where(models.User.username == user_credentials.username))
+    if user is None:
         raise UserNotFoundException()
-    if not verify(user_credentials.password, user_query.first().password):
+    if not verify(user_credentials.password, user.password):
         raise InvalidCredentialsException()
 
     # Generate JWT token
     access_token = oauth2.create_access_token(data={
-        "user_id": user_query.first().user_id,
+        "user_id": user.user_id,
         "username": user_credentials.username
     })
 
@@ -63,19 +65,20 @@ async def login(
 async def login_using_form(
         request: Request,
         user_credentials: OAuth2PasswordRequestForm = Depends(),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    user_query = db.query(models.User).filter(
-        models.User.username == user_credentials.username.lower())
-    if user_query.first() is None:
+    user = await db.scalar(
+        select(models.User)
+        .where(models.User.username == user_credentials.username.lower()))
+    if user is None:
         raise UserNotFoundException()
 
-    if not verify(user_credentials.password, user_query.first().password):
+    if not verify(user_credentials.password, user.password):
         raise InvalidCredentialsException()
 
     # Generate JWT token
     access_token = oauth2.create_access_token(data={
-        "user_id": user_query.first().user_id,
+        "user_id": user.user_id,
         "username": user_credentials.username
     })
     return {"access_token": access_token, "token_type": "bearer"}
@@ -84,7 +87,7 @@ async def login_using_form(
 async def login_(
         request: Request,
         user_credentials: schemas.LoginRequest,
-        db: Session,
+        db: AsyncSession,
         r: aioredis.Redis
 ) -> schemas.TokenV2:
     user = await oauth2.get_user(user_credentials.username, db, r)
@@ -136,7 +139,7 @@ async def login_(
 async def login_v2(
         request: Request,
         user_credentials: schemas.LoginRequest,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_refresh_token_db)):
     """
     Authenticate a user and return an enhanced access token (v2).
@@ -180,7 +183,7 @@ async def login_v2(
 async def refresh_token(
         request: Request,
         refresh_token: schemas.RefreshTokenIn,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_refresh_token_db)):
     """
     Refresh an access token using a provided refresh token.
@@ -1,14 +1,23 @@
-from fastapi import APIRouter, Depends, Request, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, case
+from fastapi import APIRouter, Depends, Request, Response, Query
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, case, cast, select, Date
 import aioredis
-from datetime import timedelta
+from datetime import date, timedelta
 from typing import Callable
+import orjson
 
 from .. import schemas, models, oauth2
-from ..database import get_db
+from ..database import get_async_db, get_async_read_db
 from ..redis import get_redis_feed_db, async_retry
 from ..limiter import limiter
+from ..http_cache import (
+    CATALOG_CACHE_CONTROL,
+    content_etag,
+    etag_matches,
+    cache_headers,
+    not_modified
+)
 
 router = APIRouter(
     prefix='/challenge',
@@ -17,19 +26,31 @@ router = APIRouter(
 
 
 @router.get("/description")
-async def get_all_challenge_spec(db: Session = Depends(get_db)):
-    query = db.query(models.Challenge).all()
-    return query
+async def get_all_challenge_spec(
+        request: Request,
+        db: AsyncSession = Depends(get_async_read_db)):
+    query = (await db.scalars(select(models.Challenge))).all()
+
+    content = orjson.dumps(jsonable_encoder(query))
+    etag = content_etag(content)
+    if etag_matches(request, etag):
+        return not_modified(etag, CATALOG_CACHE_CONTROL)
+
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers=cache_headers(etag, CATALOG_CACHE_CONTROL)
+    )
 
 
 async def get_leaderboard_(
         limit: int,
         r: aioredis.Redis,
-        db: Session
+        db: AsyncSession
 ):
-    current_date_melbourne = db.query(
-        func.date(func.timezone('Australia/Melbourne', func.now()))
-    ).scalar()
+    current_date_melbourne = await db.scalar(
+        select(func.date(func.timezone('Australia/Melbourne', func.now())))
+    )
 
     year = current_date_melbourne.year
     week_num = current_date_melbourne.strftime("%U")  # gets week number
@@ -54,7 +75,7 @@ async def get_leaderboard(
             10, gt=0, le=100,
             description="The number of top users to fetch. Default is 10."
         ),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_read_db),
         r: aioredis.Redis = Depends(get_redis_feed_db)
 ):
     """
@@ -73,11 +94,101 @@ async def get_leaderboard(
     return await get_leaderboard_(limit, r, db)
 
 
+def day_challenges_statement(user_id: int, day: date):
+    """
+    Challenges of a user created on day.
+    """
+    return select(models.User_Challenge).where(
+        models.User_Challenge.user_id == user_id,
+        # Ranges on created_at rather than func.date(created_at),
+        # so ix_user_challenges_user_id_created_at is used
+        models.User_Challenge.created_at >= cast(day, Date),
+        models.User_Challenge.created_at < cast(day + timedelta(days=1), Date)
+    )
+
+
+def weekly_score_statement(user_id: int, since: date):
+    """
+    Sum of the scores of the challenges completed by a user since a day,
+    in total and per challenge type, grouped by the date.
+    """
+    return (
+        select(
+            func.date(
+                models.User_Challenge.created_at)
+            .label("date"),
+            func.sum(
+                case((models.User_Challenge.progress ==
+                     1, models.Challenge.score), else_=0)
+            ).label("score"),
+
+            func.sum(
+                case((models.User_Challenge.progress ==
+                     1, models.Challenge.score), else_=0)
+
+            ).filter(models.Challenge.type == 'route_generation')
+            .label("route_generation_score"),
+            func.sum(
+                case((models.User_Challenge.progress ==
+                     1, models.Challenge.score), else_=0)
+
+            ).filter(models.Challenge.type == 'favourited')
+            .label("favourited_score"),
+            func.sum(
+                case((models.User_Challenge.progress ==
+                     1, models.Challenge.score), else_=0)
+
+            ).filter(models.Challenge.type == 'shared')
+            .label("shared_score"),
+            func.sum(
+                case((models.User_Challenge.progress ==
+                     1, models.Challenge.score), else_=0)
+
+            ).filter(models.Challenge.type == 'published')
+            .label("published_score"),
+            func.sum(
+                case((models.User_Challenge.progress ==
+                     1, models.Challenge.score), else_=0)
+
+            ).filter(models.Challenge.type == 'read_tips')
+            .label("read_tips_score"),
+            func.sum(
+                case((models.User_Challenge.progress ==
+                     1, models.Challenge.score), else_=0)
+
+            ).filter(models.Challenge.type == 'logged_in')
+            .label("logged_in_score"),
+            func.sum(
+                case((models.User_Challenge.progress ==
+                     1, models.Challenge.score), else_=0)
+
+            ).filter(models.Challenge.type == 'accessed_global_feed')
+            .label("accessed_global_feed_score"),
+
+
+
+        )
+        .join(
+            models.Challenge,
+            models.User_Challenge.challenge_id == models.Challenge.id
+        )
+        .where(
+            models.User_Challenge.user_id == user_id,
+            models.User_Challenge.progress == 1,
+            models.User_Challenge.created_at >= cast(since, Date),
+        )
+        .group_by(func.date(
+            models.User_Challenge.created_at
+        )
+            .label("date"),)
+    )
+
+
 @router.get("/today-history", response_model=list[schemas.UserChallengeOut])
 @limiter.limit("1/second")
 async def get_user_challenge(
         request: Request,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)
 ):
     """
@@ -87,7 +198,7 @@ async def get_user_challenge(
 
     Parameters:
     - user_id (int): The ID of the user to fetch challenges for.
-    - db (Session): The database session, injected by FastAPI.
+    - db (AsyncSession): The database session, injected by FastAPI.
     - current_user (schemas.User): The current authenticated user,
       injected by FastAPI.
 
@@ -97,16 +208,14 @@ async def get_user_challenge(
 
     user_id = current_user.user_id
     # Get the current date
-    current_date_melbourne = db.query(
-        func.date(func.timezone('Australia/Melbourne', func.now()))
-    ).scalar()
+    current_date_melbourne = await db.scalar(
+        select(func.date(func.timezone('Australia/Melbourne', func.now())))
+    )
 
     # Query the database to get the challenges created today
     # for the given user_id
-    query = db.query(models.User_Challenge).filter(
-        models.User_Challenge.user_id == user_id,
-        func.date(models.User_Challenge.created_at) == current_date_melbourne
-    ).all()
+    query = (await db.scalars(
+        day_challenges_statement(user_id, current_date_melbourne))).all()
 
     return query
 
@@ -115,7 +224,7 @@ async def get_user_challenge(
 @limiter.limit("1/second")
 async def get_all_user_challenge(
         request: Request,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_read_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)
 ):
     """
@@ -125,7 +234,7 @@ async def get_all_user_challenge(
 
     Parameters:
     - user_id (int): The ID of the user to fetch challenges for.
-    - db (Session): The database session, injected by FastAPI.
+    - db (AsyncSession): The database session, injected by FastAPI.
     - current_user (schemas.User): The current authenticated user,
       injected by FastAPI.
 
@@ -136,9 +245,11 @@ async def get_all_user_challenge(
     user_id = current_user.user_id
     # Query the database to get the challenges created today
     # for the given user_id
-    query = db.query(models.User_Challenge).filter(
-        models.User_Challenge.user_id == user_id
-    ).all()
+    query = (await db.scalars(
+        select(models.User_Challenge).where(
+            models.User_Challenge.user_id == user_id
+        )
+    )).all()
 
     return query
 
@@ -148,7 +259,7 @@ async def get_all_user_challenge(
 @limiter.limit("1/second")
 async def calculate_weekly_score(
         request: Request,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_read_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)
 ):
     """
@@ -160,7 +271,7 @@ async def calculate_weekly_score(
 
     Parameters:
     - user_id (int): The ID of the user to calculate the weekly score for.
-    - db (Session): The database session, injected by FastAPI.
+    - db (AsyncSession): The database session, injected by FastAPI.
     - current_user (schemas.User): The current authenticated user,
       injected by FastAPI.
 
@@ -170,9 +281,9 @@ async def calculate_weekly_score(
 
     user_id = current_user.user_id
     # Get the current date in Melbourne timezone
-    current_date_melbourne = db.query(
-        func.date(func.timezone('Australia/Melbourne', func.now()))
-    ).scalar()
+    current_date_melbourne = await db.scalar(
+        select(func.date(func.timezone('Australia/Melbourne', func.now())))
+    )
 
     # Calculate the date 7 days ago based on Melbourne time
     seven_days_ago = current_date_melbourne - timedelta(days=7)
@@ -180,79 +291,10 @@ async def calculate_weekly_score(
     # Query the database to get the sum of scores for challenges
     # with progress equal to 1
     # created in the past 7 days for the given user_id, grouped by the date
-    query = (
-        db.query(
-            func.date(
-                models.User_Challenge.created_at)
-            .label("date"),
-            func.sum(
-                case((models.User_Challenge.progress ==
-                     1, models.Challenge.score), else_=0)
-            ).label("score"),
-
-            func.sum(
-                case((models.User_Challenge.progress ==
-                     1, models.Challenge.score), else_=0)
-
-            ).filter(models.Challenge.type == 'route_generation')
-            .label("route_generation_score"),
-            func.sum(
-                case((models.User_Challenge.progress ==
-                     1, models.Challenge.score), else_=0)
-
-            ).filter(models.Challenge.type == 'favourited')
-            .label("favourited_score"),
-            func.sum(
-                case((models.User_Challenge.progress ==
-                     1, models.Challenge.score), else_=0)
-
-            ).filter(models.Challenge.type == 'shared')
-            .label("shared_score"),
-            func.sum(
-                case((models.User_Challenge.progress ==
-                     1, models.Challenge.score), else_=0)
-
-            ).filter(models.Challenge.type == 'published')
-            .label("published_score"),
-            func.sum(
-                case((models.User_Challenge.progress ==
-                     1, models.Challenge.score), else_=0)
-
-            ).filter(models.Challenge.type == 'read_tips')
-            .label("read_tips_score"),
-            func.sum(
-                case((models.User_Challenge.progress ==
-                     1, models.Challenge.score), else_=0)
-
-            ).filter(models.Challenge.type == 'logged_in')
-            .label("logged_in_score"),
-            func.sum(
-                case((models.User_Challenge.progress ==
-                     1, models.Challenge.score), else_=0)
-
-            ).filter(models.Challenge.type == 'accessed_global_feed')
-            .label("accessed_global_feed_score"),
-
-
-
-        )
-        .join(
-            models.Challenge,
-            models.User_Challenge.challenge_id == models.Challenge.id
-        )
-        .filter(
-            models.User_Challenge.user_id == user_id,
-            models.User_Challenge.progress == 1,
-            func.date(models.User_Challenge.created_at) >= seven_days_ago,
-        )
-        .group_by(func.date(
-            models.User_Challenge.created_at
-        )
-            .label("date"),)
-    )
+    query = weekly_score_statement(user_id, seven_days_ago)
 
     # Execute the query and fetch the results
-    result = query.all()
+    result = (await db.execute(query)).all()
 
     return result
 
@@ -262,7 +304,7 @@ async def update_score_in_redis(
         user_id: int,
         score: float,
         r: aioredis.Redis,
-        db: Session
+        db: AsyncSession
 ):
     """
     Update user's score in Redis.
@@ -273,7 +315,7 @@ async def update_score_in_redis(
     - user_id (int): The ID of the user whose score needs to be updated.
     - score (float): The score to be updated in Redis.
     - r (aioredis.Redis): The Redis instance.
-    - db (Session): The database session.
+    - db (AsyncSession): The database session.
 
     Raises:
     - Any exceptions raised by the Redis operations
@@ -281,17 +323,17 @@ async def update_score_in_redis(
     """
 
     # Get the current year and week number from the database
-    current_date_melbourne = db.query(
-        func.date(func.timezone('Australia/Melbourne', func.now()))
-    ).scalar()
+    current_date_melbourne = await db.scalar(
+        select(func.date(func.timezone('Australia/Melbourne', func.now())))
+    )
 
     year = current_date_melbourne.year
     week_num = current_date_melbourne.strftime("%U")  # gets week number
 
     # Add the user and their score to the ZSET for the current week
     key = f'challenge_leaderboard_score:{year}:{week_num}'
-    username = db.query(models.User.username).filter(
-        models.User.user_id == user_id).first()[0]
+    username = await db.scalar(
+        select(models.User.username).where(models.User.user_id == user_id))
 
     await r.zincrby(key, score, username)
 
@@ -307,7 +349,7 @@ async def add_challenge_common(
         challenge_data: schemas.BaseModel,
         challenge_type: str,
         progress_calculator: Callable,
-        db: Session,
+        db: AsyncSession,
         r: aioredis.Redis,
         current_user: schemas.User
 ):
@@ -323,7 +365,7 @@ async def add_challenge_common(
     - challenge_data (schemas.DistanceTravelledChallenge): The challenge data.
     - challenge_type (str): The type of the challenge.
     - progress_calculator (Callable): The function to calculate the progress.
-    - db (Session): The database session.
+    - db (AsyncSession): The database session.
     - r (aioredis.Redis): The Redis instance.
     - current_user (schemas.User): The current authenticated user.
 
@@ -332,12 +374,14 @@ async def add_challenge_common(
     """
     user_id = current_user.user_id
 
-    challenges = db.query(models.Challenge).filter(
-        models.Challenge.type == challenge_type).all()
+    challenges = (await db.scalars(
+        select(models.Challenge).where(
+            models.Challenge.type == challenge_type)
+    )).all()
     # Get the current date in Melbourne time from the database
-    current_datetime_melbourne = db.query(
-        func.timezone('Australia/Melbourne', func.now())
-    ).scalar()
+    current_datetime_melbourne = await db.scalar(
+        select(func.timezone('Australia/Melbourne', func.now()))
+    )
 
     year = current_datetime_melbourne.year
     month = current_datetime_melbourne.month
@@ -346,13 +390,15 @@ async def add_challenge_common(
     for challenge in challenges:
         progress = progress_calculator(challenge_data, challenge)
 
-        user_challenge = db.query(models.User_Challenge).filter(
-            models.User_Challenge.user_id == user_id,
-            models.User_Challenge.challenge_id == challenge.id,
-            models.User_Challenge.year == year,
-            models.User_Challenge.month == month,
-            models.User_Challenge.day == day
-        ).first()
+        user_challenge = await db.scalar(
+            select(models.User_Challenge).where(
+                models.User_Challenge.user_id == user_id,
+                models.User_Challenge.challenge_id == challenge.id,
+                models.User_Challenge.year == year,
+                models.User_Challenge.month == month,
+                models.User_Challenge.day == day
+            )
+        )
 
         if user_challenge:
             user_challenge.progress += progress
@@ -370,15 +416,15 @@ async def add_challenge_common(
             )
             db.add(user_challenge)
 
-        db.commit()
-        db.refresh(user_challenge)
+        await db.commit()
+        await db.refresh(user_challenge)
 
         # If the progress is 1, and score is not added, update score in Redis
         if user_challenge.progress == 1.0 and not user_challenge.score_added:
             # Use the score from the challenge
             await update_score_in_redis(user_id, challenge.score, r, db)
             user_challenge.score_added = True
-            db.commit()
+            await db.commit()
 
     return {
         "details": {
@@ -425,7 +471,7 @@ def route_generation_calculator(
 async def add_challenge_route_generation(
         request: Request,
         challenge_data: schemas.RouteGenerationChallenge,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)
 ):
@@ -439,7 +485,7 @@ async def add_challenge_route_generation(
     - request (Request): The request object.
     - user_id (int): The ID of the user to add the challenge for.
     - challenge_data (schemas.RouteGenerationChallenge): The challenge data.
-    - db (Session): The database session, injected by FastAPI.
+    - db (AsyncSession): The database session, injected by FastAPI.
     - r (aioredis.Redis): The Redis instance, injected by FastAPI.
     - current_user (schemas.User): The current authenticated user,
       injected by FastAPI.
@@ -495,7 +541,7 @@ def favourite_calculator(
 async def add_challenge_favourite(
         request: Request,
         challenge_data: schemas.RouteFavChallenge,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)
 ):
@@ -509,7 +555,7 @@ async def add_challenge_favourite(
     - request (Request): The request object.
     - user_id (int): The ID of the user to add the challenge for.
     - challenge_data (schemas.RouteFavChallenge): The challenge data.
-    - db (Session): The database session, injected by FastAPI.
+    - db (AsyncSession): The database session, injected by FastAPI.
     - r (aioredis.Redis): The Redis instance, injected by FastAPI.
     - current_user (schemas.User): The current authenticated user,
       injected by FastAPI.
@@ -565,7 +611,7 @@ def shared_calculator(
 async def add_challenge_share(
         request: Request,
         challenge_data: schemas.RouteShareChallenge,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)
 ):
@@ -579,7 +625,7 @@ async def add_challenge_share(
     - request (Request): The request object.
     - user_id (int): The ID of the user to add the challenge for.
     - challenge_data (schemas.RouteShareChallenge): The challenge data.
-    - db (Session): The database session, injected by FastAPI.
+    - db (AsyncSession): The database session, injected by FastAPI.
     - r (aioredis.Redis): The Redis instance, injected by FastAPI.
     - current_user (schemas.User): The current authenticated user,
       injected by FastAPI.
@@ -636,7 +682,7 @@ def publised_calculator(
 async def add_challenge_publish(
         request: Request,
         challenge_data: schemas.RoutePublishChallenge,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)
 ):
@@ -650,7 +696,7 @@ async def add_challenge_publish(
     - request (Request): The request object.
     - user_id (int): The ID of the user to add the challenge for.
     - challenge_data (schemas.RoutePublishChallenge): The challenge data.
-    - db (Session): The database session, injected by FastAPI.
+    - db (AsyncSession): The database session, injected by FastAPI.
     - r (aioredis.Redis): The Redis instance, injected by FastAPI.
     - current_user (schemas.User): The current authenticated user,
       injected by FastAPI.
@@ -706,7 +752,7 @@ def read_tips_calculator(
 async def add_challenge_tips(
         request: Request,
         challenge_data: schemas.ReadTipChallenge,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)
 ):
@@ -720,7 +766,7 @@ async def add_challenge_tips(
     - request (Request): The request object.
     - user_id (int): The ID of the user to add the challenge for.
     - challenge_data (schemas.ReadTipChallenge): The challenge data.
-    - db (Session): The database session, injected by FastAPI.
+    - db (AsyncSession): The database session, injected by FastAPI.
     - r (aioredis.Redis): The Redis instance, injected by FastAPI.
     - current_user (schemas.User): The current authenticated user,
       injected by FastAPI.
@@ -755,7 +801,7 @@ def logged_in_cal(
 async def add_challenge_loggedin(
         request: Request,
         challenge_data: schemas.DailyLoggedInChallenge,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)
 ):
@@ -769,7 +815,7 @@ async def add_challenge_loggedin(
     - request (Request): The request object.
     - user_id (int): The ID of the user to add the challenge for.
     - challenge_data (schemas.DailyLoggedInChallenge): The challenge data.
-    - db (Session): The database session, injected by FastAPI.
+    - db (AsyncSession): The database session, injected by FastAPI.
     - r (aioredis.Redis): The Redis instance, injected by FastAPI.
     - current_user (schemas.User): The current authenticated user,
       injected by FastAPI.
@@ -804,7 +850,7 @@ def accessed_feed_cal(
 async def add_challenge_accessed_feed(
         request: Request,
         challenge_data: schemas.AccessedGlobalFeedChallenge,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)
 ):
@@ -818,7 +864,7 @@ async def add_challenge_accessed_feed(
     - request (Request): The request object.
     - user_id (int): The ID of the user to add the challenge for.
     - challenge_data (schemas.AccessedGlobalFeedChallenge): The challenge data.
-    - db (Session): The database session, injected by FastAPI.
+    - db (AsyncSession): The database session, injected by FastAPI.
     - r (aioredis.Redis): The Redis instance, injected by FastAPI.
     - current_user (schemas.User): The current authenticated user,
       injected by FastAPI.
@@ -1,17 +1,59 @@
-from fastapi import APIRouter, Depends, Request, Response
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, case
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import (
+    func, cast, tuple_, select, update, delete, bindparam)
+from geoalchemy2 import Geography, WKTElement
 import aioredis
 from datetime import datetime
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import base64
+import hashlib
+import logging
+import binascii
 import json
-from time import time, mktime
+import orjson
+from math import cos, radians
+from time import time
 
 from .. import schemas, models, oauth2
-from ..database import get_db
-from ..redis import get_redis_feed_db, async_retry
+from ..config import settings
+from ..database import get_async_db, get_async_read_db, AsyncSessionLocal
+from ..redis import (
+    get_redis_feed_db,
+    get_redis_feed_db_context,
+    acquire_lease,
+    async_retry
+)
+from ..route_cache import (
+    get_cached_route_payloads,
+    cache_routes,
+    route_gzip_chunk,
+    route_db_stats
+)
+from ..compression import SplicedJSON, spliced_response
+from ..invalidation import invalidate
+from ..http_cache import (
+    ROUTE_CACHE_CONTROL,
+    ROUTE_GEOMETRY_CACHE_CONTROL,
+    etag_matches,
+    cache_headers,
+    not_modified
+)
 from ..limiter import limiter
+from ..feed import (
+    ROUTES_FEED,
+    ROUTES_FEED_CREATED_AT,
+    ROUTES_FEED_HOT,
+    ROUTES_FEED_EXPIRY,
+    FEED_ORDERINGS,
+    feed_score,
+    hot_score,
+    split_feed_score
+)
 from ..huggingface_models import get_similar_image
+from .vote import get_vote_details
 
 
 from ..exceptions import (
@@ -22,11 +64,15 @@ from ..exceptions import (
     InvalidSearchQueryException
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix='/route',
     tags=["Route"]
 )
 
+ROUTE_FEED_EXPIRY_DURATION = 86400  # 1 day in seconds
+
 
 def datetime_serializer(o):
     if isinstance(o, datetime):
@@ -34,82 +80,340 @@ def datetime_serializer(o):
     raise TypeError("Object not serializable")
 
 
-async def get_route_from_redis_or_db(
-        route_id, r: aioredis.Redis,
-        db: Session) -> schemas.RouteOutV3:
-    # Try fetching route from Redis first
-    route_data = await r.get(f"route_details_{route_id}")
-
-    if route_data:
-        # If found in Redis, deserialize it to a Python object
-        route_obj = json.loads(route_data)
-        route_obj = schemas.RouteOutV3(**route_obj)
-    else:
-        # If not found in Redis, fetch from the DB
-        route_obj = (
-            db.query(models.Route)
-            .options(joinedload(models.Route.image))
-            .filter(models.Route.route_id == route_id)
-            .first()
-        )
+def encode_cursor(*values) -> str:
+    """Encode the keyset of the last item of a page as an opaque cursor."""
+    return base64.urlsafe_b64encode(
+        json.dumps(values, default=datetime_serializer).encode()
+    ).decode()
 
-        if route_obj is None:
-            return None
 
-        if route_obj.image is None:
+def decode_cursor(cursor: str) -> list:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, binascii.Error):
+        raise InvalidSearchQueryException()
 
-            route_with_prompt = (
-                db.query(
-                    models.Route,
-                    models.Prompt.prompt,
-                    models.Prompt.location_type
-                )
-                .join(
-                    models.Prompt_Route,
-                    models.Route.route_id == models.Prompt_Route.route_id
-                )
-                .join(
-                    models.Prompt,
-                    models.Prompt.prompt_id == models.Prompt_Route.prompt_id)
-                .filter(models.Route.route_id == route_id)
-            ).first()
 
-            prompt_ = route_with_prompt.prompt[0]
-            location_type_ = route_with_prompt.location_type[0]
+def serialize_route(route: schemas.RouteOutV3) -> bytes:
+    """JSON of a route as sent to clients."""
+    return orjson.dumps(route.model_dump(), option=orjson.OPT_UTC_Z)
 
-            route_image_name = await r.get(
-                f"route_image_name:{location_type_}:{prompt_}"
-            )
 
-            if route_image_name is None:
+def routes_statement(route_ids: List[int]):
+    """
+    Routes of route_ids, with their image and prompts.
+    """
+    return (
+        select(models.Route)
+        .options(
+            joinedload(models.Route.image),
+            selectinload(models.Route.prompts)
+        )
+        .where(models.Route.route_id.in_(route_ids))
+    )
 
-                route_image_name = get_similar_image(
-                    prompt_,
-                    location_type_
-                )
 
-                await r.set(
-                    f"route_image_name:{location_type_}:{prompt_}",
-                    route_image_name
+async def load_routes_from_db(
+        route_ids: List[int], r: aioredis.Redis,
+        db: AsyncSession) -> Dict[int, schemas.RouteOutV3]:
+    """
+    Load routes missing from the cache with one query, assign missing
+    route images in one batch and cache the routes.
+
+    Returns a dictionary of the routes found.
+    """
+    route_objs = (await db.scalars(
+        routes_statement(route_ids))).unique().all()
+
+    image_names_to_cache = {}
+    without_image = [
+        route_obj for route_obj in route_objs
+        if route_obj.image is None and route_obj.prompts
+    ]
+
+    if without_image:
+        image_keys = {
+            route_obj.route_id: (
+                f"route_image_name:{route_obj.prompts[0].location_type[0]}:"
+                f"{route_obj.prompts[0].prompt[0]}"
+            )
+            for route_obj in without_image
+        }
+        distinct_keys = list(dict.fromkeys(image_keys.values()))
+        image_names = dict(zip(distinct_keys, await r.mget(distinct_keys)))
+
+        for route_obj in without_image:
+            key = image_keys[route_obj.route_id]
+
+            if image_names[key] is None:
+                image_names[key] = get_similar_image(
+                    route_obj.prompts[0].prompt[0],
+                    route_obj.prompts[0].location_type[0]
                 )
+                image_names_to_cache[key] = image_names[key]
 
             route_obj.image = models.Route_Image(
-                route_id=route_id, route_image_name=route_image_name
+                route_id=route_obj.route_id,
+                route_image_name=image_names[key]
             )
-
             db.add(route_obj.image)
-            db.commit()
 
-        route_obj = schemas.RouteOutV3.from_orm(route_obj)
+    # Serialise before committing, which would expire the loaded routes
+    routes = {}
+    for route_obj in route_objs:
+        route_out = schemas.RouteOutV3.from_orm(route_obj)
+        routes[route_out.route_id] = route_out
+    route_db_stats.record(len(routes), len(route_ids) - len(routes))
+
+    if without_image:
+        await db.commit()
+
+    if image_names_to_cache:
+        await r.mset(image_names_to_cache)
+
+    await cache_routes({
+        route_id: route_out.model_dump()
+        for route_id, route_out in routes.items()
+    })
+
+    return routes
+
+
+async def get_routes_from_redis_or_db(
+        route_ids: List[int], r: aioredis.Redis,
+        db: AsyncSession) -> List[Optional[schemas.RouteOutV3]]:
+    """
+    Hydrate several routes at once.
+
+    Cached routes are read from the L1 then with one MGET,
+    see route_cache.py, the misses are loaded by load_routes_from_db.
+
+    Returns the routes in the order of route_ids,
+    with None for the routes that do not exist.
+    """
+    route_ids = [int(route_id) for route_id in route_ids]
+    if not route_ids:
+        return []
+
+    routes = {
+        route_id: schemas.RouteOutV3.from_cache(orjson.loads(payload))
+        for route_id, payload
+        in (await get_cached_route_payloads(route_ids)).items()
+    }
+
+    missing_ids = [
+        route_id for route_id in route_ids if route_id not in routes]
+    if missing_ids:
+        routes.update(await load_routes_from_db(missing_ids, r, db))
+
+    return [routes.get(route_id) for route_id in route_ids]
+
+
+async def get_route_from_redis_or_db(
+        route_id, r: aioredis.Redis,
+        db: AsyncSession) -> Optional[schemas.RouteOutV3]:
+    route_objs = await get_routes_from_redis_or_db([route_id], r, db)
+
+    return route_objs[0]
+
+
+async def get_route_payloads_from_redis_or_db(
+        route_ids: List[int], r: aioredis.Redis,
+        db: AsyncSession) -> List[Optional[bytes]]:
+    """
+    Hydrate several routes at once as ready-to-send JSON.
+
+    Cached routes are never validated, see get_cached_route_payloads.
+    The misses are loaded by load_routes_from_db.
+
+    Returns the JSON of the routes in the order of route_ids,
+    with None for the routes that do not exist.
+    """
+    route_ids = [int(route_id) for route_id in route_ids]
+    if not route_ids:
+        return []
+
+    payloads = await get_cached_route_payloads(route_ids)
+
+    missing_ids = [
+        route_id for route_id in route_ids if route_id not in payloads]
+    if missing_ids:
+        routes = await load_routes_from_db(missing_ids, r, db)
+        for route_id, route_out in routes.items():
+            payloads[route_id] = serialize_route(route_out)
+
+    return [payloads.get(route_id) for route_id in route_ids]
+
+
+ROUTE_FIELDS = list(schemas.RouteOutV3.model_fields)
+SUMMARY_FIELDS = list(schemas.RouteSummaryOut.model_fields)
+GEOMETRY_FIELDS = list(schemas.RouteGeometryOut.model_fields)
+
+
+def route_fields(
+    view: str = 'full',
+    fields: Optional[str] = None
+) -> Optional[List[str]]:
+    """
+    Fields of the routes to return in a list, from the view and fields
+    query parameters. None for the full routes.
+
+    Raises:
+    - InvalidSearchQueryException:
+      If the view or one of the fields is unknown.
+    """
+    if view not in ('full', 'summary'):
+        raise InvalidSearchQueryException()
 
-        # Store in Redis for future use
-        # 1 hour expiration
-        await r.set(
-            f"route_details_{route_id}",
-            json.dumps(route_obj.model_dump(), default=datetime_serializer),
-            ex=3600)
+    if fields is not None:
+        selected = [field.strip() for field in fields.split(",")]
+        if any(field not in ROUTE_FIELDS for field in selected):
+            raise InvalidSearchQueryException()
+        # The route id is always returned
+        return list(dict.fromkeys(['route_id', *selected]))
 
-    return route_obj
+    if view == 'summary':
+        return SUMMARY_FIELDS
+
+    return None
+
+
+def project_route(payload: bytes, fields: Optional[List[str]]) -> bytes:
+    """JSON of the given fields of a route, all of them when None."""
+    if fields is None:
+        return payload
+
+    route = orjson.loads(payload)
+    return orjson.dumps({field: route[field] for field in fields})
+
+
+def render_vote_details(num_votes: int, voted_by_user: bool) -> bytes:
+    return (
+        b',"num_votes":' + str(num_votes).encode() +
+        b',"voted_by_user":' + (b'true' if voted_by_user else b'false') +
+        b'}'
+    )
+
+
+def render_route_votes(
+    route_ids: List[int],
+    payloads: List[Optional[bytes]],
+    vote_details: List[Tuple[int, int, bool]],
+    cached: bool = True
+) -> SplicedJSON:
+    """
+    Splice route JSON with its vote details into the JSON of a
+    list of schemas.RouteVoteOutUser.
+    cached is False when the payloads are projections of the cached routes,
+    which have no deflate chunk.
+    """
+    vote_dict = {route_id: (num_votes, voted_by_user)
+                 for route_id, num_votes, voted_by_user in vote_details}
+
+    body = SplicedJSON()
+    body.add(b'[')
+    separator = b'{"route":'
+    for route_id, payload in zip(route_ids, payloads):
+        # Routes deleted since their id was listed
+        if payload is None:
+            continue
+
+        route_id = int(route_id)
+        num_votes, voted_by_user = vote_dict.get(route_id, (0, False))
+        body.add(separator)
+        body.add(payload, route_id if cached else None)
+        body.add(render_vote_details(num_votes, voted_by_user))
+        separator = b',{"route":'
+    body.add(b']')
+
+    return body
+
+
+def render_route_batch(
+    route_ids: List[int],
+    payloads: List[Optional[bytes]],
+    vote_details: List[Tuple[int, int, bool]],
+    cached: bool = True
+) -> SplicedJSON:
+    """
+    Splice route JSON with its vote details into the JSON of a
+    schemas.RouteBatchOut, routes that do not exist are marked not found.
+    """
+    vote_dict = {route_id: (num_votes, voted_by_user)
+                 for route_id, num_votes, voted_by_user in vote_details}
+
+    body = SplicedJSON()
+    body.add(b'{"routes":{')
+    for index, (route_id, payload) in enumerate(zip(route_ids, payloads)):
+        key = b'"' + str(route_id).encode() + b'":'
+        if index:
+            key = b',' + key
+        if payload is None:
+            body.add(key + b'{"found":false}')
+            continue
+
+        num_votes, voted_by_user = vote_dict.get(route_id, (0, False))
+        body.add(key + b'{"found":true,"route":')
+        body.add(payload, route_id if cached else None)
+        body.add(render_vote_details(num_votes, voted_by_user))
+    body.add(b'}}')
+
+    return body
+
+
+async def route_votes_response(
+    request: Request,
+    route_ids: List[int],
+    r: aioredis.Redis,
+    db: AsyncSession,
+    current_user: schemas.User,
+    next_cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None
+) -> Response:
+    """
+    Raw JSON response of a list of routes with their vote details,
+    cached routes are sent without being validated and serialised again.
+    Only the given fields of the routes are returned, see route_fields.
+    The response is gzip compressed with the cached deflate chunks of the
+    routes, see compression.SplicedJSON.
+    """
+    payloads = await get_route_payloads_from_redis_or_db(route_ids, r, db)
+    payloads = [
+        project_route(payload, fields) if payload is not None else None
+        for payload in payloads
+    ]
+
+    # Vote counts and whether the user voted for each route
+    vote_details = await get_vote_details(
+        route_ids, current_user.user_id, r, db)
+
+    headers = {}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor
+
+    return spliced_response(
+        request,
+        render_route_votes(
+            route_ids, payloads, vote_details, cached=fields is None),
+        route_gzip_chunk,
+        headers
+    )
+
+
+async def hydrate_route_votes(
+    route_ids: List[int],
+    r: aioredis.Redis,
+    db: AsyncSession,
+    current_user: schemas.User
+) -> List[schemas.RouteVoteOutUser]:
+    route_objects = await get_routes_from_redis_or_db(route_ids, r, db)
+
+    # Vote counts and whether the user voted for each route
+    vote_details = await get_vote_details(
+        route_ids, current_user.user_id, r, db)
+
+    return merge_route_details(
+        route_objects=route_objects, vote_details=vote_details)
 
 
 def merge_route_details(
@@ -125,11 +429,16 @@ def merge_route_details(
 
     merged_results = []
     for route_obj in route_objects:
+        # Routes deleted since their id was listed
+        if route_obj is None:
+            continue
+
         route_id = route_obj.route_id
         # Default to 0 votes and not voted by user
         num_votes, voted_by_user = vote_dict.get(route_id, (0, False))
 
-        merge_result = schemas.RouteVoteOutUser(
+        # Both parts are already validated
+        merge_result = schemas.RouteVoteOutUser.model_construct(
             route=route_obj,
             num_votes=num_votes,
             voted_by_user=voted_by_user
@@ -142,20 +451,19 @@ def merge_route_details(
 
 async def get_route_(
         route_id: int,
-        db: Session,
+        db: AsyncSession,
         r: aioredis.Redis,
 ):
     route_obj = await get_route_from_redis_or_db(route_id, r, db)
     if not route_obj:
         raise RouteNotFoundException()
 
-    num_votes = (
-        db.query(func.count(models.User_Route_Vote.route_id))
-        .filter(models.User_Route_Vote.route_id == route_id)
-        .scalar()
+    num_votes = await db.scalar(
+        select(models.Route.num_votes)
+        .where(models.Route.route_id == route_id)
     )
 
-    route_vote_out = schemas.RouteVoteOut(
+    route_vote_out = schemas.RouteVoteOut.model_construct(
         route=route_obj,
         num_votes=num_votes
     )
@@ -163,16 +471,125 @@ async def get_route_(
     return route_vote_out
 
 
+def route_etag(
+        route_id: int, num_votes: int,
+        route_image_name: Optional[str]) -> str:
+    """
+    ETag of a schemas.RouteVoteOut.
+
+    The body of a route never changes once created, except for its image:
+    routes created without one get it the first time they are loaded, see
+    load_routes_from_db. The vote count and the image name are therefore
+    the version of the response.
+    """
+    image = hashlib.sha256(
+        (route_image_name or "").encode()).hexdigest()[:8]
+    return f'W/"route-{route_id}-{num_votes}-{image}"'
+
+
+def route_geometry_etag(route_id: int) -> str:
+    return f'W/"route-geometry-{route_id}"'
+
+
+async def route_vote_response(
+        request: Request,
+        route_id: int,
+        num_votes: int,
+        etag: str,
+        db: AsyncSession,
+        r: aioredis.Redis,
+) -> Response:
+    """
+    Raw JSON response of a schemas.RouteVoteOut, see get_route_.
+    """
+    payload, = await get_route_payloads_from_redis_or_db([route_id], r, db)
+    if not payload:
+        raise RouteNotFoundException()
+
+    body = SplicedJSON()
+    body.add(b'{"route":')
+    body.add(payload, route_id)
+    body.add(b',"num_votes":' + str(num_votes).encode() + b'}')
+
+    return spliced_response(
+        request,
+        body,
+        route_gzip_chunk,
+        cache_headers(etag, ROUTE_CACHE_CONTROL)
+    )
+
+
+MAX_BATCH_ROUTES = 50
+
+
+@router.post('/batch/', response_model=schemas.RouteBatchOut)
+@limiter.limit("5/second")
+async def get_routes_batch(
+        request: Request,
+        batch: schemas.RouteBatchIn,
+        fields: Optional[List[str]] = Depends(route_fields),
+        db: AsyncSession = Depends(get_async_db),
+        r: aioredis.Redis = Depends(get_redis_feed_db),
+        current_user: schemas.User = Depends(oauth2.get_current_user)):
+    """
+    Retrieve several routes by their IDs in one request,
+    e.g. to restore a saved screen.
+
+    Args:
+    - batch (schemas.RouteBatchIn): The IDs of the routes, at most 50.
+    - view (str, optional): 'summary' to return schemas.RouteSummaryOut
+      routes, without their geometry and instructions. Defaults to 'full'.
+    - fields (str, optional): Comma separated fields of the routes to
+      return, e.g. 'locations,route_image_name'. Replaces view.
+
+    Raises:
+    - ParametersTooLargeException: If more than 50 IDs are given.
+    - InvalidSearchQueryException:
+      If the view or one of the fields is invalid.
+
+    Returns:
+    - schemas.RouteBatchOut: The routes keyed by ID, with their vote details.
+      Routes that do not exist have `found` set to false.
+    """
+    route_ids = list(dict.fromkeys(batch.route_ids))
+    if len(route_ids) > MAX_BATCH_ROUTES:
+        raise ParametersTooLargeException()
+
+    payloads = await get_route_payloads_from_redis_or_db(route_ids, r, db)
+    payloads = [
+        project_route(payload, fields) if payload is not None else None
+        for payload in payloads
+    ]
+
+    vote_details = await get_vote_details(
+        [
+            route_id for route_id, payload in zip(route_ids, payloads)
+            if payload is not None
+        ],
+        current_user.user_id, r, db)
+
+    return spliced_response(
+        request,
+        render_route_batch(
+            route_ids, payloads, vote_details, cached=fields is None),
+        route_gzip_chunk
+    )
+
+
 @router.get('/{route_id}/', response_model=schemas.RouteVoteOut)
 @limiter.limit("1/second")
 async def get_route(
         request: Request,
         route_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_feed_db)):
     """
     Retrieve route details by route ID.
 
+    The ETag changes with the number of votes and the image, a request
+    with a matching If-None-Match header gets a 304 response without the
+    route being loaded.
+
     Args:
     - route_id (int): The ID of the desired route.
 
@@ -182,8 +599,62 @@ async def get_route(
     Returns:
     - schemas.RouteVoteOut: The route details and the number of votes.
     """
+    version = (await db.execute(
+        select(
+            models.Route.num_votes,
+            models.Route_Image.route_image_name
+        )
+        .outerjoin(models.Route.image)
+        .where(models.Route.route_id == route_id)
+    )).first()
+    if version is None:
+        raise RouteNotFoundException()
+
+    num_votes, route_image_name = version
+    etag = route_etag(route_id, num_votes, route_image_name)
+    if etag_matches(request, etag):
+        return not_modified(etag, ROUTE_CACHE_CONTROL)
 
-    return await get_route_(route_id, db, r)
+    return await route_vote_response(
+        request, route_id, num_votes, etag, db, r)
+
+
+@router.get('/{route_id}/geometry/', response_model=schemas.RouteGeometryOut)
+@limiter.limit("5/second")
+async def get_route_geometry(
+        request: Request,
+        route_id: int,
+        db: AsyncSession = Depends(get_async_db),
+        r: aioredis.Redis = Depends(get_redis_feed_db)):
+    """
+    Retrieve the coordinates of a route, for routes listed as summaries.
+
+    The coordinates never change, a request with an If-None-Match header
+    matching the ETag gets a 304 response.
+
+    Args:
+    - route_id (int): The ID of the desired route.
+
+    Raises:
+    - RouteNotFoundException: If no route is found with the specified ID.
+
+    Returns:
+    - schemas.RouteGeometryOut:
+      The coordinates of the locations and of the route.
+    """
+    etag = route_geometry_etag(route_id)
+    if etag_matches(request, etag):
+        return not_modified(etag, ROUTE_GEOMETRY_CACHE_CONTROL)
+
+    payload, = await get_route_payloads_from_redis_or_db([route_id], r, db)
+    if not payload:
+        raise RouteNotFoundException()
+
+    return Response(
+        content=project_route(payload, GEOMETRY_FIELDS),
+        media_type="application/json",
+        headers=cache_headers(etag, ROUTE_GEOMETRY_CACHE_CONTROL)
+    )
 
 
 @router.delete('/{route_id}/', status_code=204)
@@ -191,7 +662,8 @@ async def get_route(
 async def delete_route(
         request: Request,
         route_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
+        r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)):
     """
     Delete a route by its ID.
@@ -206,9 +678,8 @@ async def delete_route(
       If the route does not belong to the current user.
     """
 
-    route_query = db.query(models.Route).filter(
-        models.Route.route_id == route_id)
-    route_to_delete = route_query.first()
+    route_to_delete = await db.scalar(
+        select(models.Route).where(models.Route.route_id == route_id))
 
     if not route_to_delete:
         raise RouteNotFoundException()
@@ -218,120 +689,161 @@ async def delete_route(
         raise NotAuthorisedException()
 
     # Delete associated votes
-    db.query(models.User_Route_Vote).filter(
-        models.User_Route_Vote.route_id == route_id).delete()
+    await db.execute(
+        delete(models.User_Route_Vote)
+        .where(models.User_Route_Vote.route_id == route_id))
 
     # Delete the route
-    route_query.delete()
-    db.commit()
+    await db.execute(
+        delete(models.Route).where(models.Route.route_id == route_id))
+    await db.commit()
+
+    # Drop the cached route, its instructions and its feed entries
+    await invalidate([("route", route_id)], r)
 
     return Response(status_code=204)
 
 
-async def get_routes_(
+def user_route_ids_statement(
     query_type: str,
     user_id: int,
-    offset: int = 0,
-    limit: int = 10,
-    db: Session = get_db(),
-    r: aioredis.Redis = get_redis_feed_db(),
-    current_user: schemas.User = Depends(oauth2.get_current_user)
+    offset: int,
+    limit: int,
+    after: Optional[Tuple[datetime, int]] = None
 ):
-    if current_user.user_id != user_id:
-        raise NotAuthorisedException()
-
-    if limit > 50:
-        raise ParametersTooLargeException()
-
-    if db.query(models.User).filter(
-        models.User.user_id == user_id
-    ).first() is None:
-        raise UserNotFoundException()
+    """
+    (route_id, created_at) of a page of the routes of a user, newest first:
+    - 'all': the routes created by the user
+    - 'fav': the routes created and voted for by the user
+    - 'feed_fav': the routes voted for by the user
 
+    The page follows the (created_at, route_id) keyset after when given,
+    and starts at offset otherwise.
+    """
     if query_type == 'all':
-        route_ids = (
-            db.query(models.Route.route_id)
-            .filter(models.Route.created_by_user_id == user_id)
-            .order_by(models.Route.created_at.desc())
-            .offset(offset)
-            .limit(limit)
-            .all()
+        query = (
+            select(models.Route.route_id, models.Route.created_at)
+            .where(models.Route.created_by_user_id == user_id)
         )
     elif query_type == 'fav':
-
-        route_ids = (
-            db.query(models.User_Route_Vote.route_id)
-            .filter(models.User_Route_Vote.user_id == user_id)
+        query = (
+            select(models.Route.route_id, models.Route.created_at)
             .join(
-                models.Route,
+                models.User_Route_Vote,
                 models.Route.route_id == models.User_Route_Vote.route_id
             )
-            .filter(models.Route.created_by_user_id == user_id)
-            .order_by(models.Route.created_at.desc())
-            .offset(offset)
-            .limit(limit)
-            .all()
+            .where(models.User_Route_Vote.user_id == user_id)
+            .where(models.Route.created_by_user_id == user_id)
         )
     elif query_type == 'feed_fav':
-        route_ids = (
-            db.query(models.User_Route_Vote.route_id)
-            .filter(models.User_Route_Vote.user_id == user_id)
+        query = (
+            select(models.Route.route_id, models.Route.created_at)
             .join(
-                models.Route,
+                models.User_Route_Vote,
                 models.Route.route_id == models.User_Route_Vote.route_id
             )
-            .order_by(models.Route.created_at.desc())
-            .offset(offset)
-            .limit(limit)
-            .all()
+            .where(models.User_Route_Vote.user_id == user_id)
         )
 
     else:
         raise InvalidSearchQueryException()
 
-    route_ids = [route_id[0] for route_id in route_ids]
+    query = query.order_by(
+        models.Route.created_at.desc(), models.Route.route_id.desc())
 
-    route_objects = [
-        await get_route_from_redis_or_db(route_id, r, db)
-        for route_id in route_ids
-    ]
-    vote_details = (
-        db.query(
-            models.User_Route_Vote.route_id,
-            func.count(models.User_Route_Vote.route_id).label("num_votes"),
-            (func.sum(case((models.User_Route_Vote.user_id ==
-             current_user.user_id, 1), else_=0)) > 0).label('voted_by_user')
+    if after is not None:
+        query = query.where(
+            tuple_(models.Route.created_at, models.Route.route_id)
+            < tuple_(*after)
         )
-        .filter(models.User_Route_Vote.route_id.in_(route_ids))
-        .group_by(models.User_Route_Vote.route_id)
-        .all()
-    )
+    else:
+        query = query.offset(offset)
 
-    vote_details = (
-        db.query(
-            models.User_Route_Vote.route_id,
-            func.count(models.User_Route_Vote.route_id).label("num_votes"),
-            (func.sum(case((models.User_Route_Vote.user_id ==
-             current_user.user_id, 1), else_=0)) > 0).label('voted_by_user')
-        )
-        .filter(models.User_Route_Vote.route_id.in_(route_ids))
-        .group_by(models.User_Route_Vote.route_id)
-        .all()
-    )
+    return query.limit(limit)
 
-    routes_out = merge_route_details(
-        route_objects=route_objects, vote_details=vote_details)
 
-    return routes_out
+async def list_user_route_ids(
+    query_type: str,
+    user_id: int,
+    offset: int,
+    limit: int,
+    db: AsyncSession,
+    current_user: schemas.User,
+    cursor: Optional[str] = None
+) -> Tuple[List[int], Optional[str]]:
+    """
+    List the ids of the routes of a user, newest first.
+
+    Pages are selected with the (created_at, route_id) keyset of the cursor
+    when one is given, and with the offset otherwise.
+
+    Returns the route ids and the cursor of the next page,
+    None on the last page.
+    """
+    if current_user.user_id != user_id:
+        raise NotAuthorisedException()
+
+    if limit > 50:
+        raise ParametersTooLargeException()
+
+    if await db.scalar(
+        select(models.User.user_id).where(models.User.user_id == user_id)
+    ) is None:
+        raise UserNotFoundException()
+
+    after = None
+    if cursor is not None:
+        try:
+            created_at, route_id = decode_cursor(cursor)
+            after = (datetime.fromisoformat(created_at), int(route_id))
+        except (TypeError, ValueError):
+            raise InvalidSearchQueryException()
+
+    query = user_route_ids_statement(query_type, user_id, offset, limit, after)
+    rows = (await db.execute(query)).all()
+    route_ids = [row.route_id for row in rows]
+
+    next_cursor = None
+    if rows and len(rows) == limit:
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].route_id)
+
+    return route_ids, next_cursor
+
+
+async def get_routes_(
+    query_type: str,
+    user_id: int,
+    offset: int,
+    limit: int,
+    db: AsyncSession,
+    r: aioredis.Redis,
+    current_user: schemas.User,
+    cursor: Optional[str] = None
+) -> Tuple[List[schemas.RouteVoteOutUser], Optional[str]]:
+    """
+    List the routes of a user, see list_user_route_ids.
+
+    Returns the routes and the cursor of the next page,
+    None on the last page.
+    """
+    route_ids, next_cursor = await list_user_route_ids(
+        query_type, user_id, offset, limit, db, current_user, cursor)
+
+    routes_out = await hydrate_route_votes(route_ids, r, db, current_user)
+
+    return routes_out, next_cursor
 
 
 @router.get('/user/{user_id}/', response_model=list[schemas.RouteVoteOutUser])
 @limiter.limit("5/second")
 async def get_routes_user(
         request: Request, user_id: int,
-        offset: int = 0,
-        limit: int = 10,
-        db: Session = Depends(get_db),
+        offset: int = Query(0, ge=0),
+        limit: int = Query(10, gt=0, le=50),
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = Depends(route_fields),
+        db: AsyncSession = Depends(get_async_db),
+        read_db: AsyncSession = Depends(get_async_read_db),
         r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)):
     """
@@ -340,30 +852,46 @@ async def get_routes_user(
     Args:
     - user_id (int): The ID of the user whose routes are to be retrieved.
     - limit (int): The maximum number of routes to retrieve. Defaults to 10.
+    - cursor (str, optional): The cursor of the page to retrieve, from the
+      X-Next-Cursor header of the previous page. Replaces offset.
+    - view (str, optional): 'summary' to return schemas.RouteSummaryOut
+      routes, without their geometry and instructions. Defaults to 'full'.
+    - fields (str, optional): Comma separated fields of the routes to
+      return, e.g. 'locations,route_image_name'. Replaces view.
 
     Raises:
     - ParametersTooLargeException: If the limit specified exceeds 50.
     - UserNotFoundException: If no user is found with the specified ID.
     - RouteNotFoundException: If no routes are found.
+    - InvalidSearchQueryException:
+      If the cursor, the view or one of the fields is invalid.
 
     Returns:
     - List[schemas.RouteVoteOut]:
       A list of routes and their respective vote counts.
+      The X-Next-Cursor header holds the cursor of the next page,
+      it is absent on the last page.
     """
 
-    return await get_routes_(
-        'all', user_id, offset, limit, db, r, current_user
+    route_ids, next_cursor = await list_user_route_ids(
+        'all', user_id, offset, limit, read_db, current_user, cursor
     )
 
+    return await route_votes_response(
+        request, route_ids, r, db, current_user, next_cursor, fields)
+
 
 @router.get('/user/fav/{user_id}/',
             response_model=list[schemas.RouteVoteOutUser])
 @limiter.limit("5/second")
 async def get_routes_user_fav(
         request: Request, user_id: int,
-        offset: int = 0,
-        limit: int = 10,
-        db: Session = Depends(get_db),
+        offset: int = Query(0, ge=0),
+        limit: int = Query(10, gt=0, le=50),
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = Depends(route_fields),
+        db: AsyncSession = Depends(get_async_db),
+        read_db: AsyncSession = Depends(get_async_read_db),
         r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)):
     """
@@ -374,30 +902,46 @@ async def get_routes_user_fav(
       The ID of the user whose favorite routes are to be retrieved.
     - limit (int):
       The maximum number of favorite routes to retrieve. Defaults to 10.
+    - cursor (str, optional): The cursor of the page to retrieve, from the
+      X-Next-Cursor header of the previous page. Replaces offset.
+    - view (str, optional): 'summary' to return schemas.RouteSummaryOut
+      routes, without their geometry and instructions. Defaults to 'full'.
+    - fields (str, optional): Comma separated fields of the routes to
+      return, e.g. 'locations,route_image_name'. Replaces view.
 
     Raises:
     - ParametersTooLargeException: If the limit specified exceeds 50.
     - UserNotFoundException: If no user is found with the specified ID.
     - RouteNotFoundException: If no routes are found.
+    - InvalidSearchQueryException:
+      If the cursor, the view or one of the fields is invalid.
 
     Returns:
     - List[schemas.RouteVoteOut]:
       A list of favorite routes and their respective vote counts.
+      The X-Next-Cursor header holds the cursor of the next page,
+      it is absent on the last page.
     """
 
-    return await get_routes_(
-        'fav', user_id, offset, limit, db, r, current_user
+    route_ids, next_cursor = await list_user_route_ids(
+        'fav', user_id, offset, limit, read_db, current_user, cursor
     )
 
+    return await route_votes_response(
+        request, route_ids, r, db, current_user, next_cursor, fields)
+
 
 @router.get('/feed/user/fav/{user_id}/',
             response_model=list[schemas.RouteVoteOutUser])
 @limiter.limit("5/second")
 async def get_routes(
         request: Request, user_id: int,
-        offset: int = 0,
-        limit: int = 10,
-        db: Session = Depends(get_db),
+        offset: int = Query(0, ge=0),
+        limit: int = Query(10, gt=0, le=50),
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = Depends(route_fields),
+        db: AsyncSession = Depends(get_async_db),
+        read_db: AsyncSession = Depends(get_async_read_db),
         r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)):
     """
@@ -408,75 +952,239 @@ async def get_routes(
       The ID of the user whose favorite routes are to be retrieved.
     - limit (int):
       The maximum number of favorite routes to retrieve. Defaults to 10.
+    - cursor (str, optional): The cursor of the page to retrieve, from the
+      X-Next-Cursor header of the previous page. Replaces offset.
+    - view (str, optional): 'summary' to return schemas.RouteSummaryOut
+      routes, without their geometry and instructions. Defaults to 'full'.
+    - fields (str, optional): Comma separated fields of the routes to
+      return, e.g. 'locations,route_image_name'. Replaces view.
 
     Raises:
     - ParametersTooLargeException: If the limit specified exceeds 50.
     - UserNotFoundException: If no user is found with the specified ID.
     - RouteNotFoundException: If no routes are found.
+    - InvalidSearchQueryException:
+      If the cursor, the view or one of the fields is invalid.
 
     Returns:
     - List[schemas.RouteVoteOut]:
       A list of favorite routes and their respective vote counts.
+      The X-Next-Cursor header holds the cursor of the next page,
+      it is absent on the last page.
     """
 
-    return await get_routes_(
-        'feed_fav', user_id, offset, limit, db, r, current_user
+    route_ids, next_cursor = await list_user_route_ids(
+        'feed_fav', user_id, offset, limit, read_db, current_user, cursor
     )
 
+    return await route_votes_response(
+        request, route_ids, r, db, current_user, next_cursor, fields)
+
 
 @async_retry()
 async def publish_route_in_redis(
         route_id: int,
         r: aioredis.Redis,
-        db: Session):
-
-    # Assume the epoch time is January 1, 2022
-    epoch_time = mktime((2022, 1, 1, 0, 0, 0, 0, 0, 0))
-    max_time = mktime((2030, 1, 1, 0, 0, 0, 0, 0, 0))
+        db: AsyncSession):
 
     # Current time in seconds
     current_time_seconds = time()
+    published_until = current_time_seconds + ROUTE_FEED_EXPIRY_DURATION
+
+    # The publication is also kept on the route, see get_nearby_routes
+    num_votes = await db.scalar(
+        update(models.Route)
+        .where(models.Route.route_id == route_id)
+        .values(published_until=func.to_timestamp(published_until))
+        .returning(models.Route.num_votes))
+    await db.commit()
+
+    async with r.pipeline(transaction=True) as pipe:
+        # Add the route to the ZSET of each feed ordering
+        pipe.zadd(ROUTES_FEED, {
+            route_id: feed_score(num_votes, current_time_seconds)})
+        pipe.zadd(ROUTES_FEED_CREATED_AT, {route_id: current_time_seconds})
+        pipe.zadd(ROUTES_FEED_HOT, {
+            route_id: hot_score(num_votes, current_time_seconds)})
+        # Track its expiry in a ZSET scored by expiry time
+        pipe.zadd(ROUTES_FEED_EXPIRY, {route_id: published_until})
+        await pipe.execute()
+
+
+# Removes the routes whose expiry time has passed from all the ZSETs,
+# at most ARGV[2] routes per call. The expiry ZSET is the last key.
+CLEANUP_EXPIRED_ROUTES_SCRIPT = """
+local expired = redis.call(
+    'ZRANGEBYSCORE', KEYS[#KEYS], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #expired > 0 then
+    for _, key in ipairs(KEYS) do
+        redis.call('ZREM', key, unpack(expired))
+    end
+end
+return #expired
+"""
+CLEANUP_BATCH_SIZE = 1000
 
-    normalized_timestamp = (current_time_seconds -
-                            epoch_time) / (max_time - epoch_time)
 
-    num_votes = db.query(func.count(models.User_Route_Vote.route_id)).filter(
-        models.User_Route_Vote.route_id == route_id).scalar()
+@async_retry()
+async def cleanup_expired_routes(r: aioredis.Redis):
+    cleanup_script = r.register_script(CLEANUP_EXPIRED_ROUTES_SCRIPT)
 
-    score = num_votes + normalized_timestamp
+    removed = CLEANUP_BATCH_SIZE
+    while removed == CLEANUP_BATCH_SIZE:
+        removed = await cleanup_script(
+            keys=[*FEED_ORDERINGS.values(), ROUTES_FEED_EXPIRY],
+            args=[time(), CLEANUP_BATCH_SIZE]
+        )
 
-    # Add the route to the ZSET with a score of 0
-    await r.zadd('routes_feed', {route_id: score})
-    # Set a separate expiration key for the route
-    # 86400 seconds = 1 day
-    await r.setex(f"route_expiry:{route_id}", 86400, 'expire')
 
+async def unpublish_expired_routes(db: AsyncSession):
+    """
+    Clear the publication of the routes whose expiry has passed.
+    """
+    await db.execute(
+        update(models.Route)
+        .where(models.Route.published_until <= func.now())
+        .values(published_until=None)
+    )
+    await db.commit()
+
+
+async def backfill_routes_feed_expiry(r: aioredis.Redis):
+    """
+    Move routes published with a route_expiry:{route_id} key
+    to the expiry ZSET.
+    """
+    route_ids = await r.zrange(ROUTES_FEED, 0, -1)
+    if not route_ids:
+        return
+
+    async with r.pipeline(transaction=False) as pipe:
+        for route_id in route_ids:
+            pipe.zscore(ROUTES_FEED_EXPIRY, route_id)
+        expiries = await pipe.execute()
+
+    route_ids = [
+        route_id for route_id, expiry in zip(route_ids, expiries)
+        if expiry is None
+    ]
+    if not route_ids:
+        return
+
+    async with r.pipeline(transaction=False) as pipe:
+        for route_id in route_ids:
+            pipe.ttl(f"route_expiry:{route_id}")
+        ttls = await pipe.execute()
+
+    # Routes without an expiry key had expired already
+    now = time()
+    await r.zadd(ROUTES_FEED_EXPIRY, {
+        route_id: now + max(ttl, 0)
+        for route_id, ttl in zip(route_ids, ttls)
+    })
+    await r.delete(*[f"route_expiry:{route_id}" for route_id in route_ids])
+
+
+async def backfill_feed_orderings(r: aioredis.Redis):
+    """
+    Add the routes published before the created_at and hot orderings
+    to their ZSETs, from the votes and publish time of their feed score.
+    """
+    routes = await r.zrange(ROUTES_FEED, 0, -1, withscores=True)
+    if not routes:
+        return
+
+    async with r.pipeline(transaction=False) as pipe:
+        for route_id, _ in routes:
+            pipe.zscore(ROUTES_FEED_CREATED_AT, route_id)
+        published = await pipe.execute()
+
+    created_at, hot = {}, {}
+    for (route_id, score), published_at in zip(routes, published):
+        if published_at is not None:
+            continue
+        num_votes, published_at = split_feed_score(score)
+        created_at[route_id] = published_at
+        hot[route_id] = hot_score(num_votes, published_at)
+
+    if not created_at:
+        return
+
+    async with r.pipeline(transaction=True) as pipe:
+        # NX keeps the scores of routes published since the ZRANGE
+        pipe.zadd(ROUTES_FEED_CREATED_AT, created_at, nx=True)
+        pipe.zadd(ROUTES_FEED_HOT, hot, nx=True)
+        await pipe.execute()
+
+
+async def backfill_published_until(r: aioredis.Redis, db: AsyncSession):
+    """
+    Record on the routes the publications of the feed made before
+    routes.published_until.
+    """
+    expiries = await r.zrangebyscore(
+        ROUTES_FEED_EXPIRY, f"({time()}", "+inf", withscores=True)
+    if not expiries:
+        return
+
+    routes = models.Route.__table__
+    await db.execute(
+        update(routes)
+        .where(routes.c.route_id == bindparam("b_route_id"))
+        .where(routes.c.published_until.is_(None))
+        .values(published_until=func.to_timestamp(
+            bindparam("b_published_until"))),
+        [
+            {"b_route_id": int(route_id), "b_published_until": expiry}
+            for route_id, expiry in expiries
+        ]
+    )
+    await db.commit()
 
-@async_retry()
-async def cleanup_expired_routes(r: aioredis.Redis):
-    # Get all routes from ZSET
-    route_ids = await r.zrange('routes_feed', 0, -1)
-    for route_id in route_ids:
-        # If the expiration key doesn't exist, remove the route from ZSET
-        if not await r.exists(f"route_expiry:{route_id}"):
-            await r.zrem('routes_feed', route_id)
+
+async def cleanup_expired_routes_periodically():
+    """
+    Background task removing expired routes from the feed and clearing
+    their publication, in the worker holding the feed_cleanup lease.
+
+    The feed is backfilled first, and again on the next round
+    when the backfill fails.
+    """
+    backfilled = False
+
+    while True:
+        try:
+            async with get_redis_feed_db_context() as r:
+                if await acquire_lease(
+                        r, "feed_cleanup", 3 * settings.FEED_CLEANUP_INTERVAL):
+                    async with AsyncSessionLocal() as db:
+                        if not backfilled:
+                            await backfill_routes_feed_expiry(r)
+                            await backfill_feed_orderings(r)
+                            await backfill_published_until(r, db)
+                            backfilled = True
+
+                        await cleanup_expired_routes(r)
+                        await unpublish_expired_routes(db)
+        except Exception:
+            logger.exception("Error cleaning up expired routes")
+
+        await asyncio.sleep(settings.FEED_CLEANUP_INTERVAL)
 
 
 async def publish_route_(
         route_id: int,
-        db: Session,
+        db: AsyncSession,
         r: aioredis.Redis,
         current_user: schemas.User
 ):
     # Check if route exists
-    if db.query(models.Route).filter(
-        models.Route.route_id == route_id
-    ).first() is None:
+    route = await db.scalar(
+        select(models.Route).where(models.Route.route_id == route_id))
+    if route is None:
         raise RouteNotFoundException()
 
     # Check if the route belongs to the current user
-    route = db.query(models.Route).filter(
-        models.Route.route_id == route_id).first()
     if route.created_by_user_id != current_user.user_id:
         raise NotAuthorisedException()
 
@@ -488,7 +1196,7 @@ async def publish_route_(
 async def publish_route(
         request: Request,
         route_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)):
     """
@@ -504,7 +1212,7 @@ async def publish_route(
     Parameters:
     - request (Request): The request object.
     - route_id (int): The unique identifier of the route to be published.
-    - db (Session): The database session, injected by FastAPI.
+    - db (AsyncSession): The database session, injected by FastAPI.
     - r (aioredis.Redis): The Redis instance for feeds, injected by FastAPI.
     - current_user (schemas.User):
       The current authenticated user, injected by FastAPI.
@@ -527,70 +1235,108 @@ async def publish_route(
     }}
 
 
-async def fetch_top_routes(
+async def list_feed_route_ids(
     order_by: str,
     offset: int,
     limit: int,
     r: aioredis.Redis,
-    db: Session,
-    current_user: schemas.User
-):
+    cursor: Optional[str] = None
+) -> Tuple[List[int], Optional[str]]:
+    """
+    List the ids of a page of the feed, from the ZSET of the ordering.
 
-    await cleanup_expired_routes(r)
+    Pages are selected from the (score, route_id) of the cursor when one is
+    given, so routes do not shift between pages as ranks change,
+    and with the offset otherwise.
 
-    order_by_options = ['created_at', 'num_votes']
-    if order_by not in order_by_options:
+    Returns the route ids and the cursor of the next page,
+    None on the last page.
+    """
+
+    if order_by not in FEED_ORDERINGS:
         raise InvalidSearchQueryException()
+    feed_key = FEED_ORDERINGS[order_by]
+
+    if limit > 50:
+        raise ParametersTooLargeException()
 
     # Fetch top routes from Redis
-    route_ids_with_votes = await r.zrevrange(
-        'routes_feed',
-        offset,
-        offset+limit-1,
-        withscores=True
-    )
-    route_ids = [route[0] for route in route_ids_with_votes]
+    if cursor is None:
+        route_ids_with_votes = await r.zrevrange(
+            feed_key,
+            offset,
+            offset+limit-1,
+            withscores=True
+        )
+    else:
+        try:
+            score, route_id = decode_cursor(cursor)
+            score, route_id = float(score), str(route_id)
+        except (TypeError, ValueError):
+            raise InvalidSearchQueryException()
 
-    route_objects = [
-        await get_route_from_redis_or_db(
-            route_id, r, db
-        ) for route_id in route_ids
-    ]
+        # Members with equal scores are in reverse lexicographical order
+        ties = await r.zrevrangebyscore(
+            feed_key, score, score, withscores=True)
+        lower = await r.zrevrangebyscore(
+            feed_key, f"({score}", '-inf',
+            start=0, num=limit, withscores=True)
 
-    # Query DB for route details based on IDs
-    vote_details = (
-        db.query(
-            models.User_Route_Vote.route_id,
-            func.count(models.User_Route_Vote.route_id).label("num_votes"),
-            (func.sum(case((models.User_Route_Vote.user_id ==
-             current_user.user_id, 1), else_=0)) > 0).label('voted_by_user')
-        )
-        .filter(models.User_Route_Vote.route_id.in_(route_ids))
-        .group_by(models.User_Route_Vote.route_id)
-        .all()
-    )
+        route_ids_with_votes = [
+            route for route in ties if route[0] < route_id
+        ] + lower
+        route_ids_with_votes = route_ids_with_votes[:limit]
 
-    routes_out = merge_route_details(
-        route_objects=route_objects, vote_details=vote_details)
+    route_ids = [int(route[0]) for route in route_ids_with_votes]
+
+    next_cursor = None
+    if route_ids_with_votes and len(route_ids_with_votes) == limit:
+        last_id, last_score = route_ids_with_votes[-1]
+        next_cursor = encode_cursor(last_score, last_id)
 
-    return routes_out
+    return route_ids, next_cursor
+
+
+async def fetch_top_routes(
+    order_by: str,
+    offset: int,
+    limit: int,
+    r: aioredis.Redis,
+    db: AsyncSession,
+    current_user: schemas.User,
+    cursor: Optional[str] = None
+) -> Tuple[List[schemas.RouteVoteOutUser], Optional[str]]:
+    """
+    Fetch a page of the feed, see list_feed_route_ids.
+
+    Returns the routes and the cursor of the next page,
+    None on the last page.
+    """
+    route_ids, next_cursor = await list_feed_route_ids(
+        order_by, offset, limit, r, cursor)
+
+    routes_out = await hydrate_route_votes(route_ids, r, db, current_user)
+
+    return routes_out, next_cursor
 
 
 @router.get("/feed/top_routes/", response_model=list[schemas.RouteVoteOutUser])
 async def get_top_routes(
         request: Request,
         order_by: str = 'num_votes',
-        offset: int = 0,
-        limit: int = 10,
+        offset: int = Query(0, ge=0),
+        limit: int = Query(10, gt=0, le=50),
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = Depends(route_fields),
         r: aioredis.Redis = Depends(get_redis_feed_db),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)):
     """
     Get top routes based on the provided criteria and order.
 
-    This endpoint returns the top routes either by creation date or votes,
-    depending on the order_by parameter.
-    Before fetching, it cleans up expired routes.
+    This endpoint returns the top routes by publish date, votes or
+    votes decayed by age, depending on the order_by parameter.
+    Expired routes are removed from the feed by a background task.
     It first fetches the route IDs from Redis,
     followed by a detailed query on the
     database for more information on each route,
@@ -601,22 +1347,153 @@ async def get_top_routes(
     - request (Request): The request object.
     - order_by (str, optional):
       The ordering criterion.
-      Can be either 'created_at' or 'num_votes'. Defaults to 'num_votes'.
+      Can be 'created_at', 'num_votes' or 'hot'. Defaults to 'num_votes'.
     - limit (int, optional):
       The maximum number of routes to return. Defaults to 10.
     - offset (int, optional): The offset for pagination. Defaults to 0.
+    - cursor (str, optional): The cursor of the page to retrieve, from the
+      X-Next-Cursor header of the previous page. Replaces offset.
+    - view (str, optional): 'summary' to return schemas.RouteSummaryOut
+      routes, without their geometry and instructions. Defaults to 'full'.
+    - fields (str, optional): Comma separated fields of the routes to
+      return, e.g. 'locations,route_image_name'. Replaces view.
     - r (aioredis.Redis): The Redis instance for feeds, injected by FastAPI.
-    - db (Session): The database session, injected by FastAPI.
+    - db (AsyncSession): The database session, injected by FastAPI.
     - current_user (schemas.User):
       The current authenticated user, injected by FastAPI.
 
     Returns:
     - list[schemas.RouteVoteOutUser]:
       A list of top routes with their associated vote details.
+      The X-Next-Cursor header holds the cursor of the next page,
+      it is absent on the last page.
 
     Raises:
     - InvalidSearchQueryException:
-      If the order_by parameter is not in the allowed options.
+      If the order_by parameter is not in the allowed options,
+      or the cursor, the view or one of the fields is invalid.
+    - ParametersTooLargeException: If the limit specified exceeds 50.
     """
 
-    return await fetch_top_routes(order_by, offset, limit, r, db, current_user)
+    route_ids, next_cursor = await list_feed_route_ids(
+        order_by, offset, limit, r, cursor)
+
+    return await route_votes_response(
+        request, route_ids, r, db, current_user, next_cursor, fields)
+
+
+MAX_NEARBY_DISTANCE = 5000  # metres
+
+
+def nearby_route_ids_statement(
+    longitude: float,
+    latitude: float,
+    distance: float,
+    offset: int,
+    limit: int
+):
+    """
+    Ids of a page of the published routes passing within distance
+    metres of a location, nearest first.
+
+    Both filters are answered by ix_routes_published_route_geom, a GiST
+    index of the geometry of the published routes only.
+    """
+    current_location = WKTElement(
+        f'POINT({longitude} {latitude})', srid=4326)
+
+    # Radius in degrees for the bounding box check served by the GiST index,
+    # widened by latitude so it never undershoots the distance in metres
+    degree_radius = distance / (111320 * max(cos(radians(latitude)), 0.01))
+    route_distance = func.ST_Distance(
+        cast(models.Route.route_geom, Geography),
+        cast(current_location, Geography)
+    )
+
+    # Expired publications may not have been cleared yet
+    return (
+        select(models.Route.route_id)
+        .where(models.Route.published_until.isnot(None))
+        .where(models.Route.published_until > func.now())
+        .where(func.ST_DWithin(
+            models.Route.route_geom, current_location, degree_radius))
+        .where(route_distance <= distance)
+        .order_by(route_distance, models.Route.route_id)
+        .offset(offset)
+        .limit(limit)
+    )
+
+
+async def list_nearby_route_ids(
+    longitude: float,
+    latitude: float,
+    distance: float,
+    offset: int,
+    limit: int,
+    db: AsyncSession
+) -> List[int]:
+    if limit > 50 or distance > MAX_NEARBY_DISTANCE:
+        raise ParametersTooLargeException()
+
+    return (await db.scalars(nearby_route_ids_statement(
+        longitude, latitude, distance, offset, limit))).all()
+
+
+@router.get("/feed/nearby/", response_model=list[schemas.RouteVoteOutUser])
+@limiter.limit("5/second")
+async def get_nearby_routes(
+        request: Request,
+        longitude: float,
+        latitude: float,
+        distance: float = 1000,
+        offset: int = Query(0, ge=0),
+        limit: int = Query(10, gt=0, le=50),
+        fields: Optional[List[str]] = Depends(route_fields),
+        r: aioredis.Redis = Depends(get_redis_feed_db),
+        db: AsyncSession = Depends(get_async_db),
+        read_db: AsyncSession = Depends(get_async_read_db),
+        current_user: schemas.User = Depends(oauth2.get_current_user)):
+    """
+    Get published routes passing near a location.
+
+    Routes currently published, by their published_until, are matched
+    against their stored LINESTRING geometry using the spatial index of the
+    published routes, and ordered by distance from the given location.
+
+    Parameters:
+    - request (Request): The request object.
+    - longitude (float): Longitude of the caller.
+    - latitude (float): Latitude of the caller.
+    - distance (float, optional):
+      Maximum distance in metres between the route and the caller.
+      Defaults to 1000, at most 5000.
+    - offset (int, optional): The offset for pagination. Defaults to 0.
+    - limit (int, optional):
+      The maximum number of routes to return. Defaults to 10.
+    - view (str, optional): 'summary' to return schemas.RouteSummaryOut
+      routes, without their geometry and instructions. Defaults to 'full'.
+    - fields (str, optional): Comma separated fields of the routes to
+      return, e.g. 'locations,route_image_name'. Replaces view.
+    - r (aioredis.Redis): The Redis instance for feeds, injected by FastAPI.
+    - db (AsyncSession): The database session, injected by FastAPI.
+    - read_db (AsyncSession): The session the nearby routes are queried
+      with, on the read replica when there is one, injected by FastAPI.
+    - current_user (schemas.User):
+      The current authenticated user, injected by FastAPI.
+
+    Returns:
+    - list[schemas.RouteVoteOutUser]:
+      A list of nearby routes with their associated vote details.
+
+    Raises:
+    - ParametersTooLargeException:
+      If the limit exceeds 50 or the distance exceeds 5000 metres.
+    - InvalidSearchQueryException:
+      If the view or one of the fields is invalid.
+    """
+
+    route_ids = await list_nearby_route_ids(
+        longitude, latitude, distance, offset, limit, read_db)
+
+    return await route_votes_response(
+        request, route_ids, r, db, current_user, fields=fields)
@@ -1,17 +1,36 @@
-from fastapi import APIRouter, Depends, Request
+import logging
+from fastapi import APIRouter, BackgroundTasks, Depends, Request
 
-from sqlalchemy import desc, func
-from sqlalchemy.orm import Session
+from sqlalchemy import all_, bindparam, desc, func, select, Float, String
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from geoalchemy2 import WKTElement
 import aioredis
 import numpy as np
 import random
 from ..huggingface_models import embedding_model, get_similar_image
-from ..database import get_db
-from ..redis import get_redis_feed_db, async_retry
+from ..database import (
+    get_async_db,
+    get_async_search_db,
+    AsyncSessionLocal,
+    BinaryVector
+)
+from ..redis import (
+    get_redis_feed_db,
+    get_redis_feed_db_context,
+    async_retry
+)
 
 from ..mapbox import get_route
+from ..instruction_translation import (
+    SUPPORTED_LANGUAGES,
+    translate_instructions
+)
 
+from ..invalidation import (
+    route_instructions_key,
+    route_instructions_translated_key
+)
 from ..limiter import limiter
 from ..exceptions import (
     LocationNotFoundException,
@@ -21,6 +40,8 @@ from ..exceptions import (
 from .. import models, schemas, oauth2, translation
 
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix="/search",
     tags=["Search"],
@@ -44,18 +65,98 @@ PROMPT_LOCATION_TYPE_MODELS = {
 }
 
 
+def location_search(Model, negative: bool = True):
+    """
+    The 10 locations of Model most similar to a query,
+    within a distance of a point and excluding the places already seen.
+
+    The statement is built once per location type, with the values of a
+    leg as bound parameters: embedding, negative_embedding, longitude,
+    latitude, distance_threshold, similarity_threshold,
+    negative_similarity_threshold and seen_places. Each leg of a search
+    then reuses the compiled statement from the compile cache, and the
+    statement prepared on the connection, with the embeddings bound in
+    binary.
+
+    Args:
+    - Model: The model of the location type.
+    - negative (bool): Whether to exclude the locations similar to a
+      negative query, by negative_similarity_threshold.
+    """
+    similarity = 1 - Model.embedding.cosine_distance(
+        bindparam("embedding", type_=BinaryVector(384)))
+    current_location = func.ST_SetSRID(
+        func.ST_MakePoint(
+            bindparam("longitude", type_=Float),
+            bindparam("latitude", type_=Float)
+        ),
+        4326
+    )
+
+    query = (
+        select(
+            Model.id.label('id'),
+            Model.name.label('name'),
+            func.st_y(Model.coord).label('latitude'),
+            func.st_x(Model.coord).label('longitude'),
+            similarity.label('similarity')
+        )
+        .where(func.ST_Distance(
+            func.ST_Transform(Model.coord, 3857),
+            func.ST_Transform(current_location, 3857)
+        ) < bindparam("distance_threshold", type_=Float))
+        .where(similarity > bindparam("similarity_threshold", type_=Float))
+        # Exclude places already seen, one statement whatever their number
+        .where(Model.name != all_(
+            bindparam("seen_places", type_=ARRAY(String))))
+        .order_by(desc('similarity'))
+        .limit(10)
+    )
+
+    if negative:
+        negative_similarity = 1 - Model.embedding.cosine_distance(
+            bindparam("negative_embedding", type_=BinaryVector(384)))
+        query = query.where(
+            negative_similarity
+            < bindparam("negative_similarity_threshold", type_=Float))
+
+    return query
+
+
+LOCATION_TYPE_SEARCHES = {
+    location_type: location_search(Model)
+    for location_type, Model in LOCATION_TYPE_MODELS.items()
+}
+
+LOCATION_TYPE_SEARCHES_V1 = {
+    location_type: location_search(Model, negative=False)
+    for location_type, Model in LOCATION_TYPE_MODELS.items()
+}
+
+
 def softmax(x):
     """Compute softmax values for each sets of scores in x."""
     e_x = np.exp(x - np.max(x))
     return e_x / e_x.sum(axis=0)
 
 
+def route_linestring(route_coordinates: list[dict[str, float]]):
+    """Build a PostGIS LINESTRING from route coordinates."""
+    if len(route_coordinates) < 2:
+        return None
+
+    points = ", ".join(
+        f"{c['longitude']} {c['latitude']}" for c in route_coordinates)
+
+    return WKTElement(f'LINESTRING({points})', srid=4326)
+
+
 @router.post("/route/", response_model=schemas.RouteOut)
 @limiter.limit("1/second")
 async def search_by_query_seq(
         request: Request,
         querys: schemas.RouteQuery,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_search_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)):
     """
     Search for a route based on user queries and the current location.
@@ -85,46 +186,27 @@ async def search_by_query_seq(
     )
 
     db.add(prompt)
-    db.commit()
-    db.refresh(prompt)
-    current_location = WKTElement(
-        f'POINT({querys.longitude} {querys.latitude})', srid=4326)
+    await db.commit()
+    await db.refresh(prompt)
+    current_long, current_lat = querys.longitude, querys.latitude
 
     for i, query in enumerate(querys.query):
         query_embeding = embedding_model.encode([query])[0]
 
-        # Dynamically get the correct model based on location type
-        Model = LOCATION_TYPE_MODELS.get(querys.location_type[i])
+        # Get the prepared search of the location type
+        query_result = LOCATION_TYPE_SEARCHES_V1.get(querys.location_type[i])
 
-        if not Model:
+        if query_result is None:
             raise LocationNotFoundException()
 
-        query_result = (
-            db.query(
-                Model.id.label('id'),
-                Model.name.label('name'),
-                func.st_y(Model.coord).label('latitude'),
-                func.st_x(Model.coord).label('longitude'),
-                (
-                    1-Model.embedding.cosine_distance(query_embeding)
-                ).label('similarity')
-            )
-            .filter(func.ST_Distance(
-                func.ST_Transform(Model.coord, 3857),
-                func.ST_Transform(current_location, 3857)
-            ) < querys.distance_threshold)
-            .filter(
-                (1-Model.embedding.cosine_distance(query_embeding)
-                 ) > querys.similarity_threshold)
-            # Exclude places already seen
-            .filter(Model.name.notin_(seen_places))
-            .order_by(desc('similarity'))
-            .limit(10)
-
-
-        )
-
-        locations = query_result.all()
+        locations = (await db.execute(query_result, {
+            "embedding": query_embeding,
+            "longitude": current_long,
+            "latitude": current_lat,
+            "distance_threshold": querys.distance_threshold,
+            "similarity_threshold": querys.similarity_threshold,
+            "seen_places": list(seen_places)
+        })).all()
 
         if locations:
             similarities = [result.similarity for result in locations]
@@ -135,12 +217,8 @@ async def search_by_query_seq(
 
             results.append(chosen_location)
 
-            currect_long = chosen_location.longitude
+            current_long = chosen_location.longitude
             current_lat = chosen_location.latitude
-            current_location = WKTElement(
-                f'POINT({currect_long} {current_lat})',
-                srid=4326
-            )
             seen_places.add(chosen_location.name)
 
         else:
@@ -155,7 +233,7 @@ async def search_by_query_seq(
         )
 
         db.add(insert_prompt_location)
-        db.commit()
+        await db.commit()
 
     if results == []:
         raise LocationNotFoundException()
@@ -195,7 +273,7 @@ async def search_by_query_seq(
 
 async def search_by_query_seq_v2_(
         querys: schemas.RouteQueryV2,
-        db: Session,
+        db: AsyncSession,
         current_user: schemas.User):
     """
     Search for a route based on user queries,
@@ -241,51 +319,32 @@ async def search_by_query_seq_v2_(
     )
 
     db.add(prompt)
-    db.commit()
-    db.refresh(prompt)
-    current_location = WKTElement(
-        f'POINT({querys.longitude} {querys.latitude})', srid=4326)
+    await db.commit()
+    await db.refresh(prompt)
+    current_long, current_lat = querys.longitude, querys.latitude
 
     for i, query in enumerate(querys.query):
         query_embeding = embedding_model.encode([query])[0]
         negative_query_embeding = embedding_model.encode(
             [querys.negative_query[i]])[0]
 
-        # Dynamically get the correct model based on location type
-        Model = LOCATION_TYPE_MODELS.get(querys.location_type[i])
+        # Get the prepared search of the location type
+        query_result = LOCATION_TYPE_SEARCHES.get(querys.location_type[i])
 
-        if not Model:
+        if query_result is None:
             raise LocationNotFoundException()
 
-        query_result = (
-            db.query(
-                Model.id.label('id'),
-                Model.name.label('name'),
-                func.st_y(Model.coord).label('latitude'),
-                func.st_x(Model.coord).label('longitude'),
-                (
-                    1-Model.embedding.cosine_distance(query_embeding)
-                ).label('similarity')
-            )
-            .filter(func.ST_Distance(
-                func.ST_Transform(Model.coord, 3857),
-                func.ST_Transform(current_location, 3857)
-            ) < querys.distance_threshold)
-            .filter(
-                (1-Model.embedding.cosine_distance(query_embeding)
-                 ) > querys.similarity_threshold)
-            .filter(
-                (1-Model.embedding.cosine_distance(negative_query_embeding)
-                 ) < querys.negative_similarity_threshold)
-            # Exclude places already seen
-            .filter(Model.name.notin_(seen_places))
-            .order_by(desc('similarity'))
-            .limit(10)
-
-
-        )
-
-        locations = query_result.all()
+        locations = (await db.execute(query_result, {
+            "embedding": query_embeding,
+            "negative_embedding": negative_query_embeding,
+            "longitude": current_long,
+            "latitude": current_lat,
+            "distance_threshold": querys.distance_threshold,
+            "similarity_threshold": querys.similarity_threshold,
+            "negative_similarity_threshold":
+                querys.negative_similarity_threshold,
+            "seen_places": list(seen_places)
+        })).all()
 
         if locations:
             similarities = [result.similarity for result in locations]
@@ -296,12 +355,8 @@ async def search_by_query_seq_v2_(
 
             results.append(chosen_location)
 
-            currect_long = chosen_location.longitude
+            current_long = chosen_location.longitude
             current_lat = chosen_location.latitude
-            current_location = WKTElement(
-                f'POINT({currect_long} {current_lat})',
-                srid=4326
-            )
             seen_places.add(chosen_location.name)
 
         else:
@@ -316,7 +371,7 @@ async def search_by_query_seq_v2_(
         )
 
         db.add(insert_prompt_location)
-        db.commit()
+        await db.commit()
 
     if results == []:
         raise LocationNotFoundException()
@@ -353,12 +408,13 @@ async def search_by_query_seq_v2_(
         route_longitudes=[c["longitude"] for c in route_coordinates],
         instructions=instructions,
         duration=duration,
+        route_geom=route_linestring(route_coordinates),
         created_at=prompt.created_at
     )
 
     db.add(insert_route)
-    db.commit()
-    db.refresh(insert_route)
+    await db.commit()
+    await db.refresh(insert_route)
 
     insert_prompt_route = models.Prompt_Route(
         prompt_id=prompt.prompt_id,
@@ -366,7 +422,7 @@ async def search_by_query_seq_v2_(
         route_id=insert_route.route_id
     )
     db.add(insert_prompt_route)
-    db.commit()
+    await db.commit()
 
     out = schemas.RouteOutV2.from_orm(insert_route)
 
@@ -378,7 +434,7 @@ async def search_by_query_seq_v2_(
 async def search_by_query_seq_v2(
         request: Request,
         querys: schemas.RouteQueryV2,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_search_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)):
     """
     Search for a route based on user queries, negative queries,
@@ -448,7 +504,8 @@ async def get_route_image_name(
 async def search_by_query_seq_v3(
         request: Request,
         querys: schemas.RouteQueryV2,
-        db: Session = Depends(get_db),
+        background_tasks: BackgroundTasks,
+        db: AsyncSession = Depends(get_async_search_db),
         r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)):
     """
@@ -474,30 +531,39 @@ async def search_by_query_seq_v3(
     Returns:
     - schemas.RouteOutV2: The resulting route including route ID,
       locations, route coordinates, instructions, and duration.
+
+    Note:
+    - The route instructions are translated into the supported languages
+      in the background, starting with the requested language.
     """
 
     if querys.language != 'en-AU':
-        querys_text_pos = '_'.join(querys.query)
-        querys_text_neg = '_'.join(querys.negative_query)
-        querys_input = querys_text_pos + '|' + querys_text_neg
-        translated_querys = translation.translate_text(
-            querys_input,
-            'en-AU'
+        translated_querys = await translation.translate_texts(
+            querys.query + querys.negative_query,
+            'en-AU',
+            db
         )
 
-        translated_text_pos, translated_text_neg = translated_querys.split('|')
-
-        querys.query = translated_text_pos.split('_')
-        querys.negative_query = translated_text_neg.split('_')
+        querys.query = translated_querys[:len(querys.query)]
+        querys.negative_query = translated_querys[len(querys.query):]
 
     out = await search_by_query_seq_v2_(querys, db, current_user)
 
     await r.set(
-        f"route_instructions:{out.route_id}",
+        route_instructions_key(out.route_id),
         "_".join(out.instructions),
         ex=3600
     )
 
+    languages = sorted(
+        SUPPORTED_LANGUAGES, key=lambda language: language != querys.language)
+    background_tasks.add_task(
+        pretranslate_route_instructions,
+        out.route_id,
+        out.instructions,
+        languages
+    )
+
     idx = random.randint(0, len(querys.query)-1)
 
     route_image_name = await get_route_image_name(
@@ -512,7 +578,7 @@ async def search_by_query_seq_v3(
     )
 
     db.add(to_insert)
-    db.commit()
+    await db.commit()
 
     out_v3 = schemas.RouteOutV3(
         **out.model_dump(),
@@ -525,6 +591,66 @@ async def search_by_query_seq_v3(
     return out_v3
 
 
+async def translate_route_instructions_(
+        route_id: int,
+        instructions: list[str],
+        language: str,
+        r: aioredis.Redis,
+        db: AsyncSession) -> list[str]:
+    """
+    Translate the instructions of a route and store them
+    in the database and Redis.
+    """
+    translated_instructions = await translate_instructions(
+        instructions,
+        language,
+        db
+    )
+
+    await db.execute(
+        insert(models.Route_Instruction_Translation)
+        .values(
+            route_id=route_id,
+            language=language,
+            instructions=translated_instructions
+        )
+        .on_conflict_do_update(
+            index_elements=["route_id", "language"],
+            set_={"instructions": translated_instructions}
+        )
+    )
+    await db.commit()
+
+    await r.set(
+        route_instructions_translated_key(route_id, language),
+        "_".join(translated_instructions),
+        ex=3600
+    )
+
+    return translated_instructions
+
+
+async def pretranslate_route_instructions(
+        route_id: int,
+        instructions: list[str],
+        languages: list[str]):
+    """
+    Background task translating the instructions of a new route
+    into each of the given languages.
+    """
+    db = AsyncSessionLocal()
+    try:
+        async with get_redis_feed_db_context() as r:
+            for language in languages:
+                await translate_route_instructions_(
+                    route_id, instructions, language, r, db)
+    except Exception:
+        logger.exception(
+            "Error translating instructions of route %d", route_id)
+    finally:
+        await db.close()
+
+
 @ router.get("/route/instructions/{route_id}/{language}/",
              response_model=schemas.Instructions)
 async def get_instruction(
@@ -532,42 +658,57 @@ async def get_instruction(
     route_id: int,
     language: str,
     r: aioredis.Redis = Depends(get_redis_feed_db),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    if language not in ['zh-CN', 'hi-IN']:
+    if language not in SUPPORTED_LANGUAGES:
         raise LanguageNotSupportedException()
 
     translated_instructions = await r.get(
-        f"route_instructions_translated:{route_id}"
+        route_instructions_translated_key(route_id, language)
     )
     if translated_instructions is not None:
         return schemas.Instructions(
             instructions=translated_instructions.split("_")
         )
 
-    instructions = await r.get(f"route_instructions:{route_id}")
+    # Translated in the background when the route was created
+    stored = (await db.execute(
+        select(models.Route_Instruction_Translation.instructions).where(
+            models.Route_Instruction_Translation.route_id == route_id,
+            models.Route_Instruction_Translation.language == language
+        )
+    )).first()
 
-    if instructions is None:
+    if stored is not None:
+        await r.set(
+            route_instructions_translated_key(route_id, language),
+            "_".join(stored[0]),
+            ex=3600
+        )
+        return schemas.Instructions(instructions=stored[0])
 
-        instructions = db.query(models.Route.instructions).filter(
-            models.Route.route_id == route_id).first()
+    instructions = await r.get(route_instructions_key(route_id))
 
-        instructions = "_".join(instructions[0])
+    if instructions is None:
+
+        instructions = (await db.execute(
+            select(models.Route.instructions).where(
+                models.Route.route_id == route_id)
+        )).first()
 
         if instructions is None:
             raise LocationNotFoundException()
 
-    translated_instructions = translation.translate_text(
-        instructions,
-        language
-    )
+        instructions = "_".join(instructions[0])
 
-    await r.set(
-        f"route_instructions_translated:{route_id}",
-        translated_instructions,
-        ex=3600
+    translated_instructions = await translate_route_instructions_(
+        route_id,
+        instructions.split("_"),
+        language,
+        r,
+        db
     )
 
     return schemas.Instructions(
-        instructions=translated_instructions.split("_")
+        instructions=translated_instructions
     )
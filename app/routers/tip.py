@@ -1,9 +1,16 @@
 from ..redis import get_redis_images_db
 from ..exceptions import ImageNotFoundException
 from ..schemas import TipImage
+from ..http_cache import (
+    STATIC_CACHE_CONTROL,
+    etag_matches,
+    not_modified_since,
+    cache_headers,
+    not_modified
+)
 from pathlib import Path
 import base64
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 import aioredis
 
 
@@ -17,6 +24,8 @@ image_path = Path(__file__).parent.parent.parent / 'data' / 'images' / 'tip'
 
 @router.get('/image/{image_name}', response_model=TipImage)
 async def get_image(
+    request: Request,
+    response: Response,
     image_name: str,
     r: aioredis.Redis = Depends(get_redis_images_db)
 ):
@@ -24,6 +33,15 @@ async def get_image(
     if not (image_path / image_name).exists():
         raise ImageNotFoundException()
 
+    # Validators of the image file, as for static files
+    stat = (image_path / image_name).stat()
+    etag = f'W/"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    if etag_matches(request, etag) or not_modified_since(
+            request, stat.st_mtime):
+        return not_modified(etag, STATIC_CACHE_CONTROL, stat.st_mtime)
+    response.headers.update(
+        cache_headers(etag, STATIC_CACHE_CONTROL, stat.st_mtime))
+
     encoded_image = await r.get(f"tip:{image_name}")
 
     if encoded_image:
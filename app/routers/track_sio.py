@@ -1,7 +1,6 @@
 from fastapi import FastAPI, APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
 import aioredis
-from ..database import get_db
+from ..database import AsyncSessionLocal
 from .. import models, schemas, oauth2
 from ..redis import redis_refresh_token_db_context, redis_room_db_context, redis_logs_db_context
 from ..loggings import log_to_redis
@@ -43,8 +42,7 @@ async def connect(sid, environ):
         await sio_server.disconnect(sid)
         return
 
-    db_gen = get_db()
-    db = next(db_gen)
+    db = AsyncSessionLocal()
 
     try:
         token_data = await oauth2.verify_access_token(token)
@@ -77,7 +75,7 @@ async def connect(sid, environ):
 
     finally:
         # Close the DB session
-        next(db_gen, None)
+        await db.close()
 
 
 @sio_server.event
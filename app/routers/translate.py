@@ -1,6 +1,10 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .. import schemas, translation
+from ..database import get_async_db
+from ..exceptions import ParametersTooLargeException
 
 
 router = APIRouter(
@@ -9,11 +13,14 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+MAX_BATCH_ITEMS = 100
+
 
 @router.post("/", response_model=schemas.TranslateRes)
 async def translate(
         request: Request,
-        query: schemas.TranslateQuery):
+        query: schemas.TranslateQuery,
+        db: AsyncSession = Depends(get_async_db)):
     """
     Translate a list of texts based on the provided query.
 
@@ -33,6 +40,85 @@ async def translate(
 
     """
 
-    translated_text = translation.translate_text(query.text)
+    translated_text = await translation.translate_text_cached(
+        query.text,
+        translation.DEFAULT_LANG,
+        db
+    )
+    await db.commit()
 
     return schemas.TranslateRes(result=translated_text)
+
+
+async def translate_batch_stream(
+        items: list[schemas.TranslateBatchItem],
+        db: AsyncSession):
+    # Indices of each distinct (language, text) pair
+    positions = {}
+    for index, item in enumerate(items):
+        positions.setdefault(item.language, {}).setdefault(
+            item.text, []).append(index)
+
+    def lines(language: str, translated: dict[str, str]):
+        for text, result in translated.items():
+            for index in positions[language][text]:
+                yield schemas.TranslateBatchRes(
+                    index=index,
+                    text=text,
+                    language=language,
+                    result=result
+                ).model_dump_json() + "\n"
+
+    # Cache hits first, empty texts need no translation
+    missing = {}
+    for language, texts in positions.items():
+        translated = await translation.get_cached_translations(
+            [text for text in texts if text], language, db)
+        if "" in texts:
+            translated[""] = ""
+
+        for line in lines(language, translated):
+            yield line
+
+        missing[language] = [
+            text for text in texts if text not in translated]
+
+    # One upstream batch per language for the misses
+    for language, texts in missing.items():
+        translated = await translation.fetch_translations(
+            texts, language, db)
+        await db.commit()
+
+        for line in lines(language, translated):
+            yield line
+
+
+@router.post("/batch/")
+async def batch_translate(
+        request: Request,
+        query: schemas.TranslateBatchQuery,
+        db: AsyncSession = Depends(get_async_db)):
+    """
+    Translate a list of texts, each into its own target language.
+
+    Args:
+    - query (schemas.TranslateBatchQuery):
+      The texts to be translated with their target languages.
+
+    Raises:
+    - ParametersTooLargeException: If more than 100 items are given.
+
+    Returns:
+    - StreamingResponse: Newline delimited JSON, one
+      schemas.TranslateBatchRes line per input item. Cached translations
+      are sent first, the rest follow as soon as they are translated,
+      so lines are not in input order.
+    """
+
+    if len(query.items) > MAX_BATCH_ITEMS:
+        raise ParametersTooLargeException()
+
+    return StreamingResponse(
+        translate_batch_stream(query.items, db),
+        media_type="application/x-ndjson"
+    )
@@ -1,13 +1,13 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Query, Request
 from fastapi.responses import HTMLResponse, PlainTextResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import aioredis
 import folium
 import tempfile
 from pathlib import Path
 from ..common import templates
-from ..database import get_db
+from ..database import get_async_db, get_async_search_db
 from ..redis import get_redis_feed_db
 from .. import schemas, oauth2, models
 
@@ -43,20 +43,20 @@ async def dashboard_ui(
         request: Request,
         query_type: str = 'top_routes',
         order_by: str = 'num_votes',
-        offset: int = 0,
-        limit: int = 2,
+        offset: int = Query(0, ge=0),
+        limit: int = Query(2, gt=0, le=50),
         r: aioredis.Redis = Depends(get_redis_feed_db),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)):
 
     if query_type == 'top_routes':
-        initial_routes = await fetch_top_routes(order_by, offset, limit, r, db, current_user)
+        initial_routes, _ = await fetch_top_routes(order_by, offset, limit, r, db, current_user)
     elif query_type == 'user_routes':
-        initial_routes = await get_routes_("all", current_user.user_id, offset, limit, db, r, current_user)
+        initial_routes, _ = await get_routes_("all", current_user.user_id, offset, limit, db, r, current_user)
     elif query_type == 'user_routes_fav':
-        initial_routes = await get_routes_("fav", current_user.user_id, offset, limit, db, r, current_user)
+        initial_routes, _ = await get_routes_("fav", current_user.user_id, offset, limit, db, r, current_user)
     elif query_type == 'user_feed_fav':
-        initial_routes = await get_routes_("feed_fav", current_user.user_id, offset, limit, db, r, current_user)
+        initial_routes, _ = await get_routes_("feed_fav", current_user.user_id, offset, limit, db, r, current_user)
     else:
         return templates.TemplateResponse("end_data.html", {"request": request})
 
@@ -72,20 +72,20 @@ async def get_top_routes_htmx(
         request: Request,
         query_type: str = 'top_routes',
         order_by: str = 'num_votes',
-        offset: int = 0,
-        limit: int = 2,
+        offset: int = Query(0, ge=0),
+        limit: int = Query(2, gt=0, le=50),
         r: aioredis.Redis = Depends(get_redis_feed_db),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)):
 
     if query_type == 'top_routes':
-        routes = await fetch_top_routes(order_by, offset, limit, r, db, current_user)
+        routes, _ = await fetch_top_routes(order_by, offset, limit, r, db, current_user)
     elif query_type == 'user_routes':
-        routes = await get_routes_("all", current_user.user_id, offset, limit, db, r, current_user)
+        routes, _ = await get_routes_("all", current_user.user_id, offset, limit, db, r, current_user)
     elif query_type == 'user_routes_fav':
-        routes = await get_routes_("fav", current_user.user_id, offset, limit, db, r, current_user)
+        routes, _ = await get_routes_("fav", current_user.user_id, offset, limit, db, r, current_user)
     elif query_type == 'user_feed_fav':
-        routes = await get_routes_("feed_fav", current_user.user_id, offset, limit, db, r, current_user)
+        routes, _ = await get_routes_("feed_fav", current_user.user_id, offset, limit, db, r, current_user)
     else:
         return templates.TemplateResponse("end_data.html", {"request": request})
 
@@ -143,7 +143,7 @@ async def create_map(route: schemas.RouteOutV2):
 async def search_by_query_seq_v2_map(
         request: Request,
         querys: schemas.RouteQueryV2,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_search_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)
 ):
     route = await search_by_query_seq_v2_(querys, db, current_user)
@@ -155,7 +155,7 @@ async def search_by_query_seq_v2_map(
 async def get_route_map(
         request: Request,
         route_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)
 ):
@@ -168,14 +168,15 @@ async def get_route_map(
 async def add_vote(
         request: Request,
         route_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)
 ):
     await add_vote_(route_id, db, r, current_user)
 
-    num_votes = db.query(func.count(models.User_Route_Vote.route_id)).filter(
-        models.User_Route_Vote.route_id == route_id).scalar()
+    num_votes = await db.scalar(
+        select(models.Route.num_votes)
+        .where(models.Route.route_id == route_id))
 
     return num_votes
 
@@ -184,14 +185,15 @@ async def add_vote(
 async def remove_vote(
         request: Request,
         route_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)
 ):
     await remove_vote_(route_id, db, r, current_user)
 
-    num_votes = db.query(func.count(models.User_Route_Vote.route_id)).filter(
-        models.User_Route_Vote.route_id == route_id).scalar()
+    num_votes = await db.scalar(
+        select(models.Route.num_votes)
+        .where(models.Route.route_id == route_id))
 
     return num_votes
 
@@ -200,7 +202,7 @@ async def remove_vote(
 async def publish_route(
         request: Request,
         route_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)
 ):
@@ -212,7 +214,7 @@ async def publish_route(
 @router.get("/challenges/")
 async def challenges(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     r: aioredis.Redis = Depends(get_redis_feed_db),
     current_user: schemas.User = Depends(oauth2.get_current_user)
 ):
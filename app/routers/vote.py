@@ -1,57 +1,326 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+import logging
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text, select, update, delete, literal, exists
+from sqlalchemy.dialects.postgresql import insert
 import aioredis
+import asyncio
+from typing import Dict, List, Optional, Set, Tuple
 from .. import schemas, models, oauth2
-from ..database import get_db
-from ..redis import get_redis_feed_db, async_retry
-from ..exceptions import RouteNotFoundException, AlreadyVotedException, VoteNotFoundException
+from ..config import settings
+from ..database import get_async_db, AsyncSessionLocal
+from ..redis import (
+    get_redis_feed_db,
+    get_redis_feed_db_context,
+    acquire_lease,
+    async_retry
+)
+from ..invalidation import (
+    invalidate,
+    user_votes_key,
+    user_votes_version_key
+)
+from ..feed import (
+    ROUTES_FEED,
+    ROUTES_FEED_CREATED_AT,
+    ROUTES_FEED_HOT,
+    FEED_EPOCH,
+    HOT_DECAY,
+    UPDATE_ROUTE_VOTES_SCRIPT
+)
+from ..exceptions import (
+    RouteNotFoundException,
+    AlreadyVotedException,
+    VoteNotFoundException,
+    ParametersTooLargeException
+)
+
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix='/vote',
     tags=["Vote"]
 )
 
+USER_VOTES_EXPIRY = 86400  # 1 day in seconds
+# Member marking a loaded voted-set, route ids start at 1
+USER_VOTES_SENTINEL = 0
+MAX_BULK_VOTES = 100
+
 
-@async_retry()
 async def increment_route_votes_in_redis(route_id: int, r: aioredis.Redis):
-    await r.zincrby('routes_feed', 1, route_id)
+    await update_route_votes_in_redis({route_id: 1}, r)
 
 
-@async_retry()
 async def decrement_route_votes_in_redis(route_id: int, r: aioredis.Redis):
-    await r.zincrby('routes_feed', -1, route_id)
+    await update_route_votes_in_redis({route_id: -1}, r)
+
+
+@async_retry()
+async def update_route_votes_in_redis(
+        changes: Dict[int, int],
+        r: aioredis.Redis):
+    """
+    Apply vote count changes to the feed ZSETs. Only routes already
+    published are updated, the hot score is recomputed from the new
+    vote count in the same script.
+    """
+    update_script = r.register_script(UPDATE_ROUTE_VOTES_SCRIPT)
+
+    async with r.pipeline(transaction=False) as pipe:
+        for route_id, change in changes.items():
+            await update_script(
+                keys=[ROUTES_FEED, ROUTES_FEED_CREATED_AT, ROUTES_FEED_HOT],
+                args=[route_id, change, FEED_EPOCH, HOT_DECAY],
+                client=pipe
+            )
+        await pipe.execute()
+
+
+def insert_votes_statement(user_id: int, route_ids: List[int]):
+    """
+    Insert the votes of a user for the existing routes among route_ids and
+    increment their vote counts, in one statement.
+    Returns the ids of the routes actually voted for.
+    """
+    inserted = (
+        insert(models.User_Route_Vote)
+        .from_select(
+            ["user_id", "route_id"],
+            select(literal(user_id), models.Route.route_id)
+            .where(models.Route.route_id.in_(route_ids))
+        )
+        .on_conflict_do_nothing()
+        .returning(models.User_Route_Vote.route_id)
+        .cte("inserted")
+    )
+
+    return (
+        update(models.Route)
+        .where(models.Route.route_id == inserted.c.route_id)
+        .values(num_votes=models.Route.num_votes + 1)
+        .returning(models.Route.route_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def delete_votes_statement(user_id: int, route_ids: List[int]):
+    """
+    Delete the votes of a user for route_ids and decrement the vote counts
+    of the routes, in one statement.
+    Returns the ids of the routes actually unvoted.
+    """
+    deleted = (
+        delete(models.User_Route_Vote)
+        .where(
+            models.User_Route_Vote.user_id == user_id,
+            models.User_Route_Vote.route_id.in_(route_ids)
+        )
+        .returning(models.User_Route_Vote.route_id)
+        .cte("deleted")
+    )
+
+    return (
+        update(models.Route)
+        .where(models.Route.route_id == deleted.c.route_id)
+        .values(num_votes=models.Route.num_votes - 1)
+        .returning(models.Route.route_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def route_exists(route_id: int, db: AsyncSession) -> bool:
+    return await db.scalar(
+        select(exists().where(models.Route.route_id == route_id))
+    )
+
+
+def user_votes_statement(user_id: int):
+    """
+    Ids of the routes a user voted for.
+    """
+    return (
+        select(models.User_Route_Vote.route_id)
+        .where(models.User_Route_Vote.user_id == user_id)
+    )
+
+
+async def load_user_votes(
+        user_id: int,
+        r: aioredis.Redis,
+        db: AsyncSession) -> Optional[Set[int]]:
+    """
+    Load the ids of the routes a user voted for into the user_votes set.
+
+    The set is not written when the user's votes were invalidated while
+    they were read, it would miss the new vote until it expires. The next
+    read loads it again.
+
+    Returns the ids read from the database, None when the set was
+    already loaded.
+    """
+    if await r.exists(user_votes_key(user_id)):
+        return None
+
+    version_key = user_votes_version_key(user_id)
+    version = await r.get(version_key)
+
+    route_ids = set(
+        (await db.execute(user_votes_statement(user_id))).scalars().all())
+
+    async with r.pipeline(transaction=True) as pipe:
+        await pipe.watch(version_key)
+        if await pipe.get(version_key) != version:
+            return route_ids
+
+        pipe.multi()
+        pipe.sadd(user_votes_key(user_id), USER_VOTES_SENTINEL, *route_ids)
+        pipe.expire(user_votes_key(user_id), USER_VOTES_EXPIRY)
+        try:
+            await pipe.execute()
+        except aioredis.WatchError:
+            pass
+
+    return route_ids
+
+
+async def get_vote_details(
+        route_ids: List[int],
+        user_id: int,
+        r: aioredis.Redis,
+        db: AsyncSession) -> List[Tuple[int, int, bool]]:
+    """
+    Get the number of votes of each route and whether the user voted for it,
+    from the materialised vote counts and the user's voted-set.
+    """
+    if not route_ids:
+        return []
+
+    num_votes = dict((await db.execute(
+        select(models.Route.route_id, models.Route.num_votes)
+        .where(models.Route.route_id.in_(route_ids))
+    )).all())
+
+    loaded = await load_user_votes(user_id, r, db)
+    if loaded is not None:
+        voted = [int(route_id) in loaded for route_id in route_ids]
+    else:
+        async with r.pipeline(transaction=False) as pipe:
+            for route_id in route_ids:
+                pipe.sismember(user_votes_key(user_id), route_id)
+            voted = await pipe.execute()
+
+    return [
+        (int(route_id), num_votes[int(route_id)], bool(voted_by_user))
+        for route_id, voted_by_user in zip(route_ids, voted)
+        if int(route_id) in num_votes
+    ]
+
+
+async def bulk_vote_(
+        votes: List[schemas.VoteIn],
+        db: AsyncSession,
+        r: aioredis.Redis,
+        current_user: schemas.User
+) -> List[schemas.VoteBulkOut]:
+    if len(votes) > MAX_BULK_VOTES:
+        raise ParametersTooLargeException()
+
+    # The last operation on a route wins
+    final_votes = {vote.route_id: vote.vote for vote in votes}
+    to_vote = [
+        route_id for route_id, vote in final_votes.items() if vote]
+    to_unvote = [
+        route_id for route_id, vote in final_votes.items() if not vote]
+
+    voted, unvoted = set(), set()
+    if to_vote:
+        voted = set(await db.scalars(
+            insert_votes_statement(current_user.user_id, to_vote)))
+    if to_unvote:
+        unvoted = set(await db.scalars(
+            delete_votes_statement(current_user.user_id, to_unvote)))
+    existing = set(await db.scalars(
+        select(models.Route.route_id)
+        .where(models.Route.route_id.in_(list(final_votes)))
+    ))
+    await db.commit()
+
+    changes = {route_id: 1 for route_id in voted}
+    changes.update({route_id: -1 for route_id in unvoted})
+    if changes:
+        await invalidate([("user_votes", current_user.user_id)], r)
+        await update_route_votes_in_redis(changes, r)
+
+    results = []
+    for route_id, vote in final_votes.items():
+        if route_id not in existing:
+            status = "not_found"
+        elif route_id in changes:
+            status = "voted" if vote else "unvoted"
+        else:
+            status = "unchanged"
+
+        results.append(schemas.VoteBulkOut(
+            route_id=route_id, vote=vote, status=status))
+
+    return results
+
+
+@router.post("/bulk/", response_model=list[schemas.VoteBulkOut])
+async def bulk_vote(
+        votes: schemas.VoteBulkIn,
+        db: AsyncSession = Depends(get_async_db),
+        r: aioredis.Redis = Depends(get_redis_feed_db),
+        current_user: schemas.User = Depends(oauth2.get_current_user)
+):
+    """
+    Apply a list of vote and unvote operations in one transaction,
+    for clients syncing votes made offline.
+
+    Args:
+    - votes (schemas.VoteBulkIn): The operations, `vote` is true to vote
+      for the route and false to remove the vote.
+      When a route appears more than once, its last operation wins.
+    - Logged in required: The user must be logged in to vote.
+
+    Raises:
+    - ParametersTooLargeException: If more than 100 operations are given.
+
+    Returns:
+    - list[schemas.VoteBulkOut]: The outcome for each route, with status
+      `voted`, `unvoted`, `unchanged` if the vote was already in that state,
+      or `not_found` if the route does not exist.
+    """
+
+    return await bulk_vote_(votes.votes, db, r, current_user)
 
 
 async def add_vote_(
     route_id: int,
-    db: Session,
+    db: AsyncSession,
     r: aioredis.Redis,
     current_user: schemas.User
 ):
-    if db.query(models.Route).filter(models.Route.route_id == route_id).first() is None:
-        raise RouteNotFoundException()
+    voted = (await db.execute(
+        insert_votes_statement(current_user.user_id, [route_id])
+    )).first()
+    await db.commit()
 
-    found_vote = db.query(models.User_Route_Vote).filter(
-        models.User_Route_Vote.user_id == current_user.user_id,
-        models.User_Route_Vote.route_id == route_id
-    ).first()
-
-    if found_vote:
+    if voted is None:
+        # Nothing changed, find out why
+        if not await route_exists(route_id, db):
+            raise RouteNotFoundException()
         raise AlreadyVotedException()
 
-    new_vote = models.User_Route_Vote(
-        user_id=current_user.user_id,
-        route_id=route_id
-    )
-    db.add(new_vote)
-    db.commit()
-
+    await invalidate([("user_votes", current_user.user_id)], r)
     await increment_route_votes_in_redis(route_id, r)
 
 
 @router.post("/{route_id}/", status_code=201)
 async def add_vote(
         route_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)
 ):
@@ -80,32 +349,29 @@ async def add_vote(
 
 async def remove_vote_(
         route_id: int,
-        db: Session,
+        db: AsyncSession,
         r: aioredis.Redis,
         current_user: schemas.User
 ):
-    if db.query(models.Route).filter(models.Route.route_id == route_id).first() is None:
-        raise RouteNotFoundException()
-
-    vote_query = db.query(models.User_Route_Vote).filter(
-        models.User_Route_Vote.user_id == current_user.user_id,
-        models.User_Route_Vote.route_id == route_id
-    )
-    found_vote = vote_query.first()
+    unvoted = (await db.execute(
+        delete_votes_statement(current_user.user_id, [route_id])
+    )).first()
+    await db.commit()
 
-    if not found_vote:
+    if unvoted is None:
+        # Nothing changed, find out why
+        if not await route_exists(route_id, db):
+            raise RouteNotFoundException()
         raise VoteNotFoundException()
 
-    vote_query.delete(synchronize_session=False)
-    db.commit()
-
+    await invalidate([("user_votes", current_user.user_id)], r)
     await decrement_route_votes_in_redis(route_id, r)
 
 
 @router.delete("/{route_id}/", status_code=204)
 async def delete_vote(
         route_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         r: aioredis.Redis = Depends(get_redis_feed_db),
         current_user: schemas.User = Depends(oauth2.get_current_user)
 ):
@@ -129,3 +395,84 @@ async def delete_vote(
         "type": "unvoted",
         "msg": "Route Unfavourited"
     }}
+
+
+# Routes of a batch, locked so that no vote for them is in flight
+LOCK_ROUTES_BATCH_SQL = text("""
+    SELECT route_id FROM routes
+    WHERE route_id > :after
+    ORDER BY route_id
+    LIMIT :batch_size
+    FOR UPDATE
+""")
+
+# Run after LOCK_ROUTES_BATCH_SQL, its snapshot includes every vote for
+# the locked routes
+RECONCILE_VOTE_COUNTS_SQL = text("""
+    UPDATE routes SET num_votes = counts.num_votes
+    FROM (
+        SELECT routes.route_id, (
+            SELECT count(*) FROM user_route_votes
+            WHERE user_route_votes.route_id = routes.route_id
+        ) AS num_votes
+        FROM routes
+        WHERE routes.route_id = ANY(:route_ids)
+    ) AS counts
+    WHERE routes.route_id = counts.route_id
+    AND routes.num_votes <> counts.num_votes
+""")
+
+
+async def reconcile_vote_counts() -> int:
+    """
+    Repair drift between routes.num_votes and user_route_votes,
+    in batches of VOTE_RECONCILE_BATCH_SIZE routes.
+    Returns the number of routes fixed.
+
+    The vote counts of the feed ZSETs are not reconciled: votes update
+    them after their transaction commits, so a count read from Redis
+    cannot be told apart from one with votes in flight.
+    """
+    fixed = 0
+    after = 0
+
+    async with AsyncSessionLocal() as db:
+        db.info["statement_timeout"] = (
+            settings.VOTE_RECONCILE_STATEMENT_TIMEOUT)
+
+        while True:
+            route_ids = (await db.scalars(LOCK_ROUTES_BATCH_SQL, {
+                "after": after,
+                "batch_size": settings.VOTE_RECONCILE_BATCH_SIZE
+            })).all()
+            if not route_ids:
+                break
+
+            result = await db.execute(
+                RECONCILE_VOTE_COUNTS_SQL, {"route_ids": route_ids})
+            await db.commit()
+
+            fixed += result.rowcount
+            after = route_ids[-1]
+
+    return fixed
+
+
+async def reconcile_vote_counts_periodically():
+    """
+    Background task reconciling the materialised vote counts,
+    in the worker holding the vote_reconcile lease.
+    """
+    while True:
+        try:
+            async with get_redis_feed_db_context() as r:
+                leased = await acquire_lease(
+                    r, "vote_reconcile", 2 * settings.VOTE_RECONCILE_INTERVAL)
+            if leased:
+                fixed = await reconcile_vote_counts()
+                if fixed:
+                    logger.info("Reconciled vote counts of %d routes", fixed)
+        except Exception:
+            logger.exception("Error reconciling vote counts")
+
+        await asyncio.sleep(settings.VOTE_RECONCILE_INTERVAL)
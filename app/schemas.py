@@ -128,6 +128,19 @@ class RouteOutV3(RouteOutV2):
             negative_query=negative_query
         )
 
+    @classmethod
+    def from_cache(cls, route: dict) -> "RouteOutV3":
+        """
+        Build a route from its cached JSON without validating it again,
+        as it was dumped from a validated route, see route_cache.py.
+        """
+        created_at = route["created_at"]
+        if isinstance(created_at, str):
+            route["created_at"] = datetime.fromisoformat(
+                created_at.replace("Z", "+00:00"))
+
+        return cls.model_construct(**route)
+
 
 class RouteVoteOut(BaseModel):
     route: RouteOutV3
@@ -140,6 +153,43 @@ class RouteVoteOutUser(BaseModel):
     voted_by_user: bool
 
 
+class RouteSummaryOut(BaseModel):
+    route_id: int
+    locations: list[str]
+    duration: float
+    created_at: datetime
+    route_image_name: str
+    location_type: list[str]
+    query: list[str]
+
+
+class RouteVoteSummaryOutUser(BaseModel):
+    route: RouteSummaryOut
+    num_votes: int
+    voted_by_user: bool
+
+
+class RouteBatchIn(BaseModel):
+    route_ids: list[int]
+
+
+class RouteBatchItem(BaseModel):
+    found: bool
+    route: Optional[RouteOutV3] = None
+    num_votes: Optional[int] = None
+    voted_by_user: Optional[bool] = None
+
+
+class RouteBatchOut(BaseModel):
+    routes: dict[int, RouteBatchItem]
+
+
+class RouteGeometryOut(BaseModel):
+    route_id: int
+    locations_coordinates: list[dict[str, float]]
+    route: list[dict[str, float]]
+
+
 class UserOut(BaseModel):
     user_id: int
     username: str
@@ -264,11 +314,45 @@ class TranslateRes(BaseModel):
     result: str
 
 
+class TranslateBatchItem(BaseModel):
+    text: constr(max_length=50)
+    language: str = "en-AU"
+
+    @field_validator('language')
+    def check_language(cls, v):
+        allowed_languages = ['en-AU', 'zh-CN', 'hi-IN']
+        if v not in allowed_languages:
+            raise ValueError(
+                f'language must be one of {allowed_languages}')
+        return v
+
+
+class TranslateBatchQuery(BaseModel):
+    items: list[TranslateBatchItem]
+
+
+class TranslateBatchRes(BaseModel):
+    index: int
+    text: str
+    language: str
+    result: str
+
+
 class VoteIn(BaseModel):
     route_id: int
     vote: bool
 
 
+class VoteBulkIn(BaseModel):
+    votes: list[VoteIn]
+
+
+class VoteBulkOut(BaseModel):
+    route_id: int
+    vote: bool
+    status: str
+
+
 class TrackRoomOut(BaseModel):
     room_id: str
 
@@ -1,6 +1,17 @@
 import os
+import asyncio
+import hashlib
 from pathlib import Path
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
 from google.cloud import translate_v2 as translate
+
+from . import models
+from .config import settings
+from .redis import redis_translation_db
 # https://cloud.google.com/translate/docs/basic/translating-text#translate_translate_text-python
 
 parent_path = Path(__file__).parent.parent
@@ -17,14 +28,195 @@ LANG_DICT = {
     "hi-IN": "hi"
 }
 
+TRANSLATION_CACHE_PREFIX = "translation"
+# Google Translate accepts at most 128 segments per request
+TRANSLATE_BATCH_SIZE = 100
+
+# Translations inserted in a session, cached once the session commits
+PENDING_TRANSLATIONS = "pending_translations"
+# Keeps the caching tasks alive until they are done
+_cache_tasks = set()
+
+
+def translate_batch(texts: list[str], target: str) -> list[str]:
+    """
+    Translate a list of texts with as few Google Translate calls as possible.
+    """
+    translated = []
+    for i in range(0, len(texts), TRANSLATE_BATCH_SIZE):
+        results = translate_client.translate(
+            texts[i:i+TRANSLATE_BATCH_SIZE], target_language=target)
+        translated.extend(result["translatedText"] for result in results)
+
+    return translated
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def translation_cache_key(hash_: str, target: str) -> str:
+    return f"{TRANSLATION_CACHE_PREFIX}:{target}:{hash_}"
+
+
+async def get_cached_translations(
+        texts: list[str],
+        target_language: str,
+        db: AsyncSession) -> dict[str, str]:
+    """
+    Look up translations in the Redis cache, then the translations table.
+
+    Returns a dictionary of the texts found, database hits are written
+    back to Redis.
+    """
+    target = LANG_DICT[target_language]
+    if not texts:
+        return {}
+
+    hashes = {text: text_hash(text) for text in texts}
+    translated = {}
+
+    cached = await redis_translation_db().mget(
+        [translation_cache_key(hashes[text], target) for text in texts]
+    )
+    for text, cached_text in zip(texts, cached):
+        if cached_text is not None:
+            translated[text] = cached_text
+
+    missing = [text for text in texts if text not in translated]
+    if not missing:
+        return translated
+
+    stored = await db.execute(
+        select(
+            models.Translation.text_hash,
+            models.Translation.translated_text
+        )
+        .where(
+            models.Translation.target_language == target,
+            models.Translation.text_hash.in_(
+                [hashes[text] for text in missing])
+        )
+    )
+    stored = dict(stored.all())
+
+    to_cache = {
+        text: stored[hashes[text]]
+        for text in missing if hashes[text] in stored
+    }
+    await cache_translations(to_cache, target)
+    translated.update(to_cache)
+
+    return translated
 
-def translate_text(text: str, target_language: str = DEFAULT_LANG) -> dict:
 
-    if isinstance(text, bytes):
-        text = text.decode("utf-8")
+async def fetch_translations(
+        texts: list[str],
+        target_language: str,
+        db: AsyncSession) -> dict[str, str]:
+    """
+    Translate texts with Google Translate and store the results
+    in the translations table and Redis.
 
+    The translations are inserted in the session of the caller, which
+    commits them with the rest of its work. They are cached in Redis only
+    once that commit succeeds, see cache_committed_translations, so a
+    rolled back request leaves no cached translation without its row.
+    """
     target = LANG_DICT[target_language]
+    if not texts:
+        return {}
+
+    # The Google client is blocking, keep it off the event loop
+    results = await run_in_threadpool(translate_batch, texts, target)
+    translated = dict(zip(texts, results))
+
+    await db.execute(
+        insert(models.Translation)
+        .values([
+            {
+                "text_hash": text_hash(text),
+                "target_language": target,
+                "source_text": text,
+                "translated_text": result
+            }
+            for text, result in translated.items()
+        ])
+        .on_conflict_do_nothing()
+    )
+    db.info.setdefault(PENDING_TRANSLATIONS, []).append((translated, target))
+
+    return translated
+
+
+@event.listens_for(Session, "after_commit")
+def cache_committed_translations(session):
+    """
+    Cache the translations fetched in a session once they are committed.
+    """
+    for translated, target in session.info.pop(PENDING_TRANSLATIONS, []):
+        task = asyncio.get_running_loop().create_task(
+            cache_translations(translated, target))
+        _cache_tasks.add(task)
+        task.add_done_callback(_cache_tasks.discard)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def drop_rolled_back_translations(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_TRANSLATIONS, None)
+
+
+async def cache_translations(translated: dict[str, str], target: str):
+    if not translated:
+        return
+
+    async with redis_translation_db().pipeline(transaction=False) as pipe:
+        for text, result in translated.items():
+            pipe.set(
+                translation_cache_key(text_hash(text), target),
+                result,
+                ex=settings.TRANSLATION_CACHE_EXPIRY
+            )
+        await pipe.execute()
+
+
+async def translate_texts(
+        texts: list[str],
+        target_language: str,
+        db: AsyncSession) -> list[str]:
+    """
+    Translate a list of texts, going through the Redis cache,
+    then the translations table, then Google Translate.
+
+    Args:
+    - texts (list[str]): The texts to translate. Repeated texts are
+      translated once and empty texts are returned unchanged.
+    - target_language (str): One of the languages in LANG_DICT.
+    - db (AsyncSession): The database session, new translations are
+      added to it for the caller to commit.
+
+    Returns:
+    - list[str]: The translated texts, in the same order as the input.
+    """
+    unique_texts = list(dict.fromkeys(text for text in texts if text))
+
+    translated = await get_cached_translations(
+        unique_texts, target_language, db)
+
+    missing = [text for text in unique_texts if text not in translated]
+    translated.update(
+        await fetch_translations(missing, target_language, db)
+    )
+
+    return [translated[text] if text else text for text in texts]
+
 
-    result = translate_client.translate(text, target_language=target)
+async def translate_text_cached(
+        text: str,
+        target_language: str,
+        db: AsyncSession) -> str:
+    """Cached translation of a single text, see translate_texts."""
+    translated = await translate_texts([text], target_language, db)
 
-    return result["translatedText"]
+    return translated[0]
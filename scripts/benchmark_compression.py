@@ -0,0 +1,108 @@
+import gzip
+import zlib
+from timeit import timeit
+import orjson
+from sqlalchemy.orm import joinedload, selectinload
+
+from app import models
+from app.compression import SplicedJSON, deflate_chunk
+from app.database import SessionLocal
+from app.schemas import RouteOutV3
+from .benchmark_route_cache import make_route
+
+# CPU cost against bytes saved of gzip compressing route payloads,
+# and of a page of routes compressed per response or spliced from the
+# deflate chunks cached in the L1, see compression.SplicedJSON.
+# Uses the latest routes of the database, or generated routes without any.
+# Run from the repository root: python -m scripts.benchmark_compression
+
+NUM_ROUTES = 50
+PAGE_SIZE = 10
+LEVELS = [1, 5, 6, 9]
+NUMBER = 50
+
+
+def load_payloads() -> list[bytes]:
+    db = SessionLocal()
+    try:
+        route_objs = (
+            db.query(models.Route)
+            .options(
+                joinedload(models.Route.image),
+                selectinload(models.Route.prompts)
+            )
+            .filter(models.Route.image.has())
+            .order_by(models.Route.route_id.desc())
+            .limit(NUM_ROUTES)
+            .all()
+        )
+        # As serialised by routers.route.serialize_route
+        payloads = [
+            orjson.dumps(
+                RouteOutV3.from_orm(route_obj).model_dump(),
+                option=orjson.OPT_UTC_Z)
+            for route_obj in route_objs
+        ]
+    finally:
+        db.close()
+
+    if not payloads:
+        print("No routes in the database, using generated routes")
+        payloads = [
+            orjson.dumps(make_route(num_points))
+            for num_points in (100, 500, 2000) * (NUM_ROUTES // 3)
+        ]
+
+    return payloads
+
+
+def main():
+    payloads = load_payloads()
+    total = sum(len(payload) for payload in payloads)
+    print(f"{len(payloads)} routes, {total / len(payloads):.0f} bytes on "
+          f"average\n")
+
+    print(f"{'level':>5} {'ratio':>6} {'us/route':>9} {'MB/s':>7}")
+    for level in LEVELS:
+        compressed = sum(
+            len(gzip.compress(payload, level)) for payload in payloads)
+        seconds = timeit(
+            lambda: [deflate_chunk(payload, level) for payload in payloads],
+            number=NUMBER) / NUMBER
+        print(f"{level:>5} {compressed / total:>6.3f} "
+              f"{1e6 * seconds / len(payloads):>9.1f} "
+              f"{total / seconds / 1e6:>7.1f}")
+
+    page = payloads[:PAGE_SIZE]
+    # As rendered by routers.route.render_route_votes
+    body = SplicedJSON()
+    body.add(b'[')
+    for route_id, payload in enumerate(page):
+        body.add(b',{"route":' if route_id else b'{"route":')
+        body.add(payload, route_id)
+        body.add(b',"num_votes":3,"voted_by_user":false}')
+    body.add(b']')
+    chunks = {
+        route_id: deflate_chunk(payload)
+        for route_id, payload in enumerate(page)
+    }
+    rendered = body.render()
+    spliced = body.gzip(lambda route_id, _: chunks[route_id])
+    assert zlib.decompress(spliced, 16 + zlib.MAX_WBITS) == rendered
+
+    per_response = timeit(
+        lambda: zlib.compress(body.render(), 5), number=NUMBER) / NUMBER
+    from_chunks = timeit(
+        lambda: body.gzip(lambda route_id, _: chunks[route_id]),
+        number=NUMBER) / NUMBER
+    whole = len(gzip.compress(rendered, 5))
+
+    print(f"\npage of {len(page)} routes, {len(rendered)} bytes")
+    print(f"{'mode':>12} {'bytes':>8} {'us':>9}")
+    print(f"{'identity':>12} {len(rendered):>8} {0:>9.1f}")
+    print(f"{'per request':>12} {whole:>8} {1e6 * per_response:>9.1f}")
+    print(f"{'spliced':>12} {len(spliced):>8} {1e6 * from_chunks:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import asyncio
+from time import perf_counter
+from sqlalchemy import text
+
+from app.database import SessionLocal, AsyncSessionLocal, async_engine
+
+# Throughput of fast requests while slow requests are in flight, with the
+# blocking Session the routers used to query on the event loop and with
+# the AsyncSession they use now. Fast requests arrive at a steady
+# FAST_RATE, their latency is measured from their arrival.
+# Run from the repository root: python -m scripts.benchmark_db_concurrency
+
+FAST_QUERY = text("SELECT 1")
+# Stands in for a slow vector search
+SLOW_QUERY = text("SELECT pg_sleep(:seconds)")
+SLOW_SECONDS = 0.5
+
+FAST_REQUESTS = 200
+FAST_RATE = 200
+SLOW_REQUESTS = 4
+CONCURRENCY = 20
+
+
+async def sync_request(query, params: dict):
+    db = SessionLocal()
+    try:
+        db.execute(query, params)
+    finally:
+        db.close()
+
+
+async def async_request(query, params: dict):
+    async with AsyncSessionLocal() as db:
+        await db.execute(query, params)
+
+
+async def run(request) -> tuple[float, list[float]]:
+    """
+    Returns the total time and the latencies of the fast requests.
+    """
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+
+    async def fast(arrival: float):
+        await asyncio.sleep(arrival - perf_counter())
+        async with semaphore:
+            await request(FAST_QUERY, {})
+        # Including the time spent waiting for the event loop
+        latencies.append(perf_counter() - arrival)
+
+    async def slow():
+        await request(SLOW_QUERY, {"seconds": SLOW_SECONDS})
+
+    start = perf_counter()
+    await asyncio.gather(
+        *[slow() for _ in range(SLOW_REQUESTS)],
+        *[fast(start + i / FAST_RATE) for i in range(FAST_REQUESTS)]
+    )
+    return perf_counter() - start, sorted(latencies)
+
+
+async def main():
+    print(f"{FAST_REQUESTS} fast requests at {FAST_RATE}/s, "
+          f"{SLOW_REQUESTS} slow requests of {SLOW_SECONDS}s, "
+          f"{CONCURRENCY} fast requests at a time\n")
+    print(f"{'session':>8} {'total s':>8} {'fast/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8}")
+
+    for name, request in (("sync", sync_request), ("async", async_request)):
+        # Warm up the connection pool
+        await request(FAST_QUERY, {})
+
+        total, latencies = await run(request)
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[int(len(latencies) * 0.95)]
+        print(f"{name:>8} {total:>8.2f} {FAST_REQUESTS / total:>8.0f} "
+              f"{1e3 * p50:>8.1f} {1e3 * p95:>8.1f}")
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+import asyncio
+from time import perf_counter
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app import schemas
+from app.compression import SplicedJSON
+from app.responses import FastJSONResponse
+from .benchmark_route_cache import make_route
+
+# Time to build and serialise a page of /route/feed/top_routes/ from the
+# cached route JSON:
+# - models: validated models, serialised by FastAPI into a JSONResponse
+# - models + orjson: the same with FastJSONResponse, the default response
+#   class of the app
+# - constructed: models built with model_construct, see
+#   schemas.RouteOutV3.from_cache, serialised into a FastJSONResponse
+# - spliced: the cached JSON spliced as is, as served by the endpoint
+# Run from the repository root: python -m scripts.benchmark_responses
+
+PAGE_SIZE = 10
+ROUTE_POINTS = 500
+NUMBER = 100
+
+
+def make_payloads() -> list[bytes]:
+    payloads = []
+    for route_id in range(PAGE_SIZE):
+        route = make_route(ROUTE_POINTS)
+        route["route_id"] = route_id
+        payloads.append(orjson.dumps(route))
+    return payloads
+
+
+def validated_page(payloads: list[bytes]) -> list:
+    return [
+        schemas.RouteVoteOutUser(
+            route=schemas.RouteOutV3(**orjson.loads(payload)),
+            num_votes=3,
+            voted_by_user=False
+        )
+        for payload in payloads
+    ]
+
+
+def constructed_page(payloads: list[bytes]) -> list:
+    return [
+        schemas.RouteVoteOutUser.model_construct(
+            route=schemas.RouteOutV3.from_cache(orjson.loads(payload)),
+            num_votes=3,
+            voted_by_user=False
+        )
+        for payload in payloads
+    ]
+
+
+def spliced_page(payloads: list[bytes]) -> bytes:
+    # As rendered by routers.route.render_route_votes
+    body = SplicedJSON()
+    body.add(b'[')
+    for route_id, payload in enumerate(payloads):
+        body.add(b',{"route":' if route_id else b'{"route":')
+        body.add(payload, route_id)
+        body.add(b',"num_votes":3,"voted_by_user":false}')
+    body.add(b']')
+    return body.render()
+
+
+async def main():
+    payloads = make_payloads()
+    field = create_response_field(
+        name="top_routes", type_=list[schemas.RouteVoteOutUser])
+
+    async def fastapi_response(page: list, response_class) -> bytes:
+        content = await serialize_response(field=field, response_content=page)
+        return response_class(content).body
+
+    async def models():
+        return await fastapi_response(validated_page(payloads), JSONResponse)
+
+    async def models_orjson():
+        return await fastapi_response(
+            validated_page(payloads), FastJSONResponse)
+
+    async def constructed():
+        return await fastapi_response(
+            constructed_page(payloads), FastJSONResponse)
+
+    async def spliced():
+        return spliced_page(payloads)
+
+    expected = orjson.loads(spliced_page(payloads))
+    print(f"{PAGE_SIZE} routes of {ROUTE_POINTS} points\n")
+    print(f"{'path':>16} {'bytes':>8} {'ms':>8} {'speedup':>8}")
+    baseline = None
+    for name, render in (
+            ("models", models),
+            ("models + orjson", models_orjson),
+            ("constructed", constructed),
+            ("spliced", spliced)):
+        body = await render()
+        assert len(orjson.loads(body)) == len(expected)
+
+        start = perf_counter()
+        for _ in range(NUMBER):
+            await render()
+        elapsed = (perf_counter() - start) / NUMBER
+        baseline = baseline or elapsed
+        print(f"{name:>16} {len(body):>8} {1e3 * elapsed:>8.2f} "
+              f"{baseline / elapsed:>7.1f}x")
+
+    # FastAPI without a response model, for reference
+    start = perf_counter()
+    for _ in range(NUMBER):
+        JSONResponse(jsonable_encoder(validated_page(payloads)))
+    elapsed = (perf_counter() - start) / NUMBER
+    print(f"{'jsonable_encoder':>16} {'':>8} {1e3 * elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+import random
+import zlib
+from array import array
+from datetime import datetime, timezone
+from timeit import timeit
+import orjson
+
+from app.route_codec import encode_route, route_payload
+
+# Cached size of a route, and time to turn a Redis hit into the JSON
+# served to clients, for:
+# - json: plain JSON, as cached before route_codec
+# - codec: the compressed JSON of route_codec
+# - columnar: the former version 1 of route_codec, with the coordinates
+#   as float64 columns, which had to be decoded and serialised on a hit
+# Run from the repository root: python -m scripts.benchmark_route_cache
+
+ROUTE_POINTS = [100, 500, 2000]
+NUMBER = 200
+
+
+def make_route(num_points: int) -> dict:
+    latitude, longitude = -37.81803, 144.9549
+
+    route = []
+    for _ in range(num_points):
+        latitude += random.uniform(-0.0005, 0.0005)
+        longitude += random.uniform(-0.0005, 0.0005)
+        route.append({"latitude": latitude, "longitude": longitude})
+
+    return {
+        "route_id": 1,
+        "locations": ["Melbourne Museum", "Queen Victoria Market",
+                      "State Library Victoria"],
+        "locations_coordinates": route[::num_points // 3][:3],
+        "route": route,
+        "instructions": [
+            "Head north on Swanston Street.",
+            "Turn left onto La Trobe Street.",
+            "You have arrived at your destination, on the right."
+        ] * (num_points // 30),
+        "duration": 1800.0,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "route_image_name": "museum_1.jpg",
+        "location_type": ["landmark", "restaurant", "pharmacy"],
+        "query": ["museum", "Indian", "Warehouse"],
+        "negative_query": ["Chinese", "Japanese", "Korean"],
+    }
+
+
+def columnar_route(route: dict) -> bytes:
+    meta = dict(route)
+    columns = array("d")
+    for field in ("locations_coordinates", "route"):
+        meta[field] = len(route[field])
+        columns.extend(point["latitude"] for point in route[field])
+        columns.extend(point["longitude"] for point in route[field])
+    meta = orjson.dumps(meta)
+    return zlib.compress(
+        len(meta).to_bytes(4, "little") + meta + columns.tobytes(), 6)
+
+
+def columnar_payload(data: bytes) -> bytes:
+    body = zlib.decompress(data)
+    meta_end = 4 + int.from_bytes(body[:4], "little")
+    route = orjson.loads(body[4:meta_end])
+    columns = array("d")
+    columns.frombytes(body[meta_end:])
+
+    start = 0
+    for field in ("locations_coordinates", "route"):
+        count = route[field]
+        route[field] = [
+            {"latitude": latitude, "longitude": longitude}
+            for latitude, longitude in zip(
+                columns[start:start+count],
+                columns[start+count:start+2*count])
+        ]
+        start += 2 * count
+    return orjson.dumps(route)
+
+
+def main():
+    print(f"{'points':>6} {'format':>8} {'bytes':>8} {'ratio':>6} "
+          f"{'hit us':>8}")
+
+    for num_points in ROUTE_POINTS:
+        route = make_route(num_points)
+        plain = orjson.dumps(route)
+        assert route_payload(encode_route(plain)) == plain
+        assert orjson.loads(columnar_payload(columnar_route(route))) == route
+
+        for name, data, payload in (
+                ("json", plain, route_payload),
+                ("codec", encode_route(plain), route_payload),
+                ("columnar", columnar_route(route), columnar_payload)):
+            hit_time = timeit(lambda: payload(data), number=NUMBER)
+            print(
+                f"{num_points:>6} {name:>8} {len(data):>8} "
+                f"{len(data) / len(plain):>6.2f} "
+                f"{1e6 * hit_time / NUMBER:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import asyncio
+from time import perf_counter
+from sqlalchemy import desc, event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from geoalchemy2 import WKTElement
+
+from app.database import (
+    SQLALCHEMY_ASYNC_DATABASE_URL,
+    AsyncSessionLocal,
+    async_engine
+)
+from app.routers.search import (
+    LOCATION_TYPE_MODELS,
+    LOCATION_TYPE_SEARCHES,
+    embedding_model
+)
+
+# Time per leg of a route search, for each location type:
+# - before: the search statement built for each leg with the embeddings
+#   bound as text, on an engine without the binary vector codec
+# - after: the statement of search.LOCATION_TYPE_SEARCHES, built once and
+#   executed with the embeddings bound in binary
+# The client time of a leg is the time spent until the query is sent:
+# building, compiling and binding the statement. It is measured first,
+# then the latency of the legs against the database.
+# Run from the repository root: python -m scripts.benchmark_search
+
+QUERIES = ["park", "museum", "coffee", "pharmacy", "fresh fruit"]
+LONGITUDE, LATITUDE = 144.9631, -37.8136
+DISTANCE_THRESHOLD = 5000
+SIMILARITY_THRESHOLD = 0.1
+SEARCHES = 20
+
+
+def search_before(Model, embedding, negative_embedding, seen_places):
+    # As built by routers.search.search_by_query_seq_v2_ on every leg
+    current_location = WKTElement(
+        f'POINT({LONGITUDE} {LATITUDE})', srid=4326)
+    return (
+        select(
+            Model.id.label('id'),
+            Model.name.label('name'),
+            func.st_y(Model.coord).label('latitude'),
+            func.st_x(Model.coord).label('longitude'),
+            (1-Model.embedding.cosine_distance(embedding)).label('similarity')
+        )
+        .where(func.ST_Distance(
+            func.ST_Transform(Model.coord, 3857),
+            func.ST_Transform(current_location, 3857)
+        ) < DISTANCE_THRESHOLD)
+        .where(
+            (1-Model.embedding.cosine_distance(embedding))
+            > SIMILARITY_THRESHOLD)
+        .where(
+            (1-Model.embedding.cosine_distance(negative_embedding)) < 1)
+        .where(Model.name.notin_(seen_places))
+        .order_by(desc('similarity'))
+        .limit(10)
+    )
+
+
+async def leg_before(db, location_type, embedding, negative_embedding,
+                     seen_places):
+    Model = LOCATION_TYPE_MODELS[location_type]
+    query = search_before(Model, embedding, negative_embedding, seen_places)
+    return (await db.execute(query)).all()
+
+
+async def leg_after(db, location_type, embedding, negative_embedding,
+                    seen_places):
+    return (await db.execute(LOCATION_TYPE_SEARCHES[location_type], {
+        "embedding": embedding,
+        "negative_embedding": negative_embedding,
+        "longitude": LONGITUDE,
+        "latitude": LATITUDE,
+        "distance_threshold": DISTANCE_THRESHOLD,
+        "similarity_threshold": SIMILARITY_THRESHOLD,
+        "negative_similarity_threshold": 1,
+        "seen_places": list(seen_places)
+    })).all()
+
+
+async def time_legs(session_factory, leg, location_type, embeddings,
+                    negative_embedding) -> list[float]:
+    """
+    Run SEARCHES searches of one leg per query, returns the leg latencies.
+    """
+    latencies = []
+    async with session_factory() as db:
+        for _ in range(SEARCHES):
+            seen_places = set()
+            for embedding in embeddings:
+                start = perf_counter()
+                locations = await leg(
+                    db, location_type, embedding, negative_embedding,
+                    seen_places)
+                latencies.append(perf_counter() - start)
+                if locations:
+                    seen_places.add(locations[0].name)
+
+    return sorted(latencies)
+
+
+class QuerySent(Exception):
+    """Raised in place of sending a query, see time_client."""
+
+
+def abort_before_send(conn, cursor, statement, parameters, context,
+                      executemany):
+    raise QuerySent()
+
+
+async def time_client(session_factory, engine, leg, location_type,
+                      embeddings, negative_embedding) -> list[float]:
+    """
+    Run SEARCHES searches of one leg per query, stopping each leg
+    before its query is sent, returns the client times of the legs.
+    """
+    latencies = []
+    event.listen(
+        engine.sync_engine, "before_cursor_execute", abort_before_send)
+    try:
+        async with session_factory() as db:
+            for _ in range(SEARCHES):
+                # No results without the round trip, a place is seen
+                # after every leg as in a search
+                seen_places = set()
+                for i, embedding in enumerate(embeddings):
+                    start = perf_counter()
+                    try:
+                        await leg(
+                            db, location_type, embedding,
+                            negative_embedding, seen_places)
+                    except QuerySent:
+                        pass
+                    latencies.append(perf_counter() - start)
+                    seen_places.add(f"place {i}")
+    finally:
+        event.remove(
+            engine.sync_engine, "before_cursor_execute", abort_before_send)
+
+    return sorted(latencies)
+
+
+def print_latencies(location_type: str, name: str, latencies: list[float],
+                    scale: float):
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[int(len(latencies) * 0.95)]
+    print(f"{location_type:>14} {name:>7} {scale * p50:>8.2f} "
+          f"{scale * p95:>8.2f}")
+
+
+async def main():
+    embeddings = embedding_model.encode(QUERIES)
+    negative_embedding = embedding_model.encode([""])[0]
+
+    # The engine of the app before the binary vector codec
+    text_engine = create_async_engine(SQLALCHEMY_ASYNC_DATABASE_URL)
+    TextSessionLocal = async_sessionmaker(text_engine)
+
+    paths = (
+        ("before", TextSessionLocal, text_engine, leg_before),
+        ("after", AsyncSessionLocal, async_engine, leg_after)
+    )
+
+    print(f"{SEARCHES} searches of {len(QUERIES)} legs per location type\n")
+    print("Client time per leg")
+    print(f"{'location type':>14} {'path':>7} {'p50 us':>8} {'p95 us':>8}")
+    for location_type in LOCATION_TYPE_MODELS:
+        for name, session_factory, engine, leg in paths:
+            # Warm up the connection and the statement caches
+            await time_client(
+                session_factory, engine, leg, location_type,
+                embeddings[:1], negative_embedding)
+
+            latencies = await time_client(
+                session_factory, engine, leg, location_type, embeddings,
+                negative_embedding)
+            print_latencies(location_type, name, latencies, 1e6)
+
+    print("\nLatency per leg")
+    print(f"{'location type':>14} {'path':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for location_type in LOCATION_TYPE_MODELS:
+        for name, session_factory, _, leg in paths:
+            # Warm up the connection and the statement caches
+            await time_legs(
+                session_factory, leg, location_type, embeddings[:1],
+                negative_embedding)
+
+            latencies = await time_legs(
+                session_factory, leg, location_type, embeddings,
+                negative_embedding)
+            print_latencies(location_type, name, latencies, 1e3)
+
+    await text_engine.dispose()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,6 +2,7 @@ import sys
 from pathlib import Path
 import pytest
 import time
+import json
 # add the project directory to the sys.path
 project_dir = str(Path(__file__).resolve().parents[1])
 sys.path.append(project_dir)
@@ -47,6 +48,21 @@ def test_translate(test_client):
     assert res.json()["result"] == "Hello"
 
 
+def test_translate_batch(test_client):
+    res = test_client.post("translate/batch/", json={
+        "items": [
+            {"text": "你好", "language": "en-AU"},
+            {"text": "你好", "language": "en-AU"},
+            {"text": "", "language": "zh-CN"}
+        ]
+    })
+    assert res.status_code == 200
+
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    results = {line["index"]: line["result"] for line in lines}
+    assert results == {0: "Hello", 1: "Hello", 2: ""}
+
+
 def test_create_user(test_client):
     res = test_client.post(
         "/user/", json={"username": "test", "password": "test1234"})
@@ -165,6 +181,42 @@ def test_route_v2(test_client):
     )
     assert res.status_code == 400
 
+    time.sleep(2)
+
+    for limit in (0, -1):
+        res = test_client.get(
+            f"/route/user/{user_id}/?limit={limit}",
+            headers=headers
+        )
+        assert res.status_code == 400
+
+    time.sleep(2)
+
+    res = test_client.get(
+        f"/route/user/{user_id}/?limit=1",
+        headers=headers
+    )
+    assert res.status_code == 200
+    assert len(res.json()) == 1
+    cursor = res.headers["X-Next-Cursor"]
+
+    time.sleep(2)
+
+    res = test_client.get(
+        f"/route/user/{user_id}/?limit=1&cursor={cursor}",
+        headers=headers
+    )
+    assert res.status_code == 200
+    assert all(route["route"]["route_id"] != route_id for route in res.json())
+
+    time.sleep(2)
+
+    res = test_client.get(
+        f"/route/user/{user_id}/?cursor=invalid",
+        headers=headers
+    )
+    assert res.status_code == 400
+
     res = test_client.delete(
         f"/route/{route_id}/"
     )
@@ -203,6 +255,15 @@ def test_route_v3(test_client):
     assert res.status_code == 200
     assert len(res.json()["locations"]) == 3
 
+    route_id = res.json()["route_id"]
+    instructions = res.json()["instructions"]
+
+    res = test_client.get(
+        f"/search/route/instructions/{route_id}/zh-CN/",
+        headers=headers)
+    assert res.status_code == 200
+    assert len(res.json()["instructions"]) == len(instructions)
+
 
 def test_vote(test_client):
     res = test_client.post(
@@ -265,6 +326,28 @@ def test_vote(test_client):
 
     assert res.status_code == 404
 
+    res = test_client.post(
+        "/vote/bulk/",
+        headers=headers,
+        json={"votes": [
+            {"route_id": route_id, "vote": True},
+            {"route_id": route_id, "vote": False},
+            {"route_id": route_id, "vote": True},
+            {"route_id": 0, "vote": True}
+        ]})
+
+    assert res.status_code == 200
+    assert res.json() == [
+        {"route_id": route_id, "vote": True, "status": "voted"},
+        {"route_id": 0, "vote": True, "status": "not_found"}
+    ]
+
+    res = test_client.get(
+        f"/route/{route_id}"
+    )
+
+    assert res.json()["num_votes"] == 1
+
 
 def test_challenge(test_client):
     print("Testing challenge...")
@@ -337,3 +420,183 @@ def test_challenge(test_client):
 
     if routes_fav_challenge:
         assert routes_fav_challenge["progress"] == 1.0
+
+
+@pytest.fixture
+def headers(test_client):
+    res = test_client.post(
+        "/login/v2/", json={"username": "test", "password": "test1234"})
+    assert res.status_code == 200
+    token = res.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def published_route(test_client, headers):
+    time.sleep(2)
+
+    res = test_client.post(
+        "/search/v2/route/",
+        headers=headers,
+        json={
+            "query": ["museum", "Indian", "Warehouse"],
+            "negative_query": ["Chinese", "Japanese", "Korean"],
+            "location_type": ["landmark", "restaurant", "pharmacy"],
+            "longitude": 144.9549,
+            "latitude": -37.81803,
+            "distance_threshold": 1000,
+            "similarity_threshold": 0.1,
+            "negative_similarity_threshold": 0.1,
+            "route_type": "walking"
+        })
+    assert res.status_code == 200
+
+    route_id = res.json()["route_id"]
+
+    res = test_client.post(
+        f"/route/publish/{route_id}/",
+        headers=headers)
+    assert res.status_code == 201
+
+    yield route_id
+
+    # Already deleted by test_route_delete
+    test_client.delete(f"/route/{route_id}/", headers=headers)
+
+
+def test_route_feed_nearby(test_client, headers, published_route):
+    res = test_client.get(
+        "/route/feed/nearby/?longitude=144.9549&latitude=-37.81803&distance=500",
+        headers=headers)
+    assert res.status_code == 200
+    assert published_route in [
+        route["route"]["route_id"] for route in res.json()]
+
+    res = test_client.get(
+        "/route/feed/nearby/?longitude=144.9549&latitude=-37.81803&distance=100000",
+        headers=headers)
+    assert res.status_code == 400
+
+    # Deep pages are answered by the index, past the results they are empty
+    res = test_client.get(
+        "/route/feed/nearby/?longitude=144.9549&latitude=-37.81803&offset=200",
+        headers=headers)
+    assert res.status_code == 200
+    assert res.json() == []
+
+    for limit in (0, -1):
+        res = test_client.get(
+            f"/route/feed/nearby/?longitude=144.9549&latitude=-37.81803"
+            f"&limit={limit}",
+            headers=headers)
+        assert res.status_code == 400
+
+
+def test_route_geometry(test_client, headers, published_route):
+    res = test_client.get(
+        f"/route/{published_route}/geometry/",
+        headers=headers)
+    assert res.status_code == 200
+    assert len(res.json()["route"]) > 0
+
+
+def test_route_feed_orderings(test_client, headers, published_route):
+    res = test_client.get(
+        "/route/feed/top_routes/?order_by=created_at&limit=1",
+        headers=headers)
+    assert res.status_code == 200
+    assert res.json()[0]["route"]["route_id"] == published_route
+
+    res = test_client.get(
+        "/route/feed/top_routes/?order_by=hot",
+        headers=headers)
+    assert res.status_code == 200
+    assert published_route in [
+        route["route"]["route_id"] for route in res.json()]
+
+    res = test_client.get(
+        "/route/feed/top_routes/?order_by=invalid",
+        headers=headers)
+    assert res.status_code == 400
+
+    for limit in (0, -1):
+        res = test_client.get(
+            f"/route/feed/top_routes/?limit={limit}",
+            headers=headers)
+        assert res.status_code == 400
+
+
+def test_route_feed_fields(test_client, headers, published_route):
+    res = test_client.get(
+        "/route/feed/top_routes/?order_by=created_at&view=summary",
+        headers=headers)
+    assert res.status_code == 200
+    summary = res.json()[0]["route"]
+    assert summary["route_id"] == published_route
+    assert "route" not in summary and "instructions" not in summary
+
+    res = test_client.get(
+        "/route/feed/top_routes/?order_by=created_at&fields=locations",
+        headers=headers)
+    assert res.status_code == 200
+    assert set(res.json()[0]["route"]) == {"route_id", "locations"}
+
+    res = test_client.get(
+        "/route/feed/top_routes/?fields=password",
+        headers=headers)
+    assert res.status_code == 400
+
+
+def test_route_batch(test_client, headers, published_route):
+    res = test_client.post(
+        "/route/batch/",
+        headers=headers,
+        json={"route_ids": [published_route, 1000000000]})
+    assert res.status_code == 200
+    routes = res.json()["routes"]
+    assert routes[str(published_route)]["found"]
+    assert routes[str(published_route)]["route"]["route_id"] == published_route
+    assert not routes["1000000000"]["found"]
+
+    time.sleep(1)
+
+    res = test_client.post(
+        "/route/batch/",
+        headers=headers,
+        json={"route_ids": list(range(1, 100))})
+    assert res.status_code == 400
+
+
+def test_route_etag(test_client, published_route):
+    res = test_client.get(f"/route/{published_route}/")
+    assert res.status_code == 200
+    etag = res.headers["ETag"]
+
+    time.sleep(1)
+
+    res = test_client.get(
+        f"/route/{published_route}/",
+        headers={"If-None-Match": etag})
+    assert res.status_code == 304
+
+
+def test_route_compression(test_client, published_route):
+    res = test_client.get(f"/route/{published_route}/")
+    assert res.status_code == 200
+    # Spliced from the cached deflate chunk of the route
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert res.json()["route"]["route_id"] == published_route
+
+
+def test_route_delete(test_client, headers, published_route):
+    res = test_client.delete(
+        f"/route/{published_route}/",
+        headers=headers)
+    assert res.status_code == 204
+
+    res = test_client.get(
+        "/route/feed/top_routes/?order_by=created_at",
+        headers=headers)
+    assert res.status_code == 200
+    assert published_route not in [
+        route["route"]["route_id"] for route in res.json()]
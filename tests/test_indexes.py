@@ -0,0 +1,204 @@
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+import pytest
+# add the project directory to the sys.path
+project_dir = str(Path(__file__).resolve().parents[1])
+sys.path.append(project_dir)
+
+from sqlalchemy import event, select, text  # noqa
+from sqlalchemy.orm import Session  # noqa
+from app import models  # noqa
+from app.database import engine  # noqa
+from app.routers import challenge, route, vote  # noqa
+
+# EXPLAIN the statements built by the routers against a seeded database,
+# failing when one of them scans a table larger than SEQ_SCAN_ROW_THRESHOLD
+# rows sequentially, i.e. when a filter or sort is missing its index.
+# The seed rows are inserted in a transaction which is rolled back.
+# The database is expected to be migrated already, see test_api.py.
+
+SEED_USERS = 200
+SEED_ROUTES_PER_USER = 25
+SEED_CHALLENGE_DAYS = 30
+SEQ_SCAN_ROW_THRESHOLD = 1000
+
+SEEDED_TABLES = [
+    "users", "routes", "user_route_votes",
+    "prompts", "prompt_routes", "user_challenges"
+]
+
+SEED_SQL = [
+    """
+    INSERT INTO users (username, password)
+    SELECT 'explain_' || i, 'password'
+    FROM generate_series(1, :users) AS i
+    """,
+    """
+    INSERT INTO routes (
+        created_by_user_id, locations, location_latitudes,
+        location_longitudes, route_latitudes, route_longitudes,
+        instructions, duration, created_at, published_until)
+    SELECT u.user_id, ARRAY['a', 'b'], ARRAY[-37.8, -37.81],
+        ARRAY[144.9, 144.91], ARRAY[-37.8, -37.81], ARRAY[144.9, 144.91],
+        ARRAY['Head north'], 600, now() - i * interval '1 hour',
+        CASE WHEN i = 1 THEN now() + interval '1 day' END
+    FROM users u, generate_series(1, :routes_per_user) AS i
+    WHERE u.username LIKE 'explain\\_%'
+    """,
+    # Each user votes for the routes of the next user
+    """
+    INSERT INTO user_route_votes (user_id, route_id)
+    SELECT voter.user_id, r.route_id
+    FROM routes r
+    JOIN users voter ON voter.user_id = r.created_by_user_id + 1
+    WHERE voter.username LIKE 'explain\\_%'
+    """,
+    """
+    INSERT INTO prompts (
+        created_by_user_id, prompt, location_type, created_at)
+    SELECT r.created_by_user_id, ARRAY['park'], ARRAY['landmark'],
+        r.created_at
+    FROM routes r
+    JOIN users u ON u.user_id = r.created_by_user_id
+    WHERE u.username LIKE 'explain\\_%'
+    """,
+    """
+    INSERT INTO prompt_routes (prompt_id, created_by_user_id, route_id)
+    SELECT p.prompt_id, p.created_by_user_id, r.route_id
+    FROM prompts p
+    JOIN routes r ON r.created_by_user_id = p.created_by_user_id
+        AND r.created_at = p.created_at
+    JOIN users u ON u.user_id = p.created_by_user_id
+    WHERE u.username LIKE 'explain\\_%'
+    """,
+    """
+    INSERT INTO user_challenges (
+        user_id, challenge_id, year, month, day, created_at, progress,
+        score_added)
+    SELECT u.user_id, c.id,
+        extract(year FROM d)::int, extract(month FROM d)::int,
+        extract(day FROM d)::int, d, 1, false
+    FROM users u,
+        (SELECT min(id) AS id FROM challenges) c,
+        generate_series(0, :challenge_days - 1) AS i,
+        LATERAL (SELECT now() - i * interval '1 day' AS d) days
+    WHERE u.username LIKE 'explain\\_%'
+    """
+]
+
+
+def router_statements(user_id: int, route_ids: list[int]) -> dict:
+    """
+    The statements the routers build on the hot paths,
+    keyed by a description.
+    """
+    today = datetime.now().date()
+
+    return {
+        "routes of a user": route.user_route_ids_statement(
+            'all', user_id, 0, 10),
+        "routes of a user, next page": route.user_route_ids_statement(
+            'all', user_id, 0, 10, after=(datetime.now(), route_ids[0])),
+        "routes voted by a user": route.user_route_ids_statement(
+            'feed_fav', user_id, 0, 10),
+        "routes with their image and prompts": route.routes_statement(
+            route_ids),
+        "nearby published routes": route.nearby_route_ids_statement(
+            144.9549, -37.81803, 1000, 0, 10),
+        "votes of a user": vote.user_votes_statement(user_id),
+        "challenges of a user today": challenge.day_challenges_statement(
+            user_id, today),
+        "weekly score of a user": challenge.weekly_score_statement(
+            user_id, today - timedelta(days=7)),
+    }
+
+
+def seq_scans(plan: dict):
+    """
+    Yield the relations scanned sequentially in plan and its sub-plans.
+    """
+    if plan["Node Type"] == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from seq_scans(child)
+
+
+def explain(connection, statement) -> list[dict]:
+    """
+    Plans of the SQL executed for statement, including the queries of
+    its eager loads.
+    """
+    executed = []
+
+    def record(conn, cursor, sql, parameters, context, executemany):
+        executed.append((sql, parameters))
+
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        with Session(bind=connection) as session:
+            session.execute(statement).unique().all()
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+
+    return [
+        connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {sql}", parameters
+        ).scalar()[0]["Plan"]
+        for sql, parameters in executed
+    ]
+
+
+@pytest.fixture(scope="module")
+def seeded_connection():
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        connection.execute(text("""
+            INSERT INTO challenges (name, name_, type, grade, score, goal)
+            SELECT 'Explain', 'explain', 'logged_in', 1, 1, 1
+            WHERE NOT EXISTS (SELECT 1 FROM challenges)
+        """))
+        for statement in SEED_SQL:
+            connection.execute(text(statement), {
+                "users": SEED_USERS,
+                "routes_per_user": SEED_ROUTES_PER_USER,
+                "challenge_days": SEED_CHALLENGE_DAYS
+            })
+        for table in SEEDED_TABLES:
+            connection.exec_driver_sql(f"ANALYZE {table}")
+
+        try:
+            yield connection
+        finally:
+            transaction.rollback()
+
+    # Statistics are not rolled back with the seed rows
+    with engine.connect() as connection:
+        for table in SEEDED_TABLES:
+            connection.exec_driver_sql(f"ANALYZE {table}")
+        connection.commit()
+
+
+def test_hot_queries_use_indexes(seeded_connection):
+    user_id = seeded_connection.scalar(
+        select(models.User.user_id)
+        .where(models.User.username == f"explain_{SEED_USERS // 2}"))
+    route_ids = seeded_connection.scalars(
+        select(models.Route.route_id)
+        .where(models.Route.created_by_user_id == user_id)
+        .limit(10)).all()
+
+    table_rows = dict(seeded_connection.execute(text(
+        "SELECT relname, reltuples FROM pg_class WHERE relkind = 'r'"
+    )).all())
+
+    failures = []
+    for name, statement in router_statements(user_id, route_ids).items():
+        for plan in explain(seeded_connection, statement):
+            for relation in seq_scans(plan):
+                if table_rows.get(relation, 0) > SEQ_SCAN_ROW_THRESHOLD:
+                    failures.append(
+                        f"{name}: sequential scan of {relation} "
+                        f"({table_rows[relation]:.0f} rows)")
+
+    assert not failures, "\n".join(failures)
@@ -0,0 +1,215 @@
+import sys
+import asyncio
+from pathlib import Path
+import pytest
+# add the project directory to the sys.path
+project_dir = str(Path(__file__).resolve().parents[1])
+sys.path.append(project_dir)
+
+from app import translation  # noqa
+from app.instruction_translation import (  # noqa
+    COMPILED_TEMPLATES,
+    translate_instruction,
+    translate_instructions
+)
+
+# One instruction per template, with its zh-CN and hi-IN translations.
+# These run without the database, Redis or Google Translate.
+
+INSTRUCTION_CASES = [
+    (
+        "Head north on Swanston Street.",
+        "沿Swanston Street向北前进。",
+        "Swanston Street पर उत्तर की ओर चलें।"
+    ),
+    (
+        "Walk southwest",
+        "向西南前进",
+        "दक्षिण-पश्चिम की ओर चलें"
+    ),
+    (
+        "Turn left to stay on Flinders Street",
+        "左转，继续沿Flinders Street前进",
+        "Flinders Street पर बने रहने के लिए बाएं मुड़ें"
+    ),
+    (
+        "Turn slight right onto Collins Street",
+        "稍向右转进入Collins Street",
+        "Collins Street पर थोड़ा दाएं मुड़ें"
+    ),
+    (
+        "Make a sharp left",
+        "向左急转",
+        "तेज़ी से बाएं मुड़ें"
+    ),
+    (
+        "Go straight onto Elizabeth Street",
+        "直行，继续沿Elizabeth Street前进",
+        "Elizabeth Street पर सीधे चलते रहें"
+    ),
+    (
+        "Continue on Bourke Street",
+        "继续沿Bourke Street前进",
+        "Bourke Street पर चलते रहें"
+    ),
+    (
+        "Continue straight",
+        "继续直行",
+        "सीधे चलते रहें"
+    ),
+    (
+        "Keep right at the fork onto Kings Way",
+        "在岔路口靠右侧进入Kings Way",
+        "कांटे पर दाईं ओर रहकर Kings Way पर जाएं"
+    ),
+    (
+        "Keep left at the fork",
+        "在岔路口靠左侧",
+        "कांटे पर बाईं ओर रहें"
+    ),
+    (
+        "Keep left onto St Kilda Road",
+        "靠左侧进入St Kilda Road",
+        "बाईं ओर रहकर St Kilda Road पर जाएं"
+    ),
+    (
+        "Keep left to stay on St Kilda Road",
+        "保持左侧，沿St Kilda Road继续",
+        "St Kilda Road पर बने रहने के लिए बाईं ओर रहें"
+    ),
+    (
+        "Keep right",
+        "靠右侧",
+        "दाईं ओर रहें"
+    ),
+    (
+        "Make a U-turn onto Lygon Street",
+        "掉头进入Lygon Street",
+        "Lygon Street पर यू-टर्न लें"
+    ),
+    (
+        "Make a U-turn",
+        "掉头",
+        "यू-टर्न लें"
+    ),
+    (
+        "Enter the roundabout and take the 2nd exit onto Queens Road",
+        "进入环岛并从第2个出口驶出，进入Queens Road",
+        "गोलचक्कर में प्रवेश करें और दूसरा निकास लेकर Queens Road पर जाएं"
+    ),
+    (
+        "Enter the traffic circle and take the 3rd exit",
+        "进入环岛并从第3个出口驶出",
+        "गोलचक्कर में प्रवेश करें और तीसरा निकास लें"
+    ),
+    (
+        "Exit the roundabout onto Queens Road",
+        "驶出环岛进入Queens Road",
+        "गोलचक्कर से निकलकर Queens Road पर जाएं"
+    ),
+    (
+        "You have arrived at your destination, on the right.",
+        "您已到达目的地，目的地在右侧。",
+        "आप अपने गंतव्य पर पहुँच गए हैं, दाईं ओर।"
+    ),
+    (
+        "You have arrived at your 2nd destination",
+        "您已到达目的地",
+        "आप अपने गंतव्य पर पहुँच गए हैं"
+    ),
+    (
+        "Your destination is on the left",
+        "目的地在您的左侧",
+        "आपका गंतव्य बाईं ओर है"
+    ),
+    (
+        "You have arrived at Federation Square",
+        "您已到达Federation Square",
+        "आप Federation Square पर पहुँच गए हैं"
+    ),
+]
+
+UNMATCHED_INSTRUCTIONS = [
+    "Take the ferry",
+    # Matches a template, but the direction is not in the phrase table
+    "Head upward on Swanston Street",
+    # Compound maneuvers, the street is followed by another instruction
+    "Walk east on Flinders Lane, then turn left",
+    "Turn right onto Collins Street then turn left",
+    "Continue on Bourke Street; keep right",
+    "Make a U-turn onto Lygon Street. Then continue",
+]
+
+# Exits past HINDI_ORDINALS keep the numeric ordinal
+ORDINAL_CASES = [
+    ("Enter the roundabout and take the 1st exit", "पहला"),
+    ("Enter the roundabout and take the 10th exit", "दसवां"),
+    ("Enter the rotary and take the 12th exit", "12वां"),
+]
+
+
+def first_template(instruction: str) -> int:
+    text = instruction.strip().rstrip(".")
+    for index, (pattern, _) in enumerate(COMPILED_TEMPLATES):
+        if pattern.match(text):
+            return index
+
+
+def test_every_template_has_a_case():
+    matched = {first_template(case[0]) for case in INSTRUCTION_CASES}
+    assert matched == set(range(len(COMPILED_TEMPLATES)))
+
+
+@pytest.mark.parametrize("instruction,zh_cn,hi_in", INSTRUCTION_CASES)
+def test_translate_instruction(instruction, zh_cn, hi_in):
+    assert translate_instruction(instruction, "zh-CN") == zh_cn
+    assert translate_instruction(instruction, "hi-IN") == hi_in
+
+
+@pytest.mark.parametrize("instruction", UNMATCHED_INSTRUCTIONS)
+@pytest.mark.parametrize("language", ["zh-CN", "hi-IN"])
+def test_translate_instruction_unmatched(instruction, language):
+    assert translate_instruction(instruction, language) is None
+
+
+@pytest.mark.parametrize("instruction,ordinal", ORDINAL_CASES)
+def test_translate_instruction_hindi_ordinals(instruction, ordinal):
+    assert translate_instruction(instruction, "hi-IN") == (
+        f"गोलचक्कर में प्रवेश करें और {ordinal} निकास लें")
+
+
+def test_translate_instructions_falls_back_to_remote(monkeypatch):
+    remote_calls = []
+
+    async def translate_texts(texts, target_language, db):
+        remote_calls.append((texts, target_language))
+        return [f"remote: {text}" for text in texts]
+
+    monkeypatch.setattr(translation, "translate_texts", translate_texts)
+
+    translated = asyncio.run(translate_instructions(
+        ["Turn left.", "Take the ferry", "Keep right",
+         "Walk east on Flinders Lane, then turn left"], "zh-CN", None))
+
+    assert translated == [
+        "左转。",
+        "remote: Take the ferry",
+        "靠右侧",
+        "remote: Walk east on Flinders Lane, then turn left"
+    ]
+    assert remote_calls == [(
+        ["Take the ferry", "Walk east on Flinders Lane, then turn left"],
+        "zh-CN"
+    )]
+
+
+def test_translate_instructions_all_matched(monkeypatch):
+    async def translate_texts(texts, target_language, db):
+        raise AssertionError("Remote translation should not be called")
+
+    monkeypatch.setattr(translation, "translate_texts", translate_texts)
+
+    translated = asyncio.run(translate_instructions(
+        ["Make a U-turn", "Continue"], "hi-IN", None))
+
+    assert translated == ["यू-टर्न लें", "सीधे चलते रहें"]